@@ -0,0 +1,87 @@
+"""Compare pricing a rental for every candidate vehicle with the array
+operations of QuoteService against a Python loop per vehicle and day.
+
+    python benchmarks/fare_quotes.py --vehicles 1000 10000 --days 3 30
+"""
+
+# misc
+import sys
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+from os import path
+from random import Random
+from time import perf_counter
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from rent_a_car.services.quote import QuoteService
+
+
+def quote_naive(quotes: QuoteService, fares, surcharges, pickup_at, return_at):
+    # what pricing looks like without arrays: every day of every vehicle
+    prices = []
+    for fare, surcharge in zip(fares, surcharges):
+        price = 0.0
+        for day in range(quotes.get_days(pickup_at, return_at)):
+            date = (pickup_at + timedelta(days=day)).date()
+            multiplier = quotes.weekend if date.weekday() >= 5 else quotes.daily
+            month_day = date.month * 100 + date.day
+            for start, end, season in quotes.seasons:
+                if (
+                    (start <= month_day <= end)
+                    if start <= end
+                    else (month_day >= start or month_day <= end)
+                ):
+                    multiplier *= season
+            price += (fare + surcharge) * multiplier
+        prices.append(round(price, 2))
+    return prices
+
+
+def measure(function, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        result = function()
+        best = min(best, perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--days", type=int, nargs="+", default=[3, 30])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    quotes = QuoteService(1.0, 1.25, [(12, 15, 1, 5, 1.5), (7, 1, 8, 31, 1.2)])
+    random = Random(0)
+    pickup_at = datetime(2026, 12, 20, 10)
+    print(f"{'vehicles':>8} {'days':>5} {'loop ms':>9} {'numpy ms':>9} {'speedup':>8}")
+    for vehicles in args.vehicles:
+        fares = [random.choice([80.0, 100.0, 150.0, 220.0]) for _ in range(vehicles)]
+        surcharges = [random.choice([0.0, 10.0, 25.5]) for _ in range(vehicles)]
+        for days in args.days:
+            return_at = pickup_at + timedelta(days=days)
+            naive, expected = measure(
+                lambda: quote_naive(quotes, fares, surcharges, pickup_at, return_at),
+                args.repeat,
+            )
+            # the rates array is built from the query rows in both cases
+            vectorized, prices = measure(
+                lambda: quotes.quote(
+                    [fare + surcharge for fare, surcharge in zip(fares, surcharges)],
+                    pickup_at,
+                    return_at,
+                ),
+                args.repeat,
+            )
+            assert max(abs(a - b) for a, b in zip(prices, expected)) < 0.02
+            print(
+                f"{vehicles:>8} {days:>5} {naive * 1000:>9.2f} "
+                f"{vectorized * 1000:>9.2f} {naive / vectorized:>7.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
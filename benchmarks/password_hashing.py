@@ -0,0 +1,53 @@
+"""Measure how many logins per second password verification allows, per
+hash cost and worker setting, while `--threads` request threads log in at once.
+
+    python benchmarks/password_hashing.py --rounds 29000 100000 --workers 0 2 4
+"""
+
+# misc
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from os import cpu_count, path
+from time import perf_counter
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from rent_a_car.utils.passwords import PasswordHasher
+
+
+def measure(hasher: PasswordHasher, hash: str, logins: int, threads: int):
+    with ThreadPoolExecutor(threads) as executor:
+        # warm the pool up, so starting its processes is not measured
+        list(executor.map(hasher.verify, ["password"] * threads, [hash] * threads))
+        start = perf_counter()
+        results = list(
+            executor.map(hasher.verify, ["password"] * logins, [hash] * logins)
+        )
+        elapsed = perf_counter() - start
+    assert all(results)
+    return logins / elapsed
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, nargs="+", default=[29000, 100000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, cpu_count()])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'rounds':>8} {'workers':>8} {'logins/s':>10} {'per core':>10}")
+    for rounds in args.rounds:
+        for workers in args.workers:
+            hasher = PasswordHasher(workers, {None: rounds})
+            hash = hasher.hash("password")
+            rate = measure(hasher, hash, args.logins, args.threads)
+            hasher.shutdown()
+            # without workers every hash runs under the one GIL, on one core
+            cores = min(workers, cpu_count()) or 1
+            print(f"{rounds:>8} {workers:>8} {rate:>10.1f} {rate / cores:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Show the SQLite query plan and timing of the relationship lookups, without
+and with the foreign key and tag association indexes.
+
+    python benchmarks/query_plans.py --vehicles 100000
+"""
+
+# misc
+import os
+import sys
+from argparse import ArgumentParser
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DB_FAMILY"] = "sqlite"
+os.environ["DB_URL"] = "sqlite://"
+
+import rent_a_car
+from rent_a_car.db import db
+from rent_a_car.models import *
+
+INDEXES = [
+    "ix_stores_owner_id",
+    "ix_models_make_id",
+    "ix_models_category_id",
+    "ix_vehicles_model_id",
+    "ix_vehicles_store_id",
+    "ix_category_tags_category_id",
+    "ix_model_tags_model_id",
+]
+# sqlite names the index of a UNIQUE constraint after its table
+UNIQUE = {
+    "category_tags": ("uq_category_tags", "tag_id, category_id"),
+    "model_tags": ("uq_model_tags", "tag_id, model_id"),
+}
+
+QUERIES = {
+    "stores of an owner": db.select(StoreModel).where(StoreModel.owner_id == 2),
+    "models of a make": db.select(ModelModel).where(ModelModel.make_id == 3),
+    "models of a category": db.select(ModelModel).where(ModelModel.category_id == 3),
+    "vehicles of a model": db.select(VehicleModel).where(VehicleModel.model_id == 7),
+    "vehicles of an owner": db.select(VehicleModel)
+    .join(StoreModel)
+    .where(StoreModel.owner_id == 2),
+    "tags of a model": db.select(TagModel)
+    .join(ModelTagModel)
+    .where(ModelTagModel.model_id == 7),
+    "models of a tag": db.select(ModelModel)
+    .join(ModelTagModel)
+    .where(ModelTagModel.tag_id == 3),
+    "tags of a category": db.select(TagModel)
+    .join(CategoryTagModel)
+    .where(CategoryTagModel.category_id == 3),
+}
+
+
+def seed(vehicles: int):
+    users, stores, models = 50, 500, 2000
+    execute = db.session.execute
+    execute(
+        db.insert(UserModel),
+        [
+            {
+                "email": f"u{i}@x.com",
+                "password": "",
+                "name": "User",
+                "role": "FRANCHISEE",
+            }
+            for i in range(users)
+        ],
+    )
+    execute(db.insert(MakeModel), [{"name": f"Make{i}"} for i in range(50)])
+    execute(db.insert(CategoryModel), [{"name": f"Cat{i}"} for i in range(20)])
+    execute(db.insert(TagModel), [{"name": f"Tag{i}"} for i in range(100)])
+    execute(
+        db.insert(StoreModel),
+        [{"name": f"Store{i}", "owner_id": i % users + 1} for i in range(stores)],
+    )
+    execute(
+        db.insert(ModelModel),
+        [
+            {"name": f"Model{i}", "make_id": i % 50 + 1, "category_id": i % 20 + 1}
+            for i in range(models)
+        ],
+    )
+    execute(
+        db.insert(ModelTagModel),
+        [
+            {"model_id": i % models + 1, "tag_id": i // models + 1}
+            for i in range(models * 5)
+        ],
+    )
+    execute(
+        db.insert(CategoryTagModel),
+        [{"category_id": i % 20 + 1, "tag_id": i // 20 + 1} for i in range(200)],
+    )
+    execute(
+        db.insert(VehicleModel),
+        [
+            {
+                "plate": f"P{i:07d}",
+                "model_id": i % models + 1,
+                "year": 2022,
+                "store_id": i % stores + 1,
+            }
+            for i in range(vehicles)
+        ],
+    )
+    db.session.commit()
+
+
+def drop_indexes():
+    for index in INDEXES:
+        db.session.execute(db.text(f"DROP INDEX {index}"))
+    # a UNIQUE constraint cannot be dropped in sqlite, so rebuild the tables
+    for table in UNIQUE:
+        db.session.execute(db.text(f"ALTER TABLE {table} RENAME TO {table}_old"))
+        db.session.execute(
+            db.text(f"CREATE TABLE {table} AS SELECT * FROM {table}_old")
+        )
+        db.session.execute(db.text(f"DROP TABLE {table}_old"))
+    db.session.commit()
+
+
+def create_indexes():
+    # only those dropped: the other tables keep their indexes throughout
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in INDEXES:
+                index.create(db.session.connection())
+    for table, (name, columns) in UNIQUE.items():
+        db.session.execute(
+            db.text(f"CREATE UNIQUE INDEX {name} ON {table} ({columns})")
+        )
+    db.session.execute(db.text("ANALYZE"))
+    db.session.commit()
+
+
+def report(title: str, repeat: int):
+    print(f"== {title}")
+    for name, query in QUERIES.items():
+        sql = str(query.compile(db.engine, compile_kwargs={"literal_binds": True}))
+        plan = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        start = perf_counter()
+        for _ in range(repeat):
+            db.session.execute(db.text(sql)).all()
+        elapsed = (perf_counter() - start) / repeat
+        print(f"{name:<22} {elapsed * 1000:>8.2f} ms")
+        for row in plan:
+            print(f"{'':<4}{row[-1]}")
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = rent_a_car.create_app()
+    with app.app_context():
+        db.create_all()
+        seed(args.vehicles)
+        drop_indexes()
+        report("without indexes", args.repeat)
+        create_indexes()
+        report("with indexes", args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Foreign key indexes added
+
+Revision ID: 3c9e1d7a52b4
+Revises: f6fa994fad37
+Create Date: 2026-10-17 18:30:12.104836
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3c9e1d7a52b4"
+down_revision = "f6fa994fad37"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # drop repeated tag assignments, which the unique constraints reject
+    for table, column in (("category_tags", "category_id"), ("model_tags", "model_id")):
+        op.execute(
+            f"DELETE FROM {table} WHERE id NOT IN "
+            f"(SELECT MIN(id) FROM {table} GROUP BY tag_id, {column})"
+        )
+    op.create_index(op.f("ix_stores_owner_id"), "stores", ["owner_id"])
+    op.create_index(op.f("ix_models_make_id"), "models", ["make_id"])
+    op.create_index(op.f("ix_models_category_id"), "models", ["category_id"])
+    op.create_index(op.f("ix_vehicles_model_id"), "vehicles", ["model_id"])
+    op.create_index(op.f("ix_vehicles_store_id"), "vehicles", ["store_id"])
+    op.create_index(
+        op.f("ix_category_tags_category_id"), "category_tags", ["category_id"]
+    )
+    op.create_unique_constraint(
+        "uq_category_tags", "category_tags", ["tag_id", "category_id"]
+    )
+    op.create_index(op.f("ix_model_tags_model_id"), "model_tags", ["model_id"])
+    op.create_unique_constraint("uq_model_tags", "model_tags", ["tag_id", "model_id"])
+
+
+def downgrade():
+    op.drop_constraint("uq_model_tags", "model_tags", type_="unique")
+    op.drop_index(op.f("ix_model_tags_model_id"), table_name="model_tags")
+    op.drop_constraint("uq_category_tags", "category_tags", type_="unique")
+    op.drop_index(op.f("ix_category_tags_category_id"), table_name="category_tags")
+    op.drop_index(op.f("ix_vehicles_store_id"), table_name="vehicles")
+    op.drop_index(op.f("ix_vehicles_model_id"), table_name="vehicles")
+    op.drop_index(op.f("ix_models_category_id"), table_name="models")
+    op.drop_index(op.f("ix_models_make_id"), table_name="models")
+    op.drop_index(op.f("ix_stores_owner_id"), table_name="stores")
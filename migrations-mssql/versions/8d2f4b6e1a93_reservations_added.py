@@ -0,0 +1,43 @@
+"""Reservations added
+
+Revision ID: 8d2f4b6e1a93
+Revises: 3c9e1d7a52b4
+Create Date: 2026-10-17 19:05:41.327519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8d2f4b6e1a93"
+down_revision = "3c9e1d7a52b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "reservations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("vehicle_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("pickup_at", sa.DateTime(), nullable=False),
+        sa.Column("return_at", sa.DateTime(), nullable=False),
+        sa.CheckConstraint("return_at > pickup_at", name="ck_reservations_period"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["vehicle_id"], ["vehicles.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_reservations_user_id"), "reservations", ["user_id"])
+    op.create_index(
+        "ix_reservations_vehicle_period",
+        "reservations",
+        ["vehicle_id", "return_at", "pickup_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_reservations_vehicle_period", table_name="reservations")
+    op.drop_index(op.f("ix_reservations_user_id"), table_name="reservations")
+    op.drop_table("reservations")
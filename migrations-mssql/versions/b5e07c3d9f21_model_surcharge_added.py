@@ -0,0 +1,28 @@
+"""Model surcharge added
+
+Revision ID: b5e07c3d9f21
+Revises: 8d2f4b6e1a93
+Create Date: 2026-10-17 19:42:18.604233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b5e07c3d9f21"
+down_revision = "8d2f4b6e1a93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "models",
+        sa.Column("surcharge", sa.Float(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade():
+    # the server default is a constraint mssql will not drop the column with
+    op.drop_column("models", "surcharge", mssql_drop_default=True)
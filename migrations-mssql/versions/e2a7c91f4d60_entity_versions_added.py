@@ -0,0 +1,30 @@
+"""Entity versions added
+
+Revision ID: e2a7c91f4d60
+Revises: b5e07c3d9f21
+Create Date: 2026-10-17 21:12:40.118529
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e2a7c91f4d60"
+down_revision = "b5e07c3d9f21"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "entity_versions",
+        sa.Column("name", sa.String(length=30), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("modified", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade():
+    op.drop_table("entity_versions")
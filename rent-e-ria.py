@@ -1,12 +1,14 @@
 import rent_a_car
 import logging
+from rent_a_car.utils.log import log_queue
 from flask_migrate import upgrade
 
 
 def create_app():
     app = rent_a_car.create_app()
     gunicorn_logger = logging.getLogger("gunicorn.error")
-    app.logger.handlers = gunicorn_logger.handlers
+    # written from the logging thread, not the request threads
+    log_queue.set_handlers(gunicorn_logger.handlers)
     app.logger.setLevel(gunicorn_logger.level)
 
     with app.app_context():
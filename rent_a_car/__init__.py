@@ -3,19 +3,55 @@ from flask import Flask
 from flask_migrate import Migrate
 
 # project-related
+from .config import (
+    get_binds,
+    get_bool,
+    get_engine_options,
+    get_fare_multipliers,
+    get_float,
+    get_hash_rounds,
+    get_int,
+    get_query_timeout,
+    get_sqlite_pragmas,
+    set_query_timeout,
+    set_sqlite_pragmas,
+)
 from .db import db
+from .models import UserRole
+from .services import (
+    lookup_service,
+    principal_service,
+    quote_service,
+    search_service,
+    tag_index_service,
+)
+from .commands import import_command, search_index_command
+from .admin import blp as AdminBlueprint
+from .api import blp as ApiBlueprint
 from .category import blp as CategoryBlueprint
 from .make import blp as MakeBlueprint
 from .model import blp as ModelBlueprint
 from .home import blp as HomeBlueprint
+from .metrics import blp as MetricsBlueprint
+from .reservation import blp as ReservationBlueprint
+from .search import blp as SearchBlueprint
 from .store import blp as StoreBlueprint
 from .tag import blp as TagBlueprint
 from .user import blp as UserBlueprint, add_login
 from .vehicle import blp as VehicleBlueprint
+from .utils.cache import RedisCache
+from .utils.fragments import fragment_cache
+from .utils.instrumentation import query_instrumentation
+from .utils.log import log_queue
+from .utils.metrics import metrics
+from .utils.passwords import password_hasher
+from .utils.profiler import request_profiler
+from .utils.timing import server_timing
 
 # misc
 from dotenv import load_dotenv
 from os import getenv
+from os.path import abspath, join
 
 
 def create_app():
@@ -24,14 +60,75 @@ def create_app():
     DB_FAMILY = getenv("DB_FAMILY") or "sqlite"
     DB_URL = getenv("DB_URL") or "sqlite:///data.db"
     SESSION_KEY = getenv("SESSION_KEY") or "rentacar"
+    PRINCIPAL_CACHE_TTL = float(getenv("PRINCIPAL_CACHE_TTL") or 60)
+    LOOKUP_CACHE_TTL = float(getenv("LOOKUP_CACHE_TTL") or 300)
+    FRAGMENT_CACHE_SIZE = int(getenv("FRAGMENT_CACHE_SIZE") or 512)
+    FRAGMENT_CACHE_URL = getenv("FRAGMENT_CACHE_URL")
+    FRAGMENT_CACHE_TTL = float(getenv("FRAGMENT_CACHE_TTL") or 30)
+    CACHE_MAX_AGE = int(getenv("CACHE_MAX_AGE") or 0)
+    SEARCH_INDEX_TTL = float(getenv("SEARCH_INDEX_TTL") or 300)
+    DEFAULT_LOG_LEVEL = "DEBUG" if app.debug else "INFO"
 
     app.config["SQLALCHEMY_DATABASE_URI"] = DB_URL
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = get_engine_options(DB_FAMILY, DB_URL)
+    app.config["SQLALCHEMY_BINDS"] = get_binds(DB_FAMILY, DB_URL)
+    app.config["DB_QUERY_TIMEOUT"] = get_query_timeout()
+    if DB_FAMILY == "sqlite":
+        app.config["SQLITE_PRAGMAS"] = get_sqlite_pragmas()
+    app.config["PRINCIPAL_CACHE_TTL"] = PRINCIPAL_CACHE_TTL
+    app.config["LOOKUP_CACHE_TTL"] = LOOKUP_CACHE_TTL
+    app.config["FRAGMENT_CACHE_SIZE"] = FRAGMENT_CACHE_SIZE
+    app.config["FRAGMENT_CACHE_URL"] = FRAGMENT_CACHE_URL
+    app.config["FRAGMENT_CACHE_TTL"] = FRAGMENT_CACHE_TTL
+    app.config["CACHE_MAX_AGE"] = CACHE_MAX_AGE
+    app.config["SEARCH_INDEX_TTL"] = SEARCH_INDEX_TTL
+    app.config["FARE_MULTIPLIERS"] = get_fare_multipliers()
+    app.config["QUERY_INSTRUMENTATION"] = get_bool("QUERY_INSTRUMENTATION", True)
+    app.config["QUERY_REPEAT_THRESHOLD"] = get_int("QUERY_REPEAT_THRESHOLD", 5, min=2)
+    app.config["QUERY_BUDGET"] = get_int("QUERY_BUDGET")
+    app.config["METRICS"] = get_bool("METRICS", False)
+    app.config["METRICS_DIR"] = getenv("METRICS_DIR")
+    app.config["METRICS_FLUSH_INTERVAL"] = get_float("METRICS_FLUSH_INTERVAL", 1.0)
+    app.config["METRICS_TOKEN"] = getenv("METRICS_TOKEN")
+    app.config["SERVER_TIMING"] = get_bool("SERVER_TIMING", False)
+    app.config["PROFILE_DIR"] = abspath(
+        getenv("PROFILE_DIR") or join(app.instance_path, "profiles")
+    )
+    app.config["PROFILE_SAMPLE_RATE"] = get_float("PROFILE_SAMPLE_RATE", 0.0)
+    app.config["PROFILE_INTERVAL"] = get_float("PROFILE_INTERVAL", 0.005)
+    app.config["PROFILE_KEEP"] = get_int("PROFILE_KEEP", 100, min=1)
+    app.config["LOG_LEVEL"] = (getenv("LOG_LEVEL") or DEFAULT_LOG_LEVEL).upper()
+    app.config["LOG_FORMAT"] = getenv("LOG_FORMAT") or "text"
+    app.config["HASH_WORKERS"] = get_int("HASH_WORKERS", 0, min=0)
+    app.config["HASH_ROUNDS"] = get_hash_rounds(UserRole)
     app.secret_key = SESSION_KEY
 
+    # first, so every request has its id before anything logs
+    log_queue.init_app(app)
     db.init_app(app)
+    with app.app_context():
+        set_query_timeout(db.engine, DB_FAMILY, app.config["DB_QUERY_TIMEOUT"])
+        if DB_FAMILY == "sqlite":
+            for engine in db.engines.values():
+                set_sqlite_pragmas(engine, app.config["SQLITE_PRAGMAS"])
+        if app.config["QUERY_INSTRUMENTATION"]:
+            query_instrumentation.init_app(app, db.engines.values())
+        if app.config["METRICS"]:
+            add_metrics(app)
+        if app.config["SERVER_TIMING"]:
+            server_timing.init_app(app, db.engines.values())
+    lookup_service.cache.ttl = app.config["LOOKUP_CACHE_TTL"]
+    add_fragment_cache(app)
+    search_service.configure(DB_FAMILY, app.config["SEARCH_INDEX_TTL"])
+    tag_index_service.configure(app.config["SEARCH_INDEX_TTL"])
+    quote_service.configure(**app.config["FARE_MULTIPLIERS"])
+    password_hasher.configure(app.config["HASH_WORKERS"], app.config["HASH_ROUNDS"])
+    request_profiler.init_app(app)
     migrate = Migrate(app, db, directory=f"migrations-{DB_FAMILY}")
     add_login(app)
+    app.cli.add_command(import_command)
+    app.cli.add_command(search_index_command)
 
     app.register_blueprint(HomeBlueprint)
     app.register_blueprint(UserBlueprint)
@@ -41,9 +138,36 @@ def create_app():
     app.register_blueprint(ModelBlueprint)
     app.register_blueprint(VehicleBlueprint)
     app.register_blueprint(TagBlueprint)
+    app.register_blueprint(ReservationBlueprint)
+    app.register_blueprint(SearchBlueprint)
+    app.register_blueprint(ApiBlueprint)
+    app.register_blueprint(AdminBlueprint)
+    if app.config["METRICS"]:
+        app.register_blueprint(MetricsBlueprint)
 
     @app.before_request
     def before_request():
         app.jinja_env.globals.update(type=type, zip=zip, float=float)
 
     return app
+
+
+def add_fragment_cache(app: Flask):
+    if app.config["FRAGMENT_CACHE_URL"]:
+        # share fragments between processes; stale ones are left to expire
+        fragment_cache.backend = RedisCache(app.config["FRAGMENT_CACHE_URL"], ttl=3600)
+    else:
+        fragment_cache.backend.maxsize = app.config["FRAGMENT_CACHE_SIZE"]
+        fragment_cache.backend.ttl = app.config["FRAGMENT_CACHE_TTL"]
+
+
+def add_metrics(app: Flask):
+    metrics.init_app(
+        app,
+        dict(db.engines),
+        caches={
+            "principal": lambda: principal_service.cache,
+            "lookup": lambda: lookup_service.cache,
+            "fragment": lambda: fragment_cache.backend,
+        },
+    )
@@ -0,0 +1,122 @@
+# flask-related
+from flask import (
+    abort,
+    current_app as app,
+    jsonify,
+    render_template,
+    send_from_directory,
+    url_for,
+)
+from flask.views import MethodView
+from flask_login import current_user, login_required
+from flask_smorest import Blueprint
+
+# project-related
+from .factory import EndpointMixinFactory
+from .user import login_as_admin_required
+from .utils.instrumentation import query_instrumentation
+from .utils.nav import get_nav_by_user
+from .utils.profiler import parse_profile_name, request_profiler
+
+blp = Blueprint("admin", __name__, url_prefix="/admin")
+
+
+EndpointMixin = EndpointMixinFactory.create_endpoint(blp)
+
+
+@blp.route("/profiles")
+class Profiles(MethodView, EndpointMixin):
+    @login_required
+    @login_as_admin_required
+    def get(self):
+        names = request_profiler.get_names()
+        profiles = [(name, *parse_profile_name(name)) for name in names]
+        return render_template(
+            "generic/all.html",
+            title=type(self).__name__,
+            nav=get_nav_by_user(current_user),
+            table={
+                "name": "profiles",
+                "headers": ["time", "endpoint", "duration"],
+                "rows": [
+                    {
+                        "time": f"{time:%Y-%m-%d %H:%M:%S}",
+                        "endpoint": endpoint,
+                        "duration": duration,
+                    }
+                    for _, time, endpoint, duration in profiles
+                ],
+                "refs": [
+                    {"time": url_for(str(ProfileName()), name=name)}
+                    for name, *_ in profiles
+                ],
+                "pics": [],
+            },
+        )
+
+
+@blp.route("/profiles/<name>")
+class ProfileName(MethodView, EndpointMixin):
+    @login_required
+    @login_as_admin_required
+    def get(self, name):
+        if name not in request_profiler.get_names():
+            abort(404)
+        return send_from_directory(
+            request_profiler.directory, name, mimetype="text/plain"
+        )
+
+
+@blp.route("/queries")
+class Queries(MethodView, EndpointMixin):
+    @login_required
+    @login_as_admin_required
+    def get(self):
+        if "query_instrumentation" not in app.extensions:
+            abort(404)
+        report = query_instrumentation.report()
+        return render_template(
+            "generic/all.html",
+            title=type(self).__name__,
+            nav=get_nav_by_user(current_user),
+            table={
+                "name": "queries",
+                "headers": [
+                    "endpoint",
+                    "requests",
+                    "queries_per_request",
+                    "max_queries",
+                    "db_ms_per_request",
+                    "likely_n_plus_one",
+                ],
+                "rows": [
+                    {
+                        "endpoint": endpoint,
+                        "requests": stats["requests"],
+                        "queries_per_request": f"{stats['queries_per_request']:.1f}",
+                        "max_queries": stats["max_queries"],
+                        "db_ms_per_request": f"{stats['db_ms_per_request']:.1f}",
+                        "likely_n_plus_one": len(stats["likely_n_plus_one"]),
+                    }
+                    for endpoint, stats in report.items()
+                ],
+                "refs": [
+                    {"endpoint": url_for(str(QueriesEndpoint()), name=endpoint)}
+                    for endpoint in report
+                ],
+                "pics": [],
+            },
+        )
+
+
+@blp.route("/queries/<name>")
+class QueriesEndpoint(MethodView, EndpointMixin):
+    @login_required
+    @login_as_admin_required
+    def get(self, name):
+        if "query_instrumentation" not in app.extensions:
+            abort(404)
+        report = query_instrumentation.report()
+        if name not in report:
+            abort(404)
+        return jsonify(report[name])
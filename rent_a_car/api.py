@@ -0,0 +1,177 @@
+# flask-related
+from flask import current_app as app, abort, jsonify
+from flask.views import MethodView
+from flask_login import current_user
+from flask_smorest import Blueprint
+from werkzeug.exceptions import HTTPException
+
+# project-related
+from .factory import EndpointMixinFactory
+from .schemas import (
+    CategorySchemaNested,
+    MakeSchema,
+    ModelSchemaNested,
+    ResourceSchema,
+    StoreResourceSchema,
+    TagSchema,
+    UserSchema,
+    VehicleResourceSchema,
+)
+from .services import (
+    category_service,
+    make_service,
+    model_service,
+    store_service,
+    tag_service,
+    user_service,
+    vehicle_service,
+)
+from .utils.nav import get_page_nav
+from .utils.timing import timed
+
+
+blp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+EndpointMixin = EndpointMixinFactory.create_endpoint(blp)
+
+
+def everyone(user):
+    return None
+
+
+def operators(user):
+    if not user.is_authenticated:
+        abort(401)
+    if not (user.is_admin() or user.is_franchisee()):
+        abort(403)
+    return None
+
+
+def admins(user):
+    if not user.is_authenticated:
+        abort(401)
+    if not user.is_admin():
+        abort(403)
+    return None
+
+
+def store_owners(user):
+    # franchisees only list their own stores
+    if user.is_authenticated and user.is_franchisee():
+        return user.id
+    return None
+
+
+def vehicle_owners(user):
+    if not user.is_authenticated:
+        abort(401)
+    return None if user.is_admin() else user.id
+
+
+class Resource:
+    """An entity exposed by the API: the service reading it, the schema
+    dumping it, the relationships clients may include and `owner(user)`,
+    which aborts when the user may not read it and otherwise returns the id
+    of the owner whose entries the user may list (None for all of them)."""
+
+    def __init__(self, service, schema, includes: tuple = (), owner=everyone):
+        self.service = service
+        self.schema = schema
+        self.includes = includes
+        self.owner = owner
+
+    @property
+    def fields(self):
+        columns = self.service.model.__table__.c
+        return [
+            name
+            for name, field in self.schema().fields.items()
+            if not field.load_only and name in columns
+        ]
+
+    def get_schema(self, columns: list = None, include: list = None):
+        """Return the schema dumping `columns` (all by default) and the
+        `include`d relationships, aborting on any the API does not expose."""
+        unknown = set(columns or ()).difference(self.fields)
+        if unknown:
+            abort(400, f"Unknown fields: {', '.join(sorted(unknown))}.")
+        unknown = set(include or ()).difference(self.includes)
+        if unknown:
+            abort(400, f"Unknown relationships: {', '.join(sorted(unknown))}.")
+        return self.schema(only=[*(columns or self.fields), *(include or ())])
+
+
+RESOURCES = {
+    "categories": Resource(category_service, CategorySchemaNested, ("tags",)),
+    "makes": Resource(make_service, MakeSchema),
+    "models": Resource(model_service, ModelSchemaNested, ("make", "category", "tags")),
+    "stores": Resource(store_service, StoreResourceSchema, owner=store_owners),
+    "tags": Resource(tag_service, TagSchema, owner=operators),
+    "users": Resource(user_service, UserSchema, owner=admins),
+    "vehicles": Resource(
+        vehicle_service, VehicleResourceSchema, ("model", "store"), owner=vehicle_owners
+    ),
+}
+
+
+def get_resource(name):
+    if name not in RESOURCES:
+        abort(404, f"Unknown resource {name!r}.")
+    return RESOURCES[name]
+
+
+@blp.errorhandler(HTTPException)
+def handle_error(e):
+    # webargs validation errors carry the per-field messages
+    messages = getattr(e, "data", {}).get("messages")
+    return (
+        jsonify(code=e.code, status=e.name, message=messages or e.description),
+        e.code,
+    )
+
+
+@blp.route("/<resource>")
+class Resources(MethodView, EndpointMixin):
+    @blp.arguments(ResourceSchema, location="query", as_kwargs=True)
+    def get(self, resource, columns=None, include=None, **kwargs):
+        app.logger.info(f"Listing {resource} through the API.")
+        entity = get_resource(resource)
+        schema = entity.get_schema(columns, include)
+        owner = entity.owner(current_user)
+        fields = columns or entity.fields
+        include = tuple(include or ())
+        if owner is None:
+            page = entity.service.get_page(fields=fields, include=include, **kwargs)
+        else:
+            page = entity.service.get_owned_page(
+                owner, fields=fields, include=include, **kwargs
+            )
+        with timed("serialize"):
+            response = jsonify(
+                data=schema.dump(page, many=True), page=get_page_nav(page)
+            )
+        return response
+
+
+@blp.route("/<resource>/<int:id>")
+class ResourceId(MethodView, EndpointMixin):
+    @blp.arguments(
+        ResourceSchema(only=["columns", "include"]), location="query", as_kwargs=True
+    )
+    def get(self, resource, id, columns=None, include=None):
+        app.logger.info(f"Fetching {resource} #{id} through the API.")
+        entity = get_resource(resource)
+        schema = entity.get_schema(columns, include)
+        owner = entity.owner(current_user)
+        include = tuple(include or ())
+        if owner is None:
+            entry = entity.service.get(id, include=include)
+        else:
+            # outside the user's scope reads as missing, like in the listing
+            entry = entity.service.get_owned(owner, id, include=include)
+        if not entry:
+            abort(404, f"{entity.service.name.capitalize()} #{id} not found!")
+        with timed("serialize"):
+            response = jsonify(data=schema.dump(entry))
+        return response
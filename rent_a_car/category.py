@@ -6,10 +6,28 @@ from flask_smorest import Blueprint
 
 # project-related
 from .factory import EndpointMixinFactory
-from .schemas import CategorySchema, CategorySchemaNested, TagSchema, TagInputSchema
-from .services import category_service, DuplicateCategoryError, tag_service
+from .schemas import (
+    CategorySchema,
+    CategorySchemaNested,
+    ExportSchema,
+    PageSchema,
+    TagSchema,
+    TagInputSchema,
+)
+from .services import (
+    category_service,
+    model_service,
+    tag_service,
+    version_service,
+    DuplicateCategoryError,
+)
 from .user import login_as_admin_required
+from .utils.conditional import conditional
+from .utils.export import export_response
+from .utils.fragments import fragment_cache, get_viewer
+from .utils.log import Lazy
 from .utils.nav import *
+from .utils.timing import timed
 
 
 # misc
@@ -47,7 +65,7 @@ class Category(MethodView, EndpointMixin):
     @blp.arguments(CategorySchema, location="form")
     def post(self, category):
         app.logger.info(f"Creating {self.blp.name}.")
-        app.logger.debug(f"{self.blp.name.capitalize()} info: {category}.")
+        app.logger.debug("%s info: %s.", self.blp.name.capitalize(), category)
         nav = get_nav_by_user(current_user)
         try:
             category = category_service.create(**category)
@@ -92,8 +110,9 @@ class Category(MethodView, EndpointMixin):
 
 @blp.route("/all")
 class Categories(MethodView, EndpointMixin):
-    def get(self):
-        categories = category_service.get_all()
+    @conditional("category", "model")
+    @blp.arguments(PageSchema, location="query", as_kwargs=True)
+    def get(self, **kwargs):
         nav = get_nav_by_user(current_user)
         if current_user.is_authenticated and current_user.is_admin():
             nav = [NAV_CREATE_CATEGORY()] + nav
@@ -102,27 +121,31 @@ class Categories(MethodView, EndpointMixin):
             "generic/all.html",
             title=f"{type(self).__name__}",
             nav=nav,
-            table={
-                "name": "categories",
-                "headers": ["name", "fare", "models"],
-                "rows": [
-                    {
-                        "name": category.name,
-                        "fare": category.fare,
-                        "models": len(list(category.models)),
-                    }
-                    for category in categories
-                ],
-                "refs": [
-                    {"name": url_for(str(CategoryId()), category_id=category.id)}
-                    for category in categories
-                ],
-            },
+            table=fragment_cache.render_table(
+                "categories",
+                get_viewer(current_user),
+                version_service.get("category", "model"),
+                lambda: get_categories_table(
+                    category_service.get_page(with_counts=True, **kwargs)
+                ),
+            ),
+        )
+
+
+@blp.route("/export")
+class CategoryExport(MethodView, EndpointMixin):
+    @blp.arguments(ExportSchema, location="query", as_kwargs=True)
+    def get(self, format):
+        app.logger.info(f"Exporting categories as {format}.")
+        rows = category_service.stream()
+        return export_response(
+            "categories", category_service.export_fields, rows, format
         )
 
 
 @blp.route("/<category_id>")
 class CategoryId(MethodView, EndpointMixin):
+    @conditional("category", "model", "make", "tag")
     @blp.arguments(Schema, location="query", as_kwargs=True, unknown=INCLUDE)
     def get(self, category_id, **kwargs):
         app.logger.info(f"Fetching {self.blp.name} #{category_id}.")
@@ -130,14 +153,17 @@ class CategoryId(MethodView, EndpointMixin):
         if category:
             is_owner = current_user.is_authenticated and current_user.is_admin()
             update = is_owner and "edit" in kwargs
+            models = category.models.options(*model_service.load_options("list")).all()
             nav = get_nav_by_user(current_user)
+            with timed("serialize"):
+                info = CategorySchemaNested().dump(category)
             return render_template(
                 "generic/view.html",
                 title=category.name,
                 submit="Update",
                 nav=nav,
                 schema=CategorySchema if update else CategorySchemaNested,
-                info=CategorySchemaNested().dump(category),
+                info=info,
                 info_lists_url={
                     "tags": {"url_prefix": "/tag/", "has_button": is_owner}
                 },
@@ -153,7 +179,7 @@ class CategoryId(MethodView, EndpointMixin):
                                 "make": model.make.name,
                                 "picture": model.picture or "",
                             }
-                            for model in category.models
+                            for model in models
                         ],
                         "refs": [
                             {
@@ -164,7 +190,7 @@ class CategoryId(MethodView, EndpointMixin):
                                     str("make.MakeId"), make_id=model.make.id
                                 ),
                             }
-                            for model in category.models
+                            for model in models
                         ],
                         "pics": ["picture"],
                     },
@@ -181,7 +207,7 @@ class CategoryId(MethodView, EndpointMixin):
     @blp.arguments(CategorySchema, location="form")
     def post(self, category_info, category_id):
         app.logger.info(f"Updating {self.blp.name} #{category_id}.")
-        app.logger.debug(f"{self.blp.name.capitalize()} data: {category_info}.")
+        app.logger.debug("%s data: %s.", self.blp.name.capitalize(), category_info)
         try:
             category = category_service.update_category(category_id, **category_info)
         except DuplicateCategoryError as e:
@@ -248,7 +274,9 @@ class CategoryTags(MethodView, EndpointMixin):
         if not category:
             app.logger.error(f"{blp.name.capitalize()} not found!")
             abort(404)
-        app.logger.debug(f"Current tags are {[str(tag) for tag in category.tags]}.")
+        app.logger.debug(
+            "Current tags are %s.", Lazy(lambda: [str(tag) for tag in category.tags])
+        )
         if "available" in kwargs:
             tag_ids = kwargs["available"]
             app.logger.info(f"Adding tags #{tag_ids}.")
@@ -258,7 +286,9 @@ class CategoryTags(MethodView, EndpointMixin):
                     f"Some tags do not exist: {list(set(tag_ids).difference(set([tag.id for tag in tags])))}."
                 )
                 abort(400)
-            app.logger.debug(f"Added tags are {[tag.name for tag in tags]}.")
+            app.logger.debug(
+                "Added tags are %s.", Lazy(lambda: [tag.name for tag in tags])
+            )
             try:
                 category_service.add_tags(category_id, tags)
             except ValueError as e:
@@ -274,7 +304,9 @@ class CategoryTags(MethodView, EndpointMixin):
                     f"Some tags do not exist: {list(set(tag_ids).difference(set([tag.id for tag in tags])))}."
                 )
                 abort(400)
-            app.logger.debug(f"Removed tags are {[tag.name for tag in tags]}.")
+            app.logger.debug(
+                "Removed tags are %s.", Lazy(lambda: [tag.name for tag in tags])
+            )
             try:
                 category_service.remove_tags(category_id, tags)
             except ValueError as e:
@@ -296,6 +328,26 @@ class CategoryTags(MethodView, EndpointMixin):
         )
 
 
+def get_categories_table(categories):
+    return {
+        "name": "categories",
+        "headers": ["name", "fare", "models"],
+        "rows": [
+            {
+                "name": category.name,
+                "fare": category.fare,
+                "models": models,
+            }
+            for category, models in categories
+        ],
+        "refs": [
+            {"name": url_for(str(CategoryId()), category_id=category.id)}
+            for category, _ in categories
+        ],
+        "page": get_page_nav(categories),
+    }
+
+
 def map_tags(category):
     all_tags = tag_service.get_all()
     [all_tags.remove(tag) for tag in category.tags]
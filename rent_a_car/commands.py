@@ -0,0 +1,151 @@
+# flask-related
+from flask.cli import with_appcontext
+
+# project-related
+from .schemas import MakeSchema, ModelSchema, StoreSchema, VehicleSchema
+from .services import (
+    make_service,
+    category_service,
+    model_service,
+    search_service,
+    store_service,
+    user_service,
+    vehicle_service,
+)
+
+# misc
+import click
+import json
+from csv import DictReader
+from marshmallow import ValidationError
+from time import perf_counter
+
+# entity: (service, schema, {name column: (id field, service resolving it)})
+IMPORTS = {
+    "makes": (make_service, MakeSchema, {}),
+    "models": (
+        model_service,
+        ModelSchema,
+        {
+            "make": ("make_id", make_service),
+            "category": ("category_id", category_service),
+        },
+    ),
+    "stores": (store_service, StoreSchema, {"owner": ("owner_id", user_service)}),
+    "vehicles": (
+        vehicle_service,
+        VehicleSchema,
+        {"model": ("model_id", model_service), "store": ("store_id", store_service)},
+    ),
+}
+
+
+def read_rows(file, format: str):
+    if format == "ndjson":
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from DictReader(file)
+
+
+@click.command("import")
+@click.argument("entity", type=click.Choice(list(IMPORTS)))
+@click.argument("file", type=click.File(encoding="utf-8-sig"))
+@click.option(
+    "--format",
+    type=click.Choice(["csv", "ndjson"]),
+    help="Input format, guessed from the file extension by default.",
+)
+@click.option(
+    "--batch-size", default=500, show_default=True, help="Rows per transaction."
+)
+@click.option("--owner", help="E-mail of the owner of stores without an owner column.")
+@with_appcontext
+def import_command(entity, file, format, batch_size, owner):
+    """Import makes, models, stores or vehicles from a CSV or NDJSON FILE.
+
+    Foreign keys can be given by id (make_id, ...) or by name (make, category,
+    model, store, or owner e-mail for stores)."""
+    service, schema_class, references = IMPORTS[entity]
+    schema = schema_class()
+    format = format or (
+        "ndjson" if file.name.endswith((".ndjson", ".jsonl")) else "csv"
+    )
+    # name -> id lookups, loaded once with column-only queries
+    indexes = {
+        name: (field, reference.get_id_index())
+        for name, (field, reference) in references.items()
+    }
+    defaults = {}
+    if owner:
+        if owner not in indexes.get("owner", (None, {}))[1]:
+            raise click.BadParameter(f"Unknown owner {owner!r}.", param_hint="--owner")
+        defaults["owner_id"] = indexes["owner"][1][owner]
+
+    created = skipped = 0
+    lines, batch = [], []
+
+    def flush():
+        nonlocal created, skipped
+        count, errors = service.create_many(batch)
+        for index, error in errors.items():
+            click.echo(f"Line {lines[index]}: {error}", err=True)
+        created += count
+        skipped += len(errors)
+        lines.clear()
+        batch.clear()
+
+    start = perf_counter()
+    for line, row in enumerate(read_rows(file, format), start=1):
+        try:
+            entry = load_row(row, schema, indexes, defaults)
+        except ValidationError as e:
+            click.echo(f"Line {line}: {e.normalized_messages()}", err=True)
+            skipped += 1
+            continue
+        lines.append(line)
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    elapsed = perf_counter() - start
+    click.echo(
+        f"Imported {created} {entity}, skipped {skipped} rows in {elapsed:.2f}s "
+        f"({(created + skipped) / elapsed if elapsed else 0:.0f} rows/s)."
+    )
+
+
+def load_row(row: dict, schema, indexes: dict, defaults: dict):
+    row = {key: value for key, value in row.items() if value not in (None, "")}
+    entry = dict(defaults)
+    for name, (field, index) in indexes.items():
+        if field in row:
+            entry[field] = row.pop(field)
+        elif name in row:
+            value = row.pop(name)
+            if value not in index:
+                raise ValidationError({name: [f"Unknown {name} {value!r}."]})
+            entry[field] = index[value]
+    entry.update(row)
+    # ids the schema does not load (like a store's owner) are only converted
+    loaded = schema.load(
+        {key: value for key, value in entry.items() if key in schema.load_fields}
+    )
+    for name, (field, index) in indexes.items():
+        if field not in loaded:
+            try:
+                loaded[field] = int(entry[field])
+            except (KeyError, ValueError):
+                raise ValidationError({field: ["Missing or invalid id."]})
+    return loaded
+
+
+@click.command("search-index")
+@with_appcontext
+def search_index_command():
+    """Rebuild the catalog search index, after writes made around the app."""
+    start = perf_counter()
+    search_service.rebuild()
+    click.echo(f"Rebuilt the search index in {perf_counter() - start:.2f}s.")
@@ -0,0 +1,192 @@
+# project-related
+from .db import TimedQueuePool, WRITER
+
+# misc
+from datetime import datetime
+from os import getenv
+from passlib.hash import pbkdf2_sha256
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+DB_FAMILIES = ("sqlite", "mssql")
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def get_int(name: str, default: int = None, min: int = 0):
+    value = getenv(name)
+    if not value:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ConfigError(f"{name} must be an integer, got {value!r}!")
+    if min is not None and value < min:
+        raise ConfigError(f"{name} must be at least {min}, got {value}!")
+    return value
+
+
+def get_float(name: str, default: float = None, min: float = 0.0):
+    value = getenv(name)
+    if not value:
+        return default
+    try:
+        value = float(value)
+    except ValueError:
+        raise ConfigError(f"{name} must be a number, got {value!r}!")
+    if min is not None and value < min:
+        raise ConfigError(f"{name} must be at least {min}, got {value}!")
+    return value
+
+
+def get_bool(name: str, default: bool = None):
+    value = getenv(name)
+    if not value:
+        return default
+    if value.lower() in ("1", "true", "yes", "on"):
+        return True
+    if value.lower() in ("0", "false", "no", "off"):
+        return False
+    raise ConfigError(f"{name} must be a boolean, got {value!r}!")
+
+
+def get_engine_options(family: str, url: str):
+    """Build the SQLAlchemy engine options of `family` from the DB_* variables:
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE (seconds),
+    DB_POOL_PRE_PING and, on mssql, DB_FAST_EXECUTEMANY. Raise a ConfigError
+    on any invalid value."""
+    if family not in DB_FAMILIES:
+        raise ConfigError(f"DB_FAMILY must be one of {DB_FAMILIES}, got {family!r}!")
+    try:
+        url = make_url(url)
+    except Exception as e:
+        raise ConfigError(f"DB_URL is not a valid database URL: {e}")
+    mssql = family == "mssql"
+    options = {
+        "pool_pre_ping": get_bool("DB_POOL_PRE_PING", mssql),
+        # mssql closes idle connections, so recycle them before it does
+        "pool_recycle": get_int("DB_POOL_RECYCLE", 1800 if mssql else -1, min=-1),
+    }
+    if url.get_backend_name() == "sqlite" and not is_sqlite_file(url):
+        # an in-memory database lives in its connection, which is never pooled
+        return options
+    options["poolclass"] = TimedQueuePool
+    options["pool_size"] = get_int("DB_POOL_SIZE", 5, min=1)
+    options["max_overflow"] = get_int("DB_MAX_OVERFLOW", 10)
+    options["pool_timeout"] = get_int("DB_POOL_TIMEOUT", 30)
+    if mssql:
+        # sends executemany() parameters in one round trip instead of one a row
+        options["fast_executemany"] = get_bool("DB_FAST_EXECUTEMANY", True)
+    return options
+
+
+def get_query_timeout():
+    """Read DB_QUERY_TIMEOUT, the seconds a statement may run (0 for none)."""
+    return get_int("DB_QUERY_TIMEOUT", 0)
+
+
+def set_query_timeout(engine, family: str, seconds: int):
+    if not seconds:
+        return
+    if family != "mssql":
+        raise ConfigError("DB_QUERY_TIMEOUT is only supported on the mssql family!")
+
+    @event.listens_for(engine, "connect")
+    def set_timeout(dbapi_connection, connection_record):
+        # pyodbc cancels the statements running longer than this
+        dbapi_connection.timeout = seconds
+
+
+def get_fare_multipliers():
+    """Read the multipliers applied to the daily rate of a rental:
+    FARE_DAILY_MULTIPLIER on weekdays, FARE_WEEKEND_MULTIPLIER on Saturdays and
+    Sundays, and FARE_SEASONS, a comma-separated list of MM-DD:MM-DD:multiplier
+    seasons (which may wrap around the new year), on the days they cover."""
+    seasons = []
+    for season in (getenv("FARE_SEASONS") or "").split(","):
+        if not season.strip():
+            continue
+        try:
+            start, end, multiplier = season.strip().split(":")
+            start, end = (datetime.strptime(day, "%m-%d") for day in (start, end))
+            seasons.append(
+                (start.month, start.day, end.month, end.day, float(multiplier))
+            )
+        except ValueError:
+            raise ConfigError(
+                f"FARE_SEASONS must hold MM-DD:MM-DD:multiplier seasons, got {season!r}!"
+            )
+    return {
+        "daily": get_float("FARE_DAILY_MULTIPLIER", 1.0),
+        "weekend": get_float("FARE_WEEKEND_MULTIPLIER", 1.0),
+        "seasons": seasons,
+    }
+
+
+def get_hash_rounds(roles):
+    """Read HASH_ROUNDS_<ROLE>, the pbkdf2_sha256 rounds of the passwords of
+    each of the `roles` that sets it."""
+    rounds = {}
+    for role in roles:
+        name = f"HASH_ROUNDS_{role.name}"
+        value = get_int(name, min=pbkdf2_sha256.min_rounds)
+        if value is None:
+            continue
+        if value > pbkdf2_sha256.max_rounds:
+            raise ConfigError(
+                f"{name} must be at most {pbkdf2_sha256.max_rounds}, got {value}!"
+            )
+        rounds[role] = value
+    return rounds
+
+
+def is_sqlite_file(url: str):
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def get_binds(family: str, url: str):
+    """On a SQLite file, add the WRITER bind: one connection (so writes queue
+    for it instead of failing with "database is locked") waiting up to
+    DB_WRITE_TIMEOUT seconds, while the default bind pools the readers."""
+    if family != "sqlite" or not is_sqlite_file(url):
+        return {}
+    return {
+        WRITER: {
+            "url": url,
+            "poolclass": TimedQueuePool,
+            "pool_size": 1,
+            "max_overflow": 0,
+            "pool_timeout": get_int("DB_WRITE_TIMEOUT", 30),
+        }
+    }
+
+
+def get_sqlite_pragmas():
+    """Read the pragmas set on every SQLite connection: WAL journaling, so
+    readers do not block the writer, with SQLITE_MMAP_SIZE (bytes),
+    SQLITE_CACHE_SIZE (pages, or KiB when negative) and SQLITE_BUSY_TIMEOUT
+    (milliseconds to wait on a lock held by another process)."""
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "foreign_keys": "ON",
+        "mmap_size": get_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+        "cache_size": get_int("SQLITE_CACHE_SIZE", -64 * 1024, min=None),
+        "busy_timeout": get_int("SQLITE_BUSY_TIMEOUT", 5000),
+    }
+
+
+def set_sqlite_pragmas(engine, pragmas: dict):
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
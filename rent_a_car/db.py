@@ -1,11 +1,73 @@
+from bisect import bisect_right
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from logging import getLogger
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.sql import ColumnExpressionArgument
+from sqlalchemy.sql.dml import UpdateBase
+from time import perf_counter
 
-db = SQLAlchemy()
+# bind of the single connection writes are serialized on, when configured
+WRITER = "writer"
 
 
-def get_entry(model, id: int):
-    entry = db.session.get(model, id)
+class RoutingSession(Session):
+    """A session sending flushes and INSERT/UPDATE/DELETE statements to the
+    WRITER bind, when there is one, and everything else to the default bind.
+
+    The two are separate connections: reads do not see the writes of the
+    current transaction until it commits, which every service write does."""
+
+    _writing = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and WRITER in self._db.engines:
+            if self._flushing or self._writing or isinstance(clause, UpdateBase):
+                return self._db.engines[WRITER]
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+    def execute(self, statement, *args, **kwargs):
+        # bulk INSERT/UPDATE ask for a bind by mapper only, without the clause
+        self._writing = isinstance(statement, UpdateBase)
+        try:
+            return super().execute(statement, *args, **kwargs)
+        finally:
+            self._writing = False
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+PAGE_SIZE = 50
+# keeps IN lists below the parameter limits of every backend (2100 on mssql)
+IN_CHUNK_SIZE = 1000
+
+
+class TimedQueuePool(QueuePool):
+    """A QueuePool logging how long each checkout waited for a connection,
+    at warning level past `slow_checkout` seconds, to size pools against the
+    number of workers."""
+
+    # not `logger`, which Pool sets to its own echo logger
+    checkout_logger = getLogger("rent_a_car.pool")
+    slow_checkout = 0.1
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait = perf_counter() - start
+            level = "warning" if wait > self.slow_checkout else "debug"
+            getattr(self.checkout_logger, level)(
+                "Waited %.1f ms for a connection (%d checked out of %d).",
+                wait * 1000,
+                self.checkedout(),
+                self.size() + self._max_overflow,
+            )
+
+
+def get_entry(model, id: int, options: tuple = ()):
+    entry = db.session.get(model, id, options=options)
     return entry
 
 
@@ -16,10 +78,9 @@ def get_entry_by(model, **kwargs):
     return entry
 
 
-def get_entries(model, ids: list):
-    entries = (
-        db.session.execute(db.select(model).where(model.id.in_(ids))).scalars().all()
-    )
+def get_entries(model, ids: list, options: tuple = ()):
+    query = db.select(model).where(model.id.in_(ids)).order_by(model.id)
+    entries = db.session.execute(query.options(*options)).unique().scalars().all()
     return entries
 
 
@@ -32,6 +93,67 @@ def add_entry(entry):
         raise
 
 
+def add_entries(model, rows: list[dict]):
+    # one executemany INSERT per set of provided columns (so omitted columns
+    # keep their defaults), committed as one transaction
+    batches = {}
+    for row in rows:
+        batches.setdefault(frozenset(row), []).append(row)
+    try:
+        for batch in batches.values():
+            db.session.execute(db.insert(model), batch)
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+
+
+def add_entry_unless(model, values: dict, conflict: ColumnExpressionArgument[bool]):
+    """Insert a `model` row of `values` unless a row matching `conflict`
+    exists, in a single INSERT ... SELECT so no write slips between the check
+    and the insert (mssql is told to lock the range it checked). Return the
+    id of the new row, or None if there was a conflict."""
+    conflicting = (
+        db.select(model.id)
+        .where(conflict)
+        .with_hint(model, "WITH (UPDLOCK, HOLDLOCK)", "mssql")
+    )
+    row = db.select(
+        *(db.literal(value).label(name) for name, value in values.items())
+    ).where(~conflicting.exists())
+    statement = db.insert(model).from_select(list(values), row).returning(model.id)
+    try:
+        id = db.session.execute(statement).scalar()
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+    return id
+
+
+def update_entries(model, rows: list[dict]):
+    # bulk UPDATE by primary key, committed as one transaction
+    try:
+        db.session.execute(db.update(model), rows)
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+
+
+def increment_entry(model, column, filter: ColumnExpressionArgument[bool], **values):
+    """Add one to `column` of the rows matching `filter`, setting `values`
+    in the same UPDATE, and return how many rows it changed."""
+    statement = db.update(model).where(filter).values({column: column + 1, **values})
+    try:
+        count = db.session.execute(statement).rowcount
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+    return count
+
+
 def delete_entry(model, id):
     entry = db.session.get(model, id)
     if entry:
@@ -40,35 +162,178 @@ def delete_entry(model, id):
     return entry
 
 
-def get_all_entries(model):
+def get_all_entries(model, options: tuple = ()):
     entries = (
         db.session.execute(
             db.select(
                 model,
-            )
+            ).options(*options)
         )
+        .unique()
         .scalars()
         .all()
     )
     return entries
 
 
-def get_entries_filtered(model, **kwargs):
+def get_entries_filtered(model, options: tuple = (), **kwargs):
     entries = (
         db.session.execute(
             db.select(
                 model,
-            ).filter_by(**kwargs)
+            )
+            .filter_by(**kwargs)
+            .options(*options)
         )
+        .unique()
         .scalars()
         .all()
     )
     return entries
 
 
-def get_entries_joined_filtered(*models, filter: ColumnExpressionArgument[bool]):
+def count_by(foreign_key):
+    return (
+        db.select(foreign_key.label("parent_id"), db.func.count().label("count"))
+        .group_by(foreign_key)
+        .subquery()
+    )
+
+
+def select_with_counts(model, foreign_keys: tuple = ()):
+    # one grouped COUNT per child table, outer joined so childless parents
+    # still show up with a count of zero
+    query = db.select(model)
+    for foreign_key in foreign_keys:
+        counts = count_by(foreign_key)
+        query = query.outerjoin(counts, counts.c.parent_id == model.id).add_columns(
+            db.func.coalesce(counts.c.count, 0)
+        )
+    return query
+
+
+def get_all_entries_with_counts(
+    model, *foreign_keys, filter: ColumnExpressionArgument[bool] = None
+):
+    query = select_with_counts(model, foreign_keys)
+    if filter is not None:
+        query = query.where(filter)
+    entries = db.session.execute(query.order_by(model.id)).all()
+    return entries
+
+
+def get_rows_in(column, values, *columns, joins: tuple = ()):
+    query = db.select(column, *columns)
+    for join in joins:
+        query = query.join(join)
+    rows = []
+    values = list(values)
+    for start in range(0, len(values), IN_CHUNK_SIZE):
+        chunk = values[start : start + IN_CHUNK_SIZE]
+        rows += db.session.execute(query.where(column.in_(chunk))).all()
+    return rows
+
+
+def get_entries_joined_filtered(
+    *models, filter: ColumnExpressionArgument[bool], options: tuple = ()
+):
     query = db.session.query(models[0])
     for model in models[1:]:
         query = query.join(model)
-    query = query.filter(filter)
+    query = query.filter(filter).options(*options)
     return query.all()
+
+
+class Page:
+    """A keyset page of entries, ordered by id. When child counts were
+    requested each entry is an `(entry, *counts)` row instead, and when
+    columns were requested a row of them.
+
+    `next_after` is the cursor for the following page (None on the last one)
+    and `prev_after` the cursor for the previous page (None when the previous
+    page is the first one, check `has_prev`)."""
+
+    def __init__(self, entries, limit, after=None, next_after=None, prev_after=None):
+        self.entries = entries
+        self.limit = limit
+        self.after = after
+        self.next_after = next_after
+        self.prev_after = prev_after
+
+    @property
+    def has_prev(self):
+        return bool(self.after)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def get_entries_page(
+    model,
+    after: int = None,
+    limit: int = PAGE_SIZE,
+    joins: tuple = (),
+    filter: ColumnExpressionArgument[bool] = None,
+    options: tuple = (),
+    counts: tuple = (),
+    columns: tuple = (),
+):
+    # a column-only select must still hold the id, for the cursor
+    if columns:
+        query = db.select(model.id, *(c for c in columns if c is not model.id))
+    else:
+        query = select_with_counts(model, counts)
+    for join in joins:
+        query = query.join(join)
+    if filter is not None:
+        query = query.where(filter)
+    page_query = query.order_by(model.id).limit(limit + 1).options(*options)
+    if after:
+        page_query = page_query.where(model.id > after)
+    result = db.session.execute(page_query).unique()
+    entries = result.all() if counts or columns else result.scalars().all()
+    next_after = None
+    if len(entries) > limit:
+        last = entries[limit - 1]
+        next_after = last[0].id if counts else last.id
+    prev_after = None
+    if after:
+        # the previous page holds the `limit` entries up to `after`, so its own
+        # cursor is the id right before them (none if it is the first page)
+        prev_after = db.session.execute(
+            query.with_only_columns(model.id)
+            .where(model.id <= after)
+            .order_by(model.id.desc())
+            .offset(limit)
+            .limit(1)
+        ).scalar()
+    return Page(entries[:limit], limit, after, next_after, prev_after)
+
+
+def get_entries_page_in(
+    model, ids: list, after: int = None, limit: int = PAGE_SIZE, options: tuple = ()
+):
+    """Return a keyset page of the entries whose id is in the sorted `ids`.
+    The cursors are found in `ids` itself, so only the page's own ids are
+    sent to the database."""
+    start = bisect_right(ids, after) if after else 0
+    page_ids = ids[start : start + limit]
+    entries = get_entries(model, page_ids, options=options) if page_ids else []
+    next_after = page_ids[-1] if start + limit < len(ids) else None
+    prev_after = ids[start - limit - 1] if after and start - limit - 1 >= 0 else None
+    return Page(entries, limit, after, next_after, prev_after)
+
+
+def get_rows(query):
+    rows = db.session.execute(query).all()
+    return rows
+
+
+def stream_rows(query, batch_size: int = 1000):
+    # server-side cursor, fetched `batch_size` rows at a time
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield from partition
@@ -6,10 +6,19 @@ from flask_smorest import Blueprint
 
 # project-related
 from .factory import EndpointMixinFactory
-from .schemas import MakeSchema
-from .services import make_service, DuplicateMakeError
+from .schemas import ExportSchema, MakeSchema, PageSchema
+from .services import (
+    make_service,
+    model_service,
+    version_service,
+    DuplicateMakeError,
+)
 from .user import login_as_admin_required
+from .utils.conditional import conditional
+from .utils.export import export_response
+from .utils.fragments import fragment_cache, get_viewer
 from .utils.nav import *
+from .utils.timing import timed
 
 
 # misc
@@ -46,7 +55,7 @@ class Make(MethodView, EndpointMixin):
     @blp.arguments(MakeSchema, location="form")
     def post(self, make):
         app.logger.info(f"Creating {self.blp.name}.")
-        app.logger.debug(f"{self.blp.name.capitalize()} info: {make}.")
+        app.logger.debug("%s info: %s.", self.blp.name.capitalize(), make)
         nav = get_nav_by_user(current_user)
         try:
             make = make_service.create(**make)
@@ -89,8 +98,9 @@ class Make(MethodView, EndpointMixin):
 
 @blp.route("/all")
 class Makes(MethodView, EndpointMixin):
-    def get(self):
-        makes = make_service.get_all()
+    @conditional("make", "model")
+    @blp.arguments(PageSchema, location="query", as_kwargs=True)
+    def get(self, **kwargs):
         nav = get_nav_by_user(current_user)
         if current_user.is_authenticated and current_user.is_admin():
             nav = [NAV_CREATE_MAKE()] + nav
@@ -100,41 +110,46 @@ class Makes(MethodView, EndpointMixin):
             "generic/all.html",
             title=f"{type(self).__name__}",
             nav=nav,
-            table={
-                "name": "makes",
-                "headers": ["logo", "name", "models"],
-                "rows": [
-                    {
-                        "logo": make.logo or "",
-                        "name": make.name,
-                        "models": len(list(make.models)),
-                    }
-                    for make in makes
-                ],
-                "refs": [
-                    {"name": url_for(str(MakeId()), make_id=make.id)} for make in makes
-                ],
-                "pics": ["logo"],
-            },
+            table=fragment_cache.render_table(
+                "makes",
+                get_viewer(current_user),
+                version_service.get("make", "model"),
+                lambda: get_makes_table(
+                    make_service.get_page(with_counts=True, **kwargs)
+                ),
+            ),
         )
 
 
+@blp.route("/export")
+class MakeExport(MethodView, EndpointMixin):
+    @blp.arguments(ExportSchema, location="query", as_kwargs=True)
+    def get(self, format):
+        app.logger.info(f"Exporting {self.blp.name}s as {format}.")
+        rows = make_service.stream()
+        return export_response("makes", make_service.export_fields, rows, format)
+
+
 @blp.route("/<make_id>")
 class MakeId(MethodView, EndpointMixin):
+    @conditional("make", "model", "category")
     @blp.arguments(Schema, location="query", as_kwargs=True, unknown=INCLUDE)
     def get(self, make_id, **kwargs):
         app.logger.info(f"Fetching {self.blp.name} #{make_id}.")
         make = make_service.get(make_id)
         if make:
             is_owner = current_user.is_authenticated and current_user.is_admin()
+            models = make.models.options(*model_service.load_options("list")).all()
             nav = get_nav_by_user(current_user)
+            with timed("serialize"):
+                info = MakeSchema().dump(make)
             return render_template(
                 "generic/view.html",
                 title=make.name,
                 submit="Update",
                 nav=nav,
                 schema=MakeSchema,
-                info=MakeSchema().dump(make),
+                info=info,
                 is_owner=is_owner,
                 update=is_owner and "edit" in kwargs,
                 tables=[
@@ -147,7 +162,7 @@ class MakeId(MethodView, EndpointMixin):
                                 "category": model.category.name,
                                 "picture": model.picture or "",
                             }
-                            for model in make.models
+                            for model in models
                         ],
                         "refs": [
                             {
@@ -159,7 +174,7 @@ class MakeId(MethodView, EndpointMixin):
                                     category_id=model.category.id,
                                 ),
                             }
-                            for model in make.models
+                            for model in models
                         ],
                         "pics": ["picture"],
                     },
@@ -176,7 +191,7 @@ class MakeId(MethodView, EndpointMixin):
     @blp.arguments(MakeSchema, location="form")
     def post(self, make_info, make_id):
         app.logger.info(f"Updating {self.blp.name} #{make_id}.")
-        app.logger.debug(f"{self.blp.name.capitalize()} data: {make_info}.")
+        app.logger.debug("%s data: %s.", self.blp.name.capitalize(), make_info)
         try:
             make = make_service.update(make_id, **make_info)
         except DuplicateMakeError as e:
@@ -206,3 +221,23 @@ class MakeId(MethodView, EndpointMixin):
             app.logger.error(f"{self.blp.name.capitalize()} not found!")
             abort(404)
         return redirect(url_for(str(Makes()))), 303
+
+
+def get_makes_table(makes):
+    return {
+        "name": "makes",
+        "headers": ["logo", "name", "models"],
+        "rows": [
+            {
+                "logo": make.logo or "",
+                "name": make.name,
+                "models": models,
+            }
+            for make, models in makes
+        ],
+        "refs": [
+            {"name": url_for(str(MakeId()), make_id=make.id)} for make, _ in makes
+        ],
+        "pics": ["logo"],
+        "page": get_page_nav(makes),
+    }
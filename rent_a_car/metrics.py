@@ -0,0 +1,28 @@
+# flask-related
+from flask import current_app as app, Response, abort, request
+from flask.views import MethodView
+from flask_smorest import Blueprint
+
+# project-related
+from .factory import EndpointMixinFactory
+from .utils.metrics import metrics
+
+# misc
+from hmac import compare_digest
+
+blp = Blueprint("metrics", __name__)
+
+
+EndpointMixin = EndpointMixinFactory.create_endpoint(blp)
+
+
+@blp.route("/metrics")
+class Metrics(MethodView, EndpointMixin):
+    def get(self):
+        token = app.config["METRICS_TOKEN"]
+        authorization = request.headers.get("Authorization", "")
+        if token and not compare_digest(authorization, f"Bearer {token}"):
+            abort(401)
+        return Response(
+            metrics.expose(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
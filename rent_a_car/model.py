@@ -6,17 +6,30 @@ from flask_smorest import Blueprint
 
 # project-related
 from .factory import EndpointMixinFactory
-from .schemas import ModelSchema, ModelSchemaNested, TagSchema, TagInputSchema
+from .schemas import (
+    ExportSchema,
+    ModelSchema,
+    ModelSchemaNested,
+    TagFilterSchema,
+    TagSchema,
+    TagInputSchema,
+)
 from .services import (
-    category_service,
-    make_service,
+    lookup_service,
     model_service,
+    tag_index_service,
     tag_service,
     vehicle_service,
+    version_service,
     DuplicateModelError,
 )
 from .user import login_as_admin_required
+from .utils.conditional import conditional
+from .utils.export import export_response
+from .utils.fragments import fragment_cache, get_viewer
+from .utils.log import Lazy
 from .utils.nav import *
+from .utils.timing import timed
 
 
 # misc
@@ -55,7 +68,7 @@ class Model(MethodView, EndpointMixin):
     @blp.arguments(ModelSchema, location="form")
     def post(self, model):
         app.logger.info(f"Creating {self.blp.name}.")
-        app.logger.debug(f"{self.blp.name.capitalize()} info: {model}.")
+        app.logger.debug("%s info: %s.", self.blp.name.capitalize(), model)
         nav = get_nav_by_user(current_user)
         try:
             model = model_service.create(**model)
@@ -102,8 +115,9 @@ class Model(MethodView, EndpointMixin):
 
 @blp.route("/all")
 class Models(MethodView, EndpointMixin):
-    def get(self):
-        models = model_service.get_all()
+    @conditional("model", "make", "category", "tag")
+    @blp.arguments(TagFilterSchema, location="query", as_kwargs=True)
+    def get(self, tags=(), any_tags=(), not_tags=(), **kwargs):
         nav = get_nav_by_user(current_user)
         if current_user.is_authenticated and current_user.is_admin():
             nav = [NAV_CREATE_MODEL()] + nav
@@ -112,49 +126,44 @@ class Models(MethodView, EndpointMixin):
             "generic/all.html",
             title=f"{type(self).__name__}",
             nav=nav,
-            table={
-                "name": "models",
-                "headers": ["picture", "name", "make", "category"],
-                "rows": [
-                    {
-                        "picture": model.picture or "",
-                        "name": model.name,
-                        "make": model.make.name,
-                        "category": model.category.name,
-                    }
-                    for model in models
-                ],
-                "refs": [
-                    {
-                        "name": url_for(str(ModelId()), model_id=model.id),
-                        "make": url_for("make.MakeId", make_id=model.make_id),
-                        "category": url_for(
-                            "category.CategoryId", category_id=model.category_id
-                        ),
-                    }
-                    for model in models
-                ],
-                "pics": ["picture"],
-            },
+            table=fragment_cache.render_table(
+                "models",
+                get_viewer(current_user),
+                version_service.get("model", "make", "category", "tag"),
+                lambda: get_models_table(
+                    get_models_page(tags, any_tags, not_tags, **kwargs)
+                ),
+            ),
         )
 
 
+@blp.route("/export")
+class ModelExport(MethodView, EndpointMixin):
+    @blp.arguments(ExportSchema, location="query", as_kwargs=True)
+    def get(self, format):
+        app.logger.info(f"Exporting {self.blp.name}s as {format}.")
+        rows = model_service.stream()
+        return export_response("models", model_service.export_fields, rows, format)
+
+
 @blp.route("/<model_id>")
 class ModelId(MethodView, EndpointMixin):
+    @conditional("model", "make", "category", "tag", "vehicle", "store")
     @blp.arguments(Schema, location="query", as_kwargs=True, unknown=INCLUDE)
     def get(self, model_id, **kwargs):
         app.logger.info(f"Fetching {self.blp.name} #{model_id}.")
-        model = model_service.get(model_id)
+        model = model_service.get(model_id, profile="list")
         if model:
             is_owner = current_user.is_authenticated and current_user.is_admin()
             update = is_owner and "edit" in kwargs
             nav = get_nav_by_user(current_user)
-            info = ModelSchemaNested().dump(model)
+            with timed("serialize"):
+                info = ModelSchemaNested().dump(model)
             info["category_tags"] = model.category.tags
             if current_user.is_authenticated and current_user.is_admin():
-                vehicles = vehicle_service.get_all()
+                vehicles = vehicle_service.get_all(profile="list")
             elif current_user.is_authenticated and current_user.is_franchisee():
-                vehicles = vehicle_service.get_owned_by(current_user.id)
+                vehicles = vehicle_service.get_owned_by(current_user.id, profile="list")
             else:
                 vehicles = []
             tables = (
@@ -216,7 +225,7 @@ class ModelId(MethodView, EndpointMixin):
     @blp.arguments(ModelSchema, location="form")
     def post(self, model_info, model_id):
         app.logger.info(f"Updating {self.blp.name} #{model_id}.")
-        app.logger.debug(f"{self.blp.name.capitalize()} data: {model_info}.")
+        app.logger.debug("%s data: %s.", self.blp.name.capitalize(), model_info)
         try:
             model = model_service.update(model_id, **model_info)
         except DuplicateModelError as e:
@@ -282,7 +291,9 @@ class ModelTags(MethodView, EndpointMixin):
         model = model_service.get(model_id)
         if not model:
             abort(404)
-        app.logger.debug(f"Current tags are {[str(tag) for tag in model.tags]}.")
+        app.logger.debug(
+            "Current tags are %s.", Lazy(lambda: [str(tag) for tag in model.tags])
+        )
         if "available" in kwargs:
             tag_ids = kwargs["available"]
             app.logger.info(f"Adding tags #{tag_ids}.")
@@ -292,7 +303,9 @@ class ModelTags(MethodView, EndpointMixin):
                     f"Some tags do not exist: {list(set(tag_ids).difference(set([tag.id for tag in tags])))}."
                 )
                 abort(400)
-            app.logger.debug(f"Added tags are {[tag.name for tag in tags]}.")
+            app.logger.debug(
+                "Added tags are %s.", Lazy(lambda: [tag.name for tag in tags])
+            )
             try:
                 model_service.add_tags(model_id, tags)
             except ValueError as e:
@@ -308,7 +321,9 @@ class ModelTags(MethodView, EndpointMixin):
                     f"Some tags do not exist: {list(set(tag_ids).difference(set([tag.id for tag in tags])))}."
                 )
                 abort(400)
-            app.logger.debug(f"Removed tags are {[tag.name for tag in tags]}.")
+            app.logger.debug(
+                "Removed tags are %s.", Lazy(lambda: [tag.name for tag in tags])
+            )
             try:
                 model_service.remove_tags(model_id, tags)
             except ValueError as e:
@@ -330,6 +345,41 @@ class ModelTags(MethodView, EndpointMixin):
         )
 
 
+def get_models_page(tags, any_tags, not_tags, **kwargs):
+    if not (tags or any_tags or not_tags):
+        return model_service.get_page(profile="list", **kwargs)
+    ids = tag_index_service.search(tags, any_tags, not_tags)
+    return model_service.get_page_in(ids, profile="list", **kwargs)
+
+
+def get_models_table(models):
+    return {
+        "name": "models",
+        "headers": ["picture", "name", "make", "category"],
+        "rows": [
+            {
+                "picture": model.picture or "",
+                "name": model.name,
+                "make": model.make.name,
+                "category": model.category.name,
+            }
+            for model in models
+        ],
+        "refs": [
+            {
+                "name": url_for(str(ModelId()), model_id=model.id),
+                "make": url_for("make.MakeId", make_id=model.make_id),
+                "category": url_for(
+                    "category.CategoryId", category_id=model.category_id
+                ),
+            }
+            for model in models
+        ],
+        "pics": ["picture"],
+        "page": get_page_nav(models),
+    }
+
+
 def map_tags(model):
     all_tags = tag_service.get_all()
     [all_tags.remove(tag) for tag in model.tags + model.category.tags]
@@ -382,20 +432,11 @@ def get_map():
         "make_id": {
             "name": "make",
             "url": unquote(url_for("make.MakeId", make_id={})),
-            "options": (
-                {
-                    "value": make.id,
-                    "name": make.name,
-                }
-                for make in make_service.get_all()
-            ),
+            "options": lookup_service.options("make"),
         },
         "category_id": {
             "name": "category",
             "url": unquote(url_for("category.CategoryId", category_id={})),
-            "options": (
-                {"value": category.id, "name": category.name}
-                for category in category_service.get_all()
-            ),
+            "options": lookup_service.options("category"),
         },
     }
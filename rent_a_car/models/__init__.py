@@ -1,7 +1,9 @@
 from .category import CategoryModel
 from .make import MakeModel
 from .model import ModelModel
+from .reservation import ReservationModel
 from .tag import TagModel, CategoryTagModel, ModelTagModel
 from .user import UserModel, UserRole
 from .store import StoreModel
 from .vehicle import VehicleModel
+from .version import VersionModel
@@ -7,11 +7,15 @@ class ModelModel(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(30), unique=True, nullable=False)
-    make_id = db.Column(db.Integer(), db.ForeignKey("makes.id"), nullable=False)
+    make_id = db.Column(
+        db.Integer(), db.ForeignKey("makes.id"), nullable=False, index=True
+    )
     category_id = db.Column(
-        db.Integer(), db.ForeignKey("categories.id"), nullable=False
+        db.Integer(), db.ForeignKey("categories.id"), nullable=False, index=True
     )
     picture = db.Column(db.String())
+    # added to the category fare for every day this model is rented
+    surcharge = db.Column(db.Float(), nullable=False, default=0.0, server_default="0")
 
     make = db.relationship("MakeModel", back_populates="models")
     category = db.relationship("CategoryModel", back_populates="models")
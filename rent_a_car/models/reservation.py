@@ -0,0 +1,30 @@
+# project-related
+from ..db import db
+
+
+class ReservationModel(db.Model):
+    __tablename__ = "reservations"
+    __table_args__ = (
+        db.CheckConstraint("return_at > pickup_at", name="ck_reservations_period"),
+        # a vehicle's reservations ordered by return, so the ones overlapping a
+        # period are a range seek past its start, whatever the history before it
+        db.Index(
+            "ix_reservations_vehicle_period", "vehicle_id", "return_at", "pickup_at"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(
+        db.Integer(), db.ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id = db.Column(
+        db.Integer(),
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    pickup_at = db.Column(db.DateTime, nullable=False)
+    return_at = db.Column(db.DateTime, nullable=False)
+
+    vehicle = db.relationship("VehicleModel", back_populates="reservations")
+    user = db.relationship("UserModel", back_populates="reservations")
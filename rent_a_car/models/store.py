@@ -8,7 +8,9 @@ class StoreModel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(60), unique=True, nullable=False)
     address = db.Column(db.String(128))
-    owner_id = db.Column(db.Integer(), db.ForeignKey("users.id"), nullable=False)
+    owner_id = db.Column(
+        db.Integer(), db.ForeignKey("users.id"), nullable=False, index=True
+    )
 
     owner = db.relationship("UserModel", back_populates="stores")
     vehicles = db.relationship("VehicleModel", back_populates="store", lazy="dynamic")
@@ -18,17 +18,25 @@ class TagModel(db.Model):
 
 class CategoryTagModel(db.Model):
     __tablename__ = "category_tags"
+    # a tag is assigned once; the index also serves the lookups by tag
+    __table_args__ = (
+        db.UniqueConstraint("tag_id", "category_id", name="uq_category_tags"),
+    )
 
     id = db.Column(db.Integer(), primary_key=True)
     tag_id = db.Column(db.Integer(), db.ForeignKey("tags.id"), nullable=False)
     category_id = db.Column(
-        db.Integer(), db.ForeignKey("categories.id"), nullable=False
+        db.Integer(), db.ForeignKey("categories.id"), nullable=False, index=True
     )
 
 
 class ModelTagModel(db.Model):
     __tablename__ = "model_tags"
+    # a tag is assigned once; the index also serves the lookups by tag
+    __table_args__ = (db.UniqueConstraint("tag_id", "model_id", name="uq_model_tags"),)
 
     id = db.Column(db.Integer(), primary_key=True)
     tag_id = db.Column(db.Integer(), db.ForeignKey("tags.id"), nullable=False)
-    model_id = db.Column(db.Integer(), db.ForeignKey("models.id"), nullable=False)
+    model_id = db.Column(
+        db.Integer(), db.ForeignKey("models.id"), nullable=False, index=True
+    )
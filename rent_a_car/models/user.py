@@ -27,6 +27,9 @@ class UserModel(UserMixin, db.Model):
     )
 
     stores = db.relationship("StoreModel", back_populates="owner", lazy="dynamic")
+    reservations = db.relationship(
+        "ReservationModel", back_populates="user", lazy="dynamic", passive_deletes=True
+    )
 
     def is_admin(self):
         return self.role == UserRole.ADMIN
@@ -7,9 +7,17 @@ class VehicleModel(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     plate = db.Column(db.String(8), unique=True, nullable=False)
-    model_id = db.Column(db.Integer(), db.ForeignKey("models.id"), nullable=False)
+    model_id = db.Column(
+        db.Integer(), db.ForeignKey("models.id"), nullable=False, index=True
+    )
     year = db.Column(db.Integer, nullable=False)
-    store_id = db.Column(db.Integer(), db.ForeignKey("stores.id"))
+    store_id = db.Column(db.Integer(), db.ForeignKey("stores.id"), index=True)
 
     model = db.relationship("ModelModel", back_populates="vehicles")
     store = db.relationship("StoreModel", back_populates="vehicles")
+    reservations = db.relationship(
+        "ReservationModel",
+        back_populates="vehicle",
+        lazy="dynamic",
+        passive_deletes=True,
+    )
@@ -0,0 +1,11 @@
+# project-related
+from ..db import db
+
+
+class VersionModel(db.Model):
+    __tablename__ = "entity_versions"
+
+    name = db.Column(db.String(30), primary_key=True)
+    version = db.Column(db.Integer(), nullable=False)
+    # naive UTC, unlike the local reservation times: it becomes Last-Modified
+    modified = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,268 @@
+# flask-related
+from flask import current_app as app, abort, flash, redirect, render_template, url_for
+from flask.views import MethodView
+from flask_login import current_user, login_required
+from flask_smorest import Blueprint
+
+# project-related
+from .factory import EndpointMixinFactory
+from .schemas import AvailabilitySchema, PageSchema, ReservationSchema
+from .services import (
+    lookup_service,
+    quote_service,
+    reservation_service,
+    vehicle_service,
+    UnavailableVehicleError,
+)
+from .utils.nav import *
+
+# misc
+from marshmallow import Schema, INCLUDE
+from urllib.parse import unquote
+
+
+blp = Blueprint("reservation", __name__, url_prefix="/reservation")
+
+
+EndpointMixin = EndpointMixinFactory.create_endpoint(blp)
+
+
+@blp.route("/")
+class Reservation(MethodView, EndpointMixin):
+    @login_required
+    @blp.arguments(Schema, location="query", as_kwargs=True, unknown=INCLUDE)
+    def get(self, **kwargs):
+        nav = get_nav_by_user(current_user)
+        return render_template(
+            "generic/create.html",
+            title=f"New {type(self).__name__}",
+            submit="Reserve",
+            nav=nav,
+            schema=ReservationSchema,
+            info=kwargs,
+        )
+
+    @login_required
+    @blp.arguments(ReservationSchema, location="form")
+    def post(self, reservation):
+        app.logger.info(f"Creating {self.blp.name} for user {current_user.email!r}.")
+        app.logger.debug("%s info: %s.", self.blp.name.capitalize(), reservation)
+        nav = get_nav_by_user(current_user)
+        vehicle = vehicle_service.get(reservation["vehicle_id"])
+        # only vehicles in a store can be picked up
+        if not vehicle or vehicle.store_id is None:
+            message = f"Vehicle #{reservation['vehicle_id']} not found!"
+            app.logger.error(message)
+            flash(message, "error")
+            return render_template("base.html", nav=nav), 404
+        try:
+            reservation = reservation_service.create(
+                user_id=current_user.id, **reservation
+            )
+        except UnavailableVehicleError as e:
+            app.logger.error(e)
+            flash(f"{e}", "error")
+            return (
+                render_template(
+                    "generic/create.html",
+                    title=f"New {type(self).__name__}",
+                    submit="Reserve",
+                    nav=nav,
+                    schema=ReservationSchema,
+                    info=reservation,
+                ),
+                409,
+            )
+        else:
+            app.logger.info(
+                f"Successfully created {self.blp.name} with id #{reservation.id}."
+            )
+            flash(f"{type(self).__name__} #{reservation.id} created!")
+            return redirect(
+                url_for(str(ReservationId()), reservation_id=reservation.id)
+            )
+
+
+@blp.route("/available")
+class Availability(MethodView, EndpointMixin):
+    # the schema holds the paging fields too
+    @blp.arguments(AvailabilitySchema(partial=True), location="query", as_kwargs=True)
+    def get(self, **kwargs):
+        nav = get_nav_by_user(current_user)
+        if NAV_RENT() in nav:
+            nav.remove(NAV_RENT())
+        table = None
+        if all(kwargs.get(key) for key in ("store_id", "pickup_at", "return_at")):
+            app.logger.info(
+                f"Listing the vehicles available at store #{kwargs['store_id']}."
+            )
+            table = get_available_table(
+                reservation_service.get_available_page(**kwargs),
+                kwargs["pickup_at"],
+                kwargs["return_at"],
+            )
+        return render_template(
+            "reservation/available.html",
+            title="Rent a car",
+            submit="Search",
+            method="get",
+            nav=nav,
+            schema=AvailabilitySchema,
+            info=kwargs,
+            map={
+                "store_id": {
+                    "name": "store",
+                    "options": lookup_service.options("store"),
+                },
+                "category_id": {
+                    "name": "category",
+                    "options": lookup_service.options("category"),
+                },
+            },
+            table=table,
+        )
+
+
+@blp.route("/all")
+class Reservations(MethodView, EndpointMixin):
+    @login_required
+    @blp.arguments(PageSchema, location="query", as_kwargs=True)
+    def get(self, **kwargs):
+        if current_user.is_admin():
+            reservations = reservation_service.get_page(profile="list", **kwargs)
+        elif current_user.is_franchisee():
+            reservations = reservation_service.get_owned_page(
+                current_user.id, profile="list", **kwargs
+            )
+        else:
+            reservations = reservation_service.get_page_by_user(
+                current_user.id, profile="list", **kwargs
+            )
+        nav = get_nav_by_user(current_user)
+        nav.remove(NAV_RESERVATIONS())
+        return render_template(
+            "generic/all.html",
+            title=f"{type(self).__name__}",
+            nav=nav,
+            table=get_reservations_table(reservations),
+        )
+
+
+@blp.route("/<reservation_id>")
+class ReservationId(MethodView, EndpointMixin):
+    @login_required
+    def get(self, reservation_id):
+        app.logger.info(f"Fetching {self.blp.name} #{reservation_id}.")
+        reservation = reservation_service.get(reservation_id, profile="list")
+        if not reservation or not can_manage(reservation):
+            message = f"{self.blp.name.capitalize()} #{reservation_id} not found!"
+            app.logger.error(message)
+            flash(message, "error")
+            return render_template("base.html"), 404
+        vehicle = reservation.vehicle
+        nav = get_nav_by_user(current_user)
+        return render_template(
+            "reservation/view.html",
+            title=f"Reservation #{reservation.id}",
+            nav=nav,
+            schema=ReservationSchema,
+            info={
+                "vehicle_id": vehicle.id,
+                "vehicle": {"name": vehicle.plate},
+                "pickup_at": reservation.pickup_at,
+                "return_at": reservation.return_at,
+            },
+            map={
+                "vehicle_id": {
+                    "name": "vehicle",
+                    "url": unquote(url_for("vehicle.VehicleId", vehicle_id={})),
+                }
+            },
+            is_owner=False,
+            can_cancel=True,
+        )
+
+    @login_required
+    def delete(self, reservation_id):
+        app.logger.info(f"Cancelling {self.blp.name} #{reservation_id}.")
+        reservation = reservation_service.get(reservation_id, profile="list")
+        if not reservation or not can_manage(reservation):
+            abort(404)
+        reservation_service.delete(reservation.id)
+        return redirect(url_for(str(Reservations()))), 303
+
+
+def can_manage(reservation):
+    # the client who made it, the owner of the vehicle's store and admins
+    return (
+        current_user.is_admin()
+        or reservation.user_id == current_user.id
+        or current_user.owns_store(reservation.vehicle.store_id)
+    )
+
+
+def get_available_table(vehicles, pickup_at, return_at):
+    prices = quote_service.quote_vehicles(
+        [vehicle.id for vehicle in vehicles], pickup_at, return_at
+    )
+    return {
+        "name": "vehicles",
+        "headers": ["plate", "model", "year", "price"],
+        "rows": [
+            {
+                "plate": vehicle.plate,
+                "model": vehicle.model.name,
+                "year": vehicle.year,
+                "price": f"{prices[vehicle.id]:.2f}",
+            }
+            for vehicle in vehicles
+        ],
+        "refs": [
+            {
+                "plate": url_for(
+                    str(Reservation()),
+                    vehicle_id=vehicle.id,
+                    pickup_at=pickup_at.isoformat(timespec="minutes"),
+                    return_at=return_at.isoformat(timespec="minutes"),
+                ),
+                "model": url_for("model.ModelId", model_id=vehicle.model_id),
+            }
+            for vehicle in vehicles
+        ],
+        "pics": [],
+        "page": get_page_nav(vehicles),
+    }
+
+
+def get_reservations_table(reservations):
+    return {
+        "name": "reservations",
+        "headers": ["reservation", "vehicle", "store", "client", "pickup", "return"],
+        "rows": [
+            {
+                "reservation": f"#{reservation.id}",
+                "vehicle": reservation.vehicle.plate,
+                "store": reservation.vehicle.store.name
+                if reservation.vehicle.store
+                else "",
+                "client": reservation.user.name,
+                "pickup": f"{reservation.pickup_at:%Y-%m-%d %H:%M}",
+                "return": f"{reservation.return_at:%Y-%m-%d %H:%M}",
+            }
+            for reservation in reservations
+        ],
+        "refs": [get_reservation_refs(reservation) for reservation in reservations],
+        "pics": [],
+        "page": get_page_nav(reservations),
+    }
+
+
+def get_reservation_refs(reservation):
+    refs = {
+        "reservation": url_for(str(ReservationId()), reservation_id=reservation.id),
+        "vehicle": url_for("vehicle.VehicleId", vehicle_id=reservation.vehicle_id),
+    }
+    # vehicles may have left their store since
+    if reservation.vehicle.store_id:
+        refs["store"] = url_for("store.StoreId", store_id=reservation.vehicle.store_id)
+    return refs
@@ -1,8 +1,13 @@
 from .category import CategorySchema
+from .export import ExportSchema
 from .make import MakeSchema
 from .model import ModelSchema
+from .page import PageSchema
+from .reservation import AvailabilitySchema, ReservationSchema
+from .search import SearchSchema
 from .store import StoreSchema
 from .tag import TagSchema, TagInputSchema
+from .tag_filter import TagFilterSchema
 from .user import UserSchema, UserLoginSchema
 from .vehicle import VehicleSchema
 
@@ -14,3 +19,5 @@ from .nested import (
     TagSchemaNested,
     VehicleSchemaNested,
 )
+
+from .resource import ResourceSchema, StoreResourceSchema, VehicleResourceSchema
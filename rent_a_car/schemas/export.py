@@ -0,0 +1,6 @@
+from marshmallow import Schema, fields
+from marshmallow.validate import OneOf
+
+
+class ExportSchema(Schema):
+    format = fields.String(load_default="csv", validate=OneOf(["csv", "ndjson"]))
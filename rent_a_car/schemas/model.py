@@ -8,3 +8,4 @@ class ModelSchema(Schema):
     make_id = fields.Integer(required=True, validate=Range(min=1))
     category_id = fields.Integer(required=True, validate=Range(min=1))
     picture = fields.Url(dump_default="")
+    surcharge = fields.Float(validate=Range(min=0.0))
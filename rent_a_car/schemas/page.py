@@ -0,0 +1,7 @@
+from marshmallow import Schema, fields
+from marshmallow.validate import Range
+
+
+class PageSchema(Schema):
+    after = fields.Integer(validate=Range(min=0))
+    limit = fields.Integer(validate=Range(min=1, max=500))
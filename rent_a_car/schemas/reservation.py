@@ -0,0 +1,44 @@
+from marshmallow import Schema, ValidationError, fields, validates_schema
+from marshmallow.validate import Range
+from datetime import datetime
+
+from .page import PageSchema
+
+
+class LocalDateTime(fields.DateTime):
+    """A naive datetime in the server's local time, as the reservations are
+    stored: one given with an offset is converted to it."""
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        value = super()._deserialize(value, attr, data, **kwargs)
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value
+
+
+class PeriodSchema(Schema):
+    pickup_at = LocalDateTime(required=True)
+    return_at = LocalDateTime(required=True)
+
+    @validates_schema
+    def validate_period(self, data, **kwargs):
+        if "pickup_at" in data and "return_at" in data:
+            if data["return_at"] <= data["pickup_at"]:
+                raise ValidationError(
+                    "The return must be after the pickup.", "return_at"
+                )
+
+
+class ReservationSchema(PeriodSchema):
+    id = fields.Integer(required=True, dump_only=True)
+    vehicle_id = fields.Integer(required=True, validate=Range(min=1))
+
+    @validates_schema
+    def validate_pickup(self, data, **kwargs):
+        if "pickup_at" in data and data["pickup_at"] < datetime.now():
+            raise ValidationError("The pickup cannot be in the past.", "pickup_at")
+
+
+class AvailabilitySchema(PeriodSchema, PageSchema):
+    store_id = fields.Integer(required=True, validate=Range(min=1))
+    category_id = fields.Integer(validate=Range(min=1))
@@ -0,0 +1,22 @@
+from marshmallow import fields
+from webargs.fields import DelimitedList
+
+from .nested import VehicleSchemaNested
+from .page import PageSchema
+from .store import StoreSchema
+
+
+class ResourceSchema(PageSchema):
+    # `fields` would shadow Schema.fields
+    columns = DelimitedList(fields.String(), data_key="fields")
+    include = DelimitedList(fields.String())
+
+
+class StoreResourceSchema(StoreSchema):
+    # the API is public: who owns a store is not part of it
+    class Meta:
+        exclude = ("owner_id",)
+
+
+class VehicleResourceSchema(VehicleSchemaNested):
+    store = fields.Nested(StoreResourceSchema(), dump_only=True)
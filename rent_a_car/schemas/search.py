@@ -0,0 +1,7 @@
+from marshmallow import Schema, fields
+from marshmallow.validate import Length, Range
+
+
+class SearchSchema(Schema):
+    q = fields.String(required=True, validate=Length(min=1, max=100))
+    limit = fields.Integer(load_default=20, validate=Range(min=1, max=100))
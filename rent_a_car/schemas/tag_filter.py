@@ -0,0 +1,11 @@
+from marshmallow import fields
+from webargs.fields import DelimitedList
+
+from .page import PageSchema
+
+
+class TagFilterSchema(PageSchema):
+    # models having all of `tags`, one of `any_tags` and none of `not_tags`
+    tags = DelimitedList(fields.Integer())
+    any_tags = DelimitedList(fields.Integer())
+    not_tags = DelimitedList(fields.Integer())
@@ -0,0 +1,54 @@
+# flask-related
+from flask import current_app as app, render_template, url_for
+from flask.views import MethodView
+from flask_login import current_user
+from flask_smorest import Blueprint
+
+# project-related
+from .factory import EndpointMixinFactory
+from .schemas import SearchSchema
+from .services import search_service
+from .utils.nav import get_nav_by_user
+
+blp = Blueprint("search", __name__, url_prefix="/search")
+
+
+EndpointMixin = EndpointMixinFactory.create_endpoint(blp)
+
+# kind: endpoint viewing an entry of it
+ENDPOINTS = {
+    "make": "make.MakeId",
+    "model": "model.ModelId",
+    "category": "category.CategoryId",
+    "store": "store.StoreId",
+    "vehicle": "vehicle.VehicleId",
+}
+
+
+@blp.route("/")
+class Search(MethodView, EndpointMixin):
+    @blp.arguments(SearchSchema, location="query", as_kwargs=True)
+    def get(self, q, limit):
+        app.logger.info(f"Searching for {q!r}.")
+        kinds = ("make", "model", "category", "store")
+        if current_user.is_authenticated:
+            kinds += ("vehicle",)
+        results = search_service.search(q, kinds, limit)
+        return render_template(
+            "generic/all.html",
+            title=f"Results for {q!r}",
+            nav=get_nav_by_user(current_user),
+            table={
+                "name": "results",
+                "headers": ["name", "type"],
+                "rows": [
+                    {"name": label, "type": kind.capitalize()}
+                    for kind, _, label in results
+                ],
+                "refs": [
+                    {"name": url_for(ENDPOINTS[kind], **{f"{kind}_id": id})}
+                    for kind, id, _ in results
+                ],
+                "pics": [],
+            },
+        )
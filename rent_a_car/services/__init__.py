@@ -1,7 +1,15 @@
 from .category import service as category_service, DuplicateCategoryError
 from .make import service as make_service, DuplicateMakeError
+from .lookup import service as lookup_service
 from .model import service as model_service, DuplicateModelError
+from .principal import service as principal_service
+from .profile import service as profile_service
+from .quote import service as quote_service
+from .reservation import service as reservation_service, UnavailableVehicleError
+from .search import service as search_service
 from .store import service as store_service, DuplicateStoreError
 from .tag import service as tag_service, DuplicateTagError
+from .tag_index import service as tag_index_service
 from .user import service as user_service, DuplicateUserError
 from .vehicle import service as vehicle_service, DuplicateVehicleError
+from .version import service as version_service
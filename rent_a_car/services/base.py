@@ -3,6 +3,7 @@ from ..db import *
 
 # misc
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 
 
 class DuplicateError(Exception):
@@ -10,27 +11,130 @@ class DuplicateError(Exception):
 
 
 class BaseService:
+    # named eager-loading presets, mapping a view name to the loader options
+    # (joinedload/selectinload) needed to render it without lazy loads
+    load_profiles = {}
+    # one-to-many relationship whose rows are counted by the *_with_counts queries
+    counted = None
+    # column that identifies an entry besides its id, checked for duplicates
+    unique = "name"
+    # columns written by exports, all of the table's when None
+    exported = None
+
     def __init__(self, name, model):
         self.name = name
         self.model = model
+        self.listeners = []
+
+    def subscribe(self, listener):
+        """Register `listener(service, entry)` to be called after every write
+        of this service. `entry` is None when several entries changed."""
+        self.listeners.append(listener)
+        return listener
+
+    def notify(self, entry=None):
+        for listener in self.listeners:
+            listener(self, entry)
+
+    def load_options(self, profile: str = None):
+        if profile is None:
+            return ()
+        try:
+            return self.load_profiles[profile]
+        except KeyError:
+            raise ValueError(f"Unknown load profile {profile!r} for {self.name}!")
+
+    def include_options(self, names: tuple = ()):
+        """Eager-load the relationships `names`: joined for a single entry,
+        in a second SELECT for collections."""
+        options = []
+        for name in names:
+            relationship = getattr(self.model, name)
+            loader = selectinload if relationship.property.uselist else joinedload
+            options.append(loader(relationship))
+        return tuple(options)
 
     def create(self, name: str, **kwargs):
         if get_entries_filtered(self.model, name=name):
-            raise DuplicateError(f"The {self.name} {name!r} already exists!")
+            raise DuplicateError(self.duplicate_message(name))
         entry = self.model(name=name, **kwargs)
         try:
             add_entry(entry)
         except SQLAlchemyError:
             raise
         else:
+            self.notify(entry)
             return entry
 
-    def get(self, id: int):
-        return get_entry(self.model, id)
+    def duplicate_message(self, value):
+        return f"The {self.name} {value!r} already exists!"
+
+    def normalize(self, row: dict):
+        return row
+
+    def create_many(self, rows: list[dict]):
+        """Insert `rows` with one duplicate check and one INSERT, in a single
+        transaction. Return the number of created entries and a
+        `{row index: error}` dict of the rows skipped as duplicates."""
+        rows = [self.normalize(dict(row)) for row in rows]
+        column = getattr(self.model, self.unique)
+        values = {row.get(self.unique) for row in rows} - {None}
+        taken = {row[0] for row in get_rows_in(column, values)}
+        errors = {}
+        new_rows = []
+        for index, row in enumerate(rows):
+            value = row.get(self.unique)
+            if value is not None and value in taken:
+                errors[index] = self.duplicate_message(value)
+            else:
+                taken.add(value)
+                new_rows.append(row)
+        if new_rows:
+            add_entries(self.model, new_rows)
+            self.notify()
+        return len(new_rows), errors
+
+    def update_many(self, rows: list[dict]):
+        """Update `rows`, each holding the `id` of its entry, with one
+        duplicate check and one bulk UPDATE, in a single transaction. Return
+        the number of updated entries and a `{row index: error}` dict of the
+        rows skipped as missing or duplicates."""
+        rows = [self.normalize(dict(row)) for row in rows]
+        column = getattr(self.model, self.unique)
+        ids = {row[0] for row in get_rows_in(self.model.id, {r["id"] for r in rows})}
+        owners = dict(
+            get_rows_in(
+                column,
+                {r[self.unique] for r in rows if self.unique in r},
+                self.model.id,
+            )
+        )
+        errors = {}
+        changed_rows = []
+        for index, row in enumerate(rows):
+            value = row.get(self.unique)
+            if row["id"] not in ids:
+                errors[index] = f"{self.name.capitalize()} #{row['id']} not found!"
+            elif value is not None and owners.get(value, row["id"]) != row["id"]:
+                errors[index] = self.duplicate_message(value)
+            else:
+                if value is not None:
+                    owners[value] = row["id"]
+                changed_rows.append(row)
+        if changed_rows:
+            update_entries(self.model, changed_rows)
+            self.notify()
+        return len(changed_rows), errors
+
+    def get(self, id: int, profile: str = None, include: tuple = ()):
+        options = self.load_options(profile) + self.include_options(include)
+        return get_entry(self.model, id, options=options)
 
     def delete(self, id: int):
-        user = delete_entry(self.model, id)
-        return user
+        entry = delete_entry(self.model, id)
+        if entry:
+            self.notify(entry)
+        return entry
 
     def update(self, entry):
         name = entry.name
@@ -42,7 +146,78 @@ class BaseService:
             )
         except SQLAlchemyError:
             raise
+        self.notify(entry)
         return entry
 
-    def get_all(self):
-        return get_all_entries(self.model)
+    def get_all(self, profile: str = None):
+        return get_all_entries(self.model, options=self.load_options(profile))
+
+    @property
+    def count_key(self):
+        relationship = getattr(self.model, self.counted).property
+        return next(iter(relationship.remote_side))
+
+    def get_id_index(self):
+        """Map the unique column of every entry to its id."""
+        column = getattr(self.model, self.unique)
+        return dict(get_rows(db.select(column, self.model.id)))
+
+    def get_names(self):
+        """Map the id of every entry to its unique column."""
+        column = getattr(self.model, self.unique)
+        return dict(get_rows(db.select(self.model.id, column).order_by(self.model.id)))
+
+    @property
+    def export_fields(self):
+        return self.exported or [column.name for column in self.model.__table__.c]
+
+    def stream(self, joins: tuple = (), filter: ColumnExpressionArgument[bool] = None):
+        """Iterate over the export_fields of every entry, streamed from the
+        database instead of loaded at once."""
+        query = db.select(*[getattr(self.model, field) for field in self.export_fields])
+        for join in joins:
+            query = query.join(join)
+        if filter is not None:
+            query = query.where(filter)
+        return stream_rows(query.order_by(self.model.id))
+
+    def get_all_with_counts(self):
+        return get_all_entries_with_counts(self.model, self.count_key)
+
+    def get_page(
+        self,
+        after: int = None,
+        limit: int = None,
+        profile: str = None,
+        with_counts: bool = False,
+        fields: list = None,
+        include: tuple = (),
+        **kwargs,
+    ):
+        """Return a keyset page of entries. Only the `fields` columns are
+        selected when given, unless relationships are `include`d, which need
+        the entries themselves."""
+        columns = ()
+        if fields and not include:
+            columns = tuple(getattr(self.model, field) for field in fields)
+        return get_entries_page(
+            self.model,
+            after=after,
+            limit=limit or PAGE_SIZE,
+            options=self.load_options(profile) + self.include_options(include),
+            counts=(self.count_key,) if with_counts else (),
+            columns=columns,
+            **kwargs,
+        )
+
+    def get_page_in(
+        self, ids: list, after: int = None, limit: int = None, profile: str = None
+    ):
+        """Return a keyset page of the entries among the sorted `ids`."""
+        return get_entries_page_in(
+            self.model,
+            ids,
+            after=after,
+            limit=limit or PAGE_SIZE,
+            options=self.load_options(profile),
+        )
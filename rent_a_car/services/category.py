@@ -12,6 +12,8 @@ class DuplicateCategoryError(DuplicateError):
 
 
 class CategoryService(BaseService):
+    counted = "models"
+
     def create(self, name: str, fare: float = None):
         return super().create(name, fare=fare)
 
@@ -35,6 +37,7 @@ class CategoryService(BaseService):
                 add_entry(category)
             except SQLAlchemyError:
                 raise
+            self.notify(category)
         return category
 
     def remove_tags(self, id: int, tags: list[TagModel]):
@@ -51,6 +54,7 @@ class CategoryService(BaseService):
                 add_entry(category)
             except SQLAlchemyError:
                 raise
+            self.notify(category)
         return category
 
 
@@ -0,0 +1,38 @@
+# project-related
+from ..utils.cache import TTLCache
+from .category import service as category_service
+from .make import service as make_service
+from .model import service as model_service
+from .store import service as store_service
+from .version import service as version_service
+
+
+class LookupService:
+    """Cached `{id: name}` maps of the entities offered as form options, and
+    used to validate the ids given. A map is cached under the version of its
+    entity, so a write in any process makes it stale; the `ttl` only bounds
+    how long the unused ones are kept."""
+
+    def __init__(self, *services, ttl: float = 300):
+        self.cache = TTLCache(ttl)
+        self.services = {service.name: service for service in services}
+
+    def get(self, name: str):
+        key = (name, *version_service.get(name))
+        names = self.cache.get(key)
+        if names is None:
+            names = self.services[name].get_names()
+            self.cache.set(key, names)
+        return names
+
+    def options(self, name: str, ids=None):
+        """Return the `{"value", "name"}` select options of `name`, limited to
+        `ids` when given."""
+        return [
+            {"value": id, "name": value}
+            for id, value in self.get(name).items()
+            if ids is None or id in ids
+        ]
+
+
+service = LookupService(category_service, make_service, model_service, store_service)
@@ -9,6 +9,8 @@ class DuplicateMakeError(DuplicateError):
 
 
 class MakeService(BaseService):
+    counted = "models"
+
     def create(self, name: str, logo: str = None):
         try:
             return super().create(name, logo=logo)
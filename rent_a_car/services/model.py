@@ -5,6 +5,7 @@ from .base import BaseService, DuplicateError
 
 # misc
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
 
 
 class DuplicateModelError(DuplicateError):
@@ -12,16 +13,37 @@ class DuplicateModelError(DuplicateError):
 
 
 class ModelService(BaseService):
-    def create(self, name: str, make_id: int, category_id: int, picture: str = None):
+    load_profiles = {
+        "list": (joinedload(ModelModel.make), joinedload(ModelModel.category)),
+    }
+
+    def create(
+        self,
+        name: str,
+        make_id: int,
+        category_id: int,
+        picture: str = None,
+        surcharge: float = 0.0,
+    ):
         try:
             return super().create(
-                name, make_id=make_id, category_id=category_id, picture=picture
+                name,
+                make_id=make_id,
+                category_id=category_id,
+                picture=picture,
+                surcharge=surcharge,
             )
         except DuplicateError as e:
             raise DuplicateModelError(e)
 
     def update(
-        self, id: int, name: str, make_id: int, category_id: int, picture: str = None
+        self,
+        id: int,
+        name: str,
+        make_id: int,
+        category_id: int,
+        picture: str = None,
+        surcharge: float = 0.0,
     ):
         model = self.get(id)
         if model:
@@ -29,6 +51,7 @@ class ModelService(BaseService):
             model.make_id = make_id
             model.category_id = category_id
             model.picture = picture
+            model.surcharge = surcharge
             try:
                 return super().update(model)
             except DuplicateError as e:
@@ -44,6 +67,7 @@ class ModelService(BaseService):
                 add_entry(model)
             except SQLAlchemyError:
                 raise
+            self.notify(model)
         return model
 
     def remove_tags(self, id: int, tags: list[ModelModel]):
@@ -60,6 +84,7 @@ class ModelService(BaseService):
                 add_entry(model)
             except SQLAlchemyError:
                 raise
+            self.notify(model)
         return model
 
 
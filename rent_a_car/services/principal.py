@@ -0,0 +1,64 @@
+# flask-related
+from flask_login import UserMixin
+
+# project-related
+from ..models import UserRole
+from ..utils.cache import TTLCache
+from .store import service as store_service
+from .user import service as user_service
+from .version import service as version_service
+
+
+class Principal(UserMixin):
+    """The authenticated user as seen by the authorization checks: a plain
+    snapshot of the user's id, role and owned stores, detached from the
+    database session."""
+
+    def __init__(self, id: int, email: str, name: str, role: UserRole, store_ids):
+        self.id = id
+        self.email = email
+        self.name = name
+        self.role = role
+        self.store_ids = frozenset(store_ids)
+
+    def is_admin(self):
+        return self.role == UserRole.ADMIN
+
+    def is_franchisee(self):
+        return self.role == UserRole.FRANCHISEE
+
+    def is_client(self):
+        return self.role == UserRole.CLIENT
+
+    def owns_store(self, store_id):
+        return store_id in self.store_ids
+
+
+class PrincipalService:
+    """Principals cached by the versions of the users and stores, so a write
+    in any process makes every cached one stale; the `ttl` only bounds how
+    long the unused ones are kept."""
+
+    def __init__(self, ttl: float = 60):
+        self.cache = TTLCache(ttl)
+
+    def get(self, user_id):
+        user_id = int(user_id)
+        key = (user_id, *version_service.get("user", "store"))
+        principal = self.cache.get(key)
+        if principal is None:
+            user = user_service.get(user_id)
+            if not user:
+                return None
+            principal = Principal(
+                user.id,
+                user.email,
+                user.name,
+                user.role,
+                store_service.get_owned_ids(user.id),
+            )
+            self.cache.set(key, principal)
+        return principal
+
+
+service = PrincipalService()
@@ -0,0 +1,121 @@
+# project-related
+from ..db import *
+from ..models import (
+    CategoryModel,
+    MakeModel,
+    ModelModel,
+    StoreModel,
+    TagModel,
+    UserModel,
+    UserRole,
+    VehicleModel,
+)
+
+
+class ProfileService:
+    # tables shown on each role's profile, in display order
+    tables_by_role = {
+        UserRole.ADMIN: (
+            "users",
+            "stores",
+            "categories",
+            "models",
+            "tags",
+            "vehicles",
+        ),
+        UserRole.FRANCHISEE: ("stores", "vehicles"),
+        UserRole.CLIENT: ("stores", "categories"),
+    }
+    # tables restricted to the rows owned by a franchisee
+    owned_tables = {
+        "stores": StoreModel.owner_id,
+        "vehicles": StoreModel.owner_id,
+    }
+
+    def get_tables(self, user):
+        """Yield `(name, rows)` for every table of the user's profile. Each
+        table is a single column-only query, only run when it is reached."""
+        for name in self.tables_by_role.get(user.role, ()):
+            query = getattr(self, f"select_{name}")()
+            if user.role == UserRole.FRANCHISEE and name in self.owned_tables:
+                query = query.where(self.owned_tables[name] == user.id)
+            yield name, get_rows(query)
+
+    def select_users(self):
+        stores = count_by(StoreModel.owner_id)
+        return (
+            db.select(
+                UserModel.id,
+                UserModel.name,
+                UserModel.email,
+                UserModel.role,
+                db.func.coalesce(stores.c.count, 0).label("stores"),
+            )
+            .outerjoin(stores, stores.c.parent_id == UserModel.id)
+            .order_by(UserModel.id)
+        )
+
+    def select_stores(self):
+        vehicles = count_by(VehicleModel.store_id)
+        return (
+            db.select(
+                StoreModel.id,
+                StoreModel.name,
+                StoreModel.address,
+                db.func.coalesce(vehicles.c.count, 0).label("vehicles"),
+            )
+            .outerjoin(vehicles, vehicles.c.parent_id == StoreModel.id)
+            .order_by(StoreModel.id)
+        )
+
+    def select_categories(self):
+        models = count_by(ModelModel.category_id)
+        return (
+            db.select(
+                CategoryModel.id,
+                CategoryModel.name,
+                CategoryModel.fare,
+                db.func.coalesce(models.c.count, 0).label("models"),
+            )
+            .outerjoin(models, models.c.parent_id == CategoryModel.id)
+            .order_by(CategoryModel.id)
+        )
+
+    def select_models(self):
+        return (
+            db.select(
+                ModelModel.id,
+                ModelModel.name,
+                ModelModel.picture,
+                ModelModel.make_id,
+                MakeModel.name.label("make"),
+                ModelModel.category_id,
+                CategoryModel.name.label("category"),
+            )
+            .join(MakeModel, ModelModel.make_id == MakeModel.id)
+            .join(CategoryModel, ModelModel.category_id == CategoryModel.id)
+            .order_by(ModelModel.id)
+        )
+
+    def select_tags(self):
+        return db.select(TagModel.id, TagModel.name).order_by(TagModel.id)
+
+    def select_vehicles(self):
+        return (
+            db.select(
+                VehicleModel.id,
+                VehicleModel.plate,
+                VehicleModel.year,
+                VehicleModel.model_id,
+                ModelModel.name.label("model"),
+                ModelModel.picture,
+                VehicleModel.store_id,
+                StoreModel.name.label("store"),
+            )
+            .join(ModelModel, VehicleModel.model_id == ModelModel.id)
+            .outerjoin(StoreModel, VehicleModel.store_id == StoreModel.id)
+            .order_by(VehicleModel.id)
+        )
+
+
+service = ProfileService()
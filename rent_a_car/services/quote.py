@@ -0,0 +1,84 @@
+# project-related
+from ..db import *
+from ..models import CategoryModel, ModelModel, VehicleModel
+
+# misc
+from datetime import datetime, timedelta
+from math import ceil
+import numpy as np
+
+DAY = timedelta(days=1)
+
+
+class QuoteService:
+    """Prices rentals. Every started day of a rental costs the category fare
+    plus the model surcharge (the vehicle's daily rate), times the multiplier
+    of that day: `weekend` on Saturdays and Sundays, `daily` otherwise, and
+    that of every season covering it.
+
+    As a quote is the daily rate times the sum of the day multipliers, the
+    quotes of any number of vehicles are one array operation."""
+
+    def __init__(self, daily: float = 1.0, weekend: float = 1.0, seasons: list = ()):
+        self.configure(daily, weekend, seasons)
+
+    def configure(self, daily: float = 1.0, weekend: float = 1.0, seasons: list = ()):
+        """`seasons` holds `(start month, start day, end month, end day,
+        multiplier)` tuples; a season ending before it starts wraps around
+        the new year."""
+        self.daily = daily
+        self.weekend = weekend
+        self.seasons = [
+            (start_month * 100 + start_day, end_month * 100 + end_day, multiplier)
+            for start_month, start_day, end_month, end_day, multiplier in seasons
+        ]
+
+    def get_days(self, pickup_at: datetime, return_at: datetime):
+        return max(1, ceil((return_at - pickup_at) / DAY))
+
+    def get_multipliers(self, pickup_at: datetime, return_at: datetime):
+        """Return the multiplier of every day of the rental."""
+        dates = np.datetime64(pickup_at.date(), "D") + np.arange(
+            self.get_days(pickup_at, return_at)
+        )
+        # 1970-01-01, day 0, was a Thursday
+        weekdays = (dates.astype(np.int64) + 3) % 7
+        multipliers = np.where(weekdays >= 5, self.weekend, self.daily)
+        months = dates.astype("datetime64[M]")
+        month_days = (months.astype(np.int64) % 12 + 1) * 100 + (
+            (dates - months).astype(np.int64) + 1
+        )
+        for start, end, multiplier in self.seasons:
+            if start <= end:
+                covered = (month_days >= start) & (month_days <= end)
+            else:
+                covered = (month_days >= start) | (month_days <= end)
+            multipliers = np.where(covered, multipliers * multiplier, multipliers)
+        return multipliers
+
+    def quote(self, rates, pickup_at: datetime, return_at: datetime):
+        """Price the rental at each of the daily `rates`, an array."""
+        total = self.get_multipliers(pickup_at, return_at).sum()
+        return np.round(np.asarray(rates, dtype=np.float64) * total, 2)
+
+    def get_rates(self, vehicle_ids: list):
+        """Return the ids of the vehicles among `vehicle_ids` and their daily
+        rates, as arrays."""
+        rows = get_rows_in(
+            VehicleModel.id,
+            vehicle_ids,
+            CategoryModel.fare,
+            ModelModel.surcharge,
+            joins=(VehicleModel.model, ModelModel.category),
+        )
+        table = np.array(rows, dtype=np.float64).reshape(-1, 3)
+        return table[:, 0].astype(np.int64), table[:, 1] + table[:, 2]
+
+    def quote_vehicles(self, vehicle_ids: list, pickup_at, return_at):
+        """Map the id of each of the `vehicle_ids` to the price of renting it."""
+        ids, rates = self.get_rates(vehicle_ids)
+        prices = self.quote(rates, pickup_at, return_at)
+        return dict(zip(ids.tolist(), prices.tolist()))
+
+
+service = QuoteService()
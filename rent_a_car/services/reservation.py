@@ -0,0 +1,107 @@
+# project-related
+from ..db import *
+from ..models import ModelModel, ReservationModel, StoreModel, VehicleModel
+from .base import BaseService
+
+# misc
+from datetime import datetime
+from sqlalchemy import and_
+from sqlalchemy.orm import joinedload
+
+
+class UnavailableVehicleError(Exception):
+    pass
+
+
+def overlapping(vehicle_id, pickup_at: datetime, return_at: datetime):
+    """Match the reservations of `vehicle_id` (an id or a column) overlapping
+    the period, a range seek on ix_reservations_vehicle_period."""
+    return and_(
+        ReservationModel.vehicle_id == vehicle_id,
+        ReservationModel.return_at > pickup_at,
+        ReservationModel.pickup_at < return_at,
+    )
+
+
+class ReservationService(BaseService):
+    load_profiles = {
+        "list": (
+            joinedload(ReservationModel.vehicle).joinedload(VehicleModel.model),
+            joinedload(ReservationModel.vehicle).joinedload(VehicleModel.store),
+            joinedload(ReservationModel.user),
+        ),
+    }
+    unique = "id"
+
+    def create(
+        self, user_id: int, vehicle_id: int, pickup_at: datetime, return_at: datetime
+    ):
+        id = add_entry_unless(
+            self.model,
+            {
+                "user_id": user_id,
+                "vehicle_id": vehicle_id,
+                "pickup_at": pickup_at,
+                "return_at": return_at,
+            },
+            overlapping(vehicle_id, pickup_at, return_at),
+        )
+        if id is None:
+            raise UnavailableVehicleError(
+                f"The vehicle #{vehicle_id} is already reserved between "
+                f"{pickup_at:%Y-%m-%d %H:%M} and {return_at:%Y-%m-%d %H:%M}!"
+            )
+        reservation = self.get(id)
+        self.notify(reservation)
+        return reservation
+
+    def is_available(self, vehicle_id: int, pickup_at: datetime, return_at: datetime):
+        return not get_rows(
+            db.select(self.model.id)
+            .where(overlapping(vehicle_id, pickup_at, return_at))
+            .limit(1)
+        )
+
+    def get_available_page(
+        self,
+        store_id: int,
+        pickup_at: datetime,
+        return_at: datetime,
+        category_id: int = None,
+        after: int = None,
+        limit: int = None,
+        profile: str = None,
+    ):
+        """Return a keyset page of the vehicles of `store_id` (and of
+        `category_id`, if given) with no reservation overlapping the period."""
+        reserved = db.select(self.model.id).where(
+            overlapping(VehicleModel.id, pickup_at, return_at)
+        )
+        filter = and_(VehicleModel.store_id == store_id, ~reserved.exists())
+        joins = ()
+        if category_id:
+            joins = (ModelModel,)
+            filter = and_(filter, ModelModel.category_id == category_id)
+        return get_entries_page(
+            VehicleModel,
+            after=after,
+            limit=limit or PAGE_SIZE,
+            joins=joins,
+            filter=filter,
+            options=(joinedload(VehicleModel.model),),
+        )
+
+    def get_page_by_user(self, user_id: int, **kwargs):
+        return self.get_page(filter=ReservationModel.user_id == user_id, **kwargs)
+
+    def get_owned_page(self, owner_id: int, **kwargs):
+        """Return a page of the reservations of the vehicles in the stores of
+        `owner_id`."""
+        return self.get_page(
+            joins=(VehicleModel, StoreModel),
+            filter=StoreModel.owner_id == owner_id,
+            **kwargs,
+        )
+
+
+service = ReservationService("reservation", ReservationModel)
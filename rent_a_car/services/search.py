@@ -0,0 +1,390 @@
+# project-related
+from ..db import *
+from .category import service as category_service
+from .make import service as make_service
+from .model import service as model_service
+from .store import service as store_service
+from .vehicle import service as vehicle_service
+
+# misc
+from bisect import bisect_left, insort
+from collections import defaultdict
+from math import log
+from sqlalchemy import bindparam, inspect, text
+from threading import Lock, RLock
+from time import monotonic
+from unicodedata import combining, normalize
+import re
+
+# shorter tokens only match exactly or as prefixes, typos would match anything
+FUZZY_MIN_LENGTH = 3
+# typos are only looked for among the words starting with the same letters
+FUZZY_PREFIX_LENGTH = 2
+# words a prefix, or a typo, expands to at most
+MAX_EXPANSIONS = 1000
+# matches ranked before the best ones are picked, on the FTS5 index
+CANDIDATES = 200
+
+
+def tokenize(value: str):
+    """Split `value` into lowercase words without diacritics, as the FTS5
+    unicode61 tokenizer does."""
+    value = "".join(c for c in normalize("NFKD", value or "") if not combining(c))
+    return re.findall(r"\w+", value.lower())
+
+
+def prefix_range(prefix: str):
+    """Return the bounds of the words starting with `prefix`, the upper one
+    excluded."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def within_one_edit(a: str, b: str):
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1 :] == b[i + 1 :]
+    return a[i:] == b[i + 1 :]
+
+
+def match_terms(token: str, terms):
+    """Map the `terms` matching `token` to how well they do: 3 for the token
+    itself, 2 for words it starts and 1 for words starting one edit away."""
+    matches = {}
+    fuzzy = len(token) >= FUZZY_MIN_LENGTH
+    lengths = {len(token) - 1, len(token), len(token) + 1}
+    for term in terms:
+        if term == token:
+            matches[term] = 3
+        elif term.startswith(token):
+            matches[term] = 2
+        elif fuzzy and any(within_one_edit(token, term[:n]) for n in lengths):
+            matches[term] = 1
+    return matches
+
+
+def get_typos(token: str, get_terms):
+    """Return the words starting one edit away from `token`, among the ones
+    `get_terms(prefix, limit)` finds sharing its first letters, so only a
+    range of the vocabulary is ever read."""
+    if len(token) < FUZZY_MIN_LENGTH:
+        return []
+    candidates = get_terms(token[:FUZZY_PREFIX_LENGTH], MAX_EXPANSIONS)
+    return [
+        term for term, level in match_terms(token, candidates).items() if level == 1
+    ]
+
+
+def score(tokens: list, terms: set, weight=None):
+    """Sum, over the query `tokens`, the best match found among the `terms`
+    of a document, weighted by `weight(term)` when given."""
+    total = 0
+    for token in tokens:
+        total += max(
+            (
+                level * (weight(term) if weight else 1)
+                for term, level in match_terms(token, terms).items()
+            ),
+            default=0,
+        )
+    return total
+
+
+class MemoryIndex:
+    """An inverted index from each word to the documents holding it, kept in
+    the process, with its words sorted to find those starting with a prefix.
+    Searches and writes may come from several threads."""
+
+    def __init__(self):
+        self.documents = {}
+        self.postings = defaultdict(set)
+        self.terms = []
+        self._lock = RLock()
+
+    def add(self, key: tuple, label: str, value: str):
+        with self._lock:
+            self._remove(key)
+            terms = set(tokenize(value))
+            self.documents[key] = (label, terms)
+            for term in terms:
+                if term not in self.postings:
+                    insort(self.terms, term)
+                self.postings[term].add(key)
+
+    def remove(self, key: tuple):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: tuple):
+        _, terms = self.documents.pop(key, (None, ()))
+        for term in terms:
+            self.postings[term].discard(key)
+            if not self.postings[term]:
+                del self.postings[term]
+                del self.terms[bisect_left(self.terms, term)]
+
+    def replace(self, kind: str, documents: list):
+        with self._lock:
+            for key in [key for key in self.documents if key[0] == kind]:
+                self._remove(key)
+            for id, label, value in documents:
+                self.add((kind, id), label, value)
+
+    def get_terms(self, prefix: str, limit: int):
+        low, high = prefix_range(prefix)
+        start = bisect_left(self.terms, low)
+        end = bisect_left(self.terms, high, start)
+        return self.terms[start : min(end, start + limit)]
+
+    def search(self, tokens: list, kinds: tuple, limit: int):
+        with self._lock:
+            found = None
+            for token in tokens:
+                terms = self.get_terms(token, MAX_EXPANSIONS) or get_typos(
+                    token, self.get_terms
+                )
+                keys = set().union(*(self.postings[term] for term in terms))
+                found = keys if found is None else found & keys
+            found = [key for key in found or () if key[0] in kinds]
+
+            # rarer words weigh more
+            def weight(term):
+                return log(1 + len(self.documents) / len(self.postings[term]))
+
+            scores = {
+                key: score(tokens, self.documents[key][1], weight) for key in found
+            }
+            found.sort(key=lambda key: (-scores[key], len(self.documents[key][0]), key))
+            return [(*key, self.documents[key][0]) for key in found[:limit]]
+
+
+def any_of(terms: list):
+    return "(" + " OR ".join(f'"{term}"' for term in terms) + ")"
+
+
+class Fts5Index:
+    """An FTS5 table in the SQLite database, shared by every process. The
+    rowid of a document encodes its kind and id, so a write replaces one row
+    without scanning the table."""
+
+    def __init__(self, kinds: tuple):
+        self.kinds = kinds
+
+    def rowid(self, key: tuple):
+        kind, id = key
+        return id * len(self.kinds) + self.kinds.index(kind)
+
+    def create(self):
+        """Create the index, telling whether it did not exist yet."""
+        with self.connect() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = 'search_index'")
+            ).scalar()
+            connection.execute(
+                text(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING "
+                    "fts5(value, label UNINDEXED, "
+                    "tokenize = 'unicode61 remove_diacritics 2')"
+                )
+            )
+            connection.execute(
+                text(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS search_terms USING "
+                    "fts5vocab(search_index, row)"
+                )
+            )
+        return not exists
+
+    def connect(self):
+        # writes go through the writer bind, when there is one
+        return db.engines.get(WRITER, db.engine).begin()
+
+    def add(self, key: tuple, label: str, value: str):
+        with self.connect() as connection:
+            self._delete(connection, key)
+            self._insert(connection, [(key, label, value)])
+
+    def remove(self, key: tuple):
+        with self.connect() as connection:
+            self._delete(connection, key)
+
+    def replace(self, kind: str, documents: list):
+        with self.connect() as connection:
+            connection.execute(
+                text("DELETE FROM search_index " "WHERE rowid % :kinds = :kind_index"),
+                {"kinds": len(self.kinds), "kind_index": self.kinds.index(kind)},
+            )
+            self._insert(
+                connection,
+                [((kind, id), label, value) for id, label, value in documents],
+            )
+
+    def get_terms(self, prefix: str, limit: int):
+        low, high = prefix_range(prefix)
+        rows = get_rows(
+            text(
+                "SELECT term FROM search_terms WHERE term >= :low AND term < :high "
+                "ORDER BY term LIMIT :limit"
+            ).bindparams(low=low, high=high, limit=limit)
+        )
+        return [term for term, in rows]
+
+    def search(self, tokens: list, kinds: tuple, limit: int):
+        alternatives = []
+        for token in tokens:
+            terms = self.get_terms(token, MAX_EXPANSIONS + 1)
+            # words the token starts are a native prefix query, unless they
+            # are so many ranking them all would take long
+            if len(terms) > MAX_EXPANSIONS:
+                alternatives.append(any_of(terms[:MAX_EXPANSIONS]))
+            elif terms:
+                alternatives.append(f'"{token}"*')
+            else:
+                typos = get_typos(token, self.get_terms)
+                if not typos:
+                    return []
+                alternatives.append(any_of(typos))
+        rows = get_rows(
+            text(
+                "SELECT rowid, label, value FROM search_index "
+                "WHERE search_index MATCH :expression "
+                "AND rowid % :kinds IN :kind_indexes ORDER BY rank LIMIT :limit"
+            ).bindparams(
+                bindparam("kind_indexes", expanding=True),
+                expression=" AND ".join(alternatives),
+                kinds=len(self.kinds),
+                kind_indexes=[self.kinds.index(kind) for kind in kinds],
+                limit=CANDIDATES,
+            )
+        )
+        results = []
+        # bm25 ranked the candidates; exact words still come before typos
+        for position, (rowid, label, value) in enumerate(rows):
+            kind, id = self.kinds[rowid % len(self.kinds)], rowid // len(self.kinds)
+            terms = set(tokenize(value))
+            results.append((-score(tokens, terms), position, kind, id, label))
+        results.sort()
+        return [(kind, id, label) for _, _, kind, id, label in results[:limit]]
+
+    def _delete(self, connection, key: tuple):
+        connection.execute(
+            text("DELETE FROM search_index WHERE rowid = :rowid"),
+            {"rowid": self.rowid(key)},
+        )
+
+    def _insert(self, connection, documents: list):
+        if documents:
+            connection.execute(
+                text(
+                    "INSERT INTO search_index (rowid, value, label) "
+                    "VALUES (:rowid, :value, :label)"
+                ),
+                [
+                    {"rowid": self.rowid(key), "value": value, "label": label}
+                    for key, label, value in documents
+                ],
+            )
+
+
+class SearchService:
+    """Full-text search over the catalog: makes, models, categories, stores
+    and vehicle plates. Results are ranked, and a searched word no entry
+    starts matches the words starting one typo away from it instead.
+
+    On SQLite the index is an FTS5 table; elsewhere it is kept in each
+    process and, as other processes cannot tell it about their writes,
+    rebuilt every `ttl` seconds. Both are updated on every service write."""
+
+    def __init__(self, *services, ttl: float = 300):
+        self.services = {service.name: service for service in services}
+        self.fields = {
+            "make": ("name",),
+            "model": ("name",),
+            "category": ("name",),
+            "store": ("name", "address"),
+            "vehicle": ("plate",),
+        }
+        self.ttl = ttl
+        self.index = MemoryIndex()
+        self.built = None
+        self._lock = Lock()
+        for service in services:
+            service.subscribe(self.on_write)
+
+    def configure(self, family: str, ttl: float = 300):
+        self.ttl = ttl
+        self.index = (
+            Fts5Index(tuple(self.services)) if family == "sqlite" else MemoryIndex()
+        )
+        self.built = None
+
+    def search(self, query: str, kinds: tuple = None, limit: int = 20):
+        """Return the `(kind, id, label)` of the best `limit` entries matching
+        every word of `query`, among the `kinds` of entries given."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        self._build()
+        return self.index.search(tokens, kinds or tuple(self.services), limit)
+
+    def rebuild(self, *kinds: str):
+        for kind in kinds or self.services:
+            self.index.replace(kind, self._get_documents(kind))
+
+    def on_write(self, service, entry):
+        # an unbuilt memory index loads the write anyway, but the FTS5 table
+        # may be read by other processes already
+        if self.built is None and isinstance(self.index, MemoryIndex):
+            return
+        self._build()
+        if entry is None:
+            return self.rebuild(service.name)
+        key = (service.name, entry.id)
+        if inspect(entry).was_deleted:
+            self.index.remove(key)
+        else:
+            self.index.add(key, *self._get_document(service.name, entry))
+
+    def _build(self):
+        if self.built is not None and not self._expired():
+            return
+        with self._lock:
+            if self.built is not None and not self._expired():
+                return
+            if isinstance(self.index, Fts5Index):
+                # the table outlives the process; fill it only when created
+                if self.index.create():
+                    self.rebuild()
+            else:
+                index = MemoryIndex()
+                for kind in self.services:
+                    index.replace(kind, self._get_documents(kind))
+                self.index = index
+            self.built = monotonic()
+
+    def _expired(self):
+        return (
+            isinstance(self.index, MemoryIndex) and monotonic() - self.built > self.ttl
+        )
+
+    def _get_document(self, kind: str, entry):
+        values = [getattr(entry, field) for field in self.fields[kind]]
+        return values[0], " ".join(value for value in values if value)
+
+    def _get_documents(self, kind: str):
+        model = self.services[kind].model
+        columns = [getattr(model, field) for field in self.fields[kind]]
+        return [
+            (id, values[0], " ".join(value for value in values if value))
+            for id, *values in get_rows(db.select(model.id, *columns))
+        ]
+
+
+service = SearchService(
+    make_service, model_service, category_service, store_service, vehicle_service
+)
@@ -9,6 +9,10 @@ class DuplicateStoreError(DuplicateError):
 
 
 class StoreService(BaseService):
+    counted = "vehicles"
+    # the export is public, so it leaves out who owns each store
+    exported = ["id", "name", "address"]
+
     def create(self, owner_id: int, name: str, address: str = None):
         try:
             return super().create(name, owner_id=owner_id, address=address)
@@ -26,8 +30,38 @@ class StoreService(BaseService):
                 raise DuplicateStoreError(e)
         return store
 
-    def get_owned_by(self, owner_id):
-        return get_entries_filtered(self.model, owner_id=owner_id)
+    def get_owned_by(self, owner_id, profile: str = None):
+        return get_entries_filtered(
+            self.model, options=self.load_options(profile), owner_id=owner_id
+        )
+
+    def get_owned(self, owner_id, id: int, include: tuple = ()):
+        """Return the store #id if the owner owns it."""
+        stores = get_entries_filtered(
+            self.model, options=self.include_options(include), id=id, owner_id=owner_id
+        )
+        return stores[0] if stores else None
+
+    def get_owned_ids(self, owner_id):
+        return [
+            store.id
+            for store in get_rows(
+                db.select(StoreModel.id).where(StoreModel.owner_id == owner_id)
+            )
+        ]
+
+    def get_owned_with_counts(self, owner_id):
+        return get_all_entries_with_counts(
+            self.model, self.count_key, filter=StoreModel.owner_id == owner_id
+        )
+
+    def stream_owned_by(self, owner_id):
+        return self.stream(filter=StoreModel.owner_id == owner_id)
+
+    def get_owned_page(self, owner_id, after: int = None, limit: int = None, **kwargs):
+        return self.get_page(
+            after, limit, filter=StoreModel.owner_id == owner_id, **kwargs
+        )
 
 
 service = StoreService("store", StoreModel)
@@ -0,0 +1,176 @@
+# project-related
+from ..db import *
+from ..models import CategoryTagModel, ModelModel, ModelTagModel
+from .category import service as category_service
+from .model import service as model_service
+from .tag import service as tag_service
+
+# misc
+from collections import defaultdict
+from sqlalchemy import inspect
+from threading import Lock
+from time import monotonic
+
+
+def _bits(ids):
+    bitmap = 0
+    for id in ids:
+        bitmap |= 1 << id
+    return bitmap
+
+
+def _ids(bitmap: int):
+    # one pass over the binary digits, lowest first; clearing the bits one by
+    # one would copy the whole int each time
+    return [id for id, bit in enumerate(bin(bitmap)[:1:-1]) if bit == "1"]
+
+
+class TagIndexService:
+    """An in-memory inverted index from each tag to the models carrying it,
+    directly or through their category. Every posting list is a bitmap (an
+    int whose bit `id` is set for model #id), so AND/OR/NOT are one bitwise
+    operation per tag.
+
+    It is built on first use and kept current by the writes of the model,
+    category and tag services. Other processes cannot tell it about theirs,
+    so it is also rebuilt every `ttl` seconds."""
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._lock = Lock()
+        self.built = None
+        self.model_tags = {}
+        self.model_category = {}
+        self.category_tags = {}
+        self.bitmaps = {}
+        self.models = 0
+        model_service.subscribe(self.on_model_write)
+        category_service.subscribe(self.on_category_write)
+        tag_service.subscribe(self.on_tag_write)
+
+    def configure(self, ttl: float = 300):
+        self.ttl = ttl
+        self.invalidate()
+
+    def search(self, all: list = (), any: list = (), none: list = ()):
+        """Return the sorted ids of the models having `all` the tags, at
+        least one of `any` of them and `none` of the others."""
+        self._build()
+        bitmaps, result = self.bitmaps, self.models
+        for tag_id in all:
+            result &= bitmaps.get(tag_id, 0)
+        if any:
+            found = 0
+            for tag_id in any:
+                found |= bitmaps.get(tag_id, 0)
+            result &= found
+        for tag_id in none:
+            result &= ~bitmaps.get(tag_id, 0)
+        return _ids(result)
+
+    def effective_tags(self, model_id: int):
+        self._build()
+        return self._effective_tags(model_id)
+
+    def on_model_write(self, service, model):
+        if model is None:
+            return self.invalidate()
+        with self._lock:
+            if self.built is not None:
+                self._load_model(model.id)
+                self._index(model.id)
+
+    def on_category_write(self, service, category):
+        if category is None:
+            return self.invalidate()
+        with self._lock:
+            if self.built is not None:
+                tag_ids = get_rows(
+                    db.select(CategoryTagModel.tag_id).where(
+                        CategoryTagModel.category_id == category.id
+                    )
+                )
+                self.category_tags[category.id] = {tag_id for tag_id, in tag_ids}
+                for model_id, category_id in self.model_category.items():
+                    if category_id == category.id:
+                        self._index(model_id)
+
+    def on_tag_write(self, service, tag):
+        # a new or renamed tag changes no posting; a deleted one took its
+        # assignments along, which a rebuild is the simplest way to follow
+        if tag is None or inspect(tag).was_deleted:
+            self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self.built = None
+
+    def _build(self):
+        if self.built is not None and not self._expired():
+            return
+        with self._lock:
+            if self.built is not None and not self._expired():
+                return
+            self.model_category = dict(
+                get_rows(db.select(ModelModel.id, ModelModel.category_id))
+            )
+            self.model_tags = defaultdict(set)
+            for model_id, tag_id in get_rows(
+                db.select(ModelTagModel.model_id, ModelTagModel.tag_id)
+            ):
+                self.model_tags[model_id].add(tag_id)
+            self.category_tags = defaultdict(set)
+            for category_id, tag_id in get_rows(
+                db.select(CategoryTagModel.category_id, CategoryTagModel.tag_id)
+            ):
+                self.category_tags[category_id].add(tag_id)
+            postings = defaultdict(list)
+            for model_id in self.model_category:
+                for tag_id in self._effective_tags(model_id):
+                    postings[tag_id].append(model_id)
+            self.bitmaps = {tag_id: _bits(ids) for tag_id, ids in postings.items()}
+            self.models = _bits(self.model_category)
+            self.built = monotonic()
+
+    def _expired(self):
+        return monotonic() - self.built > self.ttl
+
+    def _load_model(self, model_id: int):
+        category_id = get_rows(
+            db.select(ModelModel.category_id).where(ModelModel.id == model_id)
+        )
+        if category_id:
+            self.model_category[model_id] = category_id[0][0]
+            tag_ids = get_rows(
+                db.select(ModelTagModel.tag_id).where(
+                    ModelTagModel.model_id == model_id
+                )
+            )
+            self.model_tags[model_id] = {tag_id for tag_id, in tag_ids}
+        else:
+            self.model_category.pop(model_id, None)
+            self.model_tags.pop(model_id, None)
+
+    def _effective_tags(self, model_id: int):
+        category_id = self.model_category.get(model_id)
+        return self.model_tags.get(model_id, set()) | self.category_tags.get(
+            category_id, set()
+        )
+
+    def _index(self, model_id: int):
+        bit = 1 << model_id
+        tag_ids = (
+            self._effective_tags(model_id) if model_id in self.model_category else ()
+        )
+        for tag_id in set(self.bitmaps) | set(tag_ids):
+            if tag_id in tag_ids:
+                self.bitmaps[tag_id] = self.bitmaps.get(tag_id, 0) | bit
+            elif tag_id in self.bitmaps:
+                self.bitmaps[tag_id] &= ~bit
+        if model_id in self.model_category:
+            self.models |= bit
+        else:
+            self.models &= ~bit
+
+
+service = TagIndexService()
@@ -1,10 +1,10 @@
 # project-related
 from ..db import *
 from ..models import UserModel, UserRole
+from ..utils.passwords import password_hasher
 from .base import BaseService, DuplicateError
 
 # misc
-from passlib.hash import pbkdf2_sha256
 from sqlalchemy.exc import SQLAlchemyError
 
 
@@ -13,6 +13,18 @@ class DuplicateUserError(DuplicateError):
 
 
 class UserService(BaseService):
+    counted = "stores"
+    unique = "email"
+    exported = ["id", "email", "name", "role"]
+
+    def duplicate_message(self, email):
+        return f"The email {email!r} is already associated with an user!"
+
+    def normalize(self, row: dict):
+        if "password" in row:
+            row["password"] = password_hasher.hash(row["password"], row.get("role"))
+        return row
+
     def create(self, role: UserRole, email: str, password: str, name: str):
         if get_entries_filtered(self.model, email=email):
             raise DuplicateUserError(
@@ -21,7 +33,7 @@ class UserService(BaseService):
         user = self.model(
             role=role,
             email=email,
-            password=pbkdf2_sha256.hash(password),
+            password=password_hasher.hash(password, role),
             name=name,
         )
         try:
@@ -29,6 +41,7 @@ class UserService(BaseService):
         except SQLAlchemyError:
             raise
         else:
+            self.notify(user)
             return user
 
     def register_franchisee(self, email: str, password: str, name: str):
@@ -44,7 +57,13 @@ class UserService(BaseService):
 
     def login(self, email: str, password: str):
         user = self.get_by_email(email)
-        return user, user and pbkdf2_sha256.verify(password, user.password)
+        logged_in = bool(user) and password_hasher.verify(password, user.password)
+        if logged_in and password_hasher.needs_update(user.password, user.role):
+            # the hash cost changed since this one was made, and the password
+            # is only known now
+            user.password = password_hasher.hash(password, user.role)
+            add_entry(user)
+        return user, logged_in
 
 
 service = UserService("user", UserModel)
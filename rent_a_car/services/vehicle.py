@@ -1,10 +1,11 @@
 # project-related
 from ..db import *
-from ..models import VehicleModel, StoreModel
+from ..models import ModelModel, VehicleModel, StoreModel
 from .base import BaseService, DuplicateError
 
 # misc
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm import joinedload
 
 
 class DuplicateVehicleError(DuplicateError):
@@ -12,6 +13,20 @@ class DuplicateVehicleError(DuplicateError):
 
 
 class VehicleService(BaseService):
+    load_profiles = {
+        "list": (joinedload(VehicleModel.model), joinedload(VehicleModel.store)),
+        "catalog": (joinedload(VehicleModel.model).joinedload(ModelModel.make),),
+    }
+    unique = "plate"
+
+    def duplicate_message(self, plate):
+        return f"The plate {plate!r} is already associated with an vehicle!"
+
+    def normalize(self, row: dict):
+        if "plate" in row:
+            row["plate"] = row["plate"].upper()
+        return row
+
     def create(self, plate: str, model_id: int, year: int, store_id: int = None):
         if get_entries_filtered(self.model, plate=plate):
             raise DuplicateVehicleError(
@@ -28,6 +43,7 @@ class VehicleService(BaseService):
         except SQLAlchemyError:
             raise
         else:
+            self.notify(vehicle)
             return vehicle
 
     def update(
@@ -48,11 +64,37 @@ class VehicleService(BaseService):
             )
         except SQLAlchemyError:
             raise
+        self.notify(vehicle)
         return vehicle
 
-    def get_owned_by(self, owner_id):
+    def get_owned_by(self, owner_id, profile: str = None):
         return get_entries_joined_filtered(
-            VehicleModel, StoreModel, filter=StoreModel.owner_id == owner_id
+            VehicleModel,
+            StoreModel,
+            filter=StoreModel.owner_id == owner_id,
+            options=self.load_options(profile),
+        )
+
+    def get_owned(self, owner_id, id: int, include: tuple = ()):
+        """Return the vehicle #id if it is in one of the owner's stores."""
+        vehicles = get_entries_joined_filtered(
+            VehicleModel,
+            StoreModel,
+            filter=(VehicleModel.id == id) & (StoreModel.owner_id == owner_id),
+            options=self.include_options(include),
+        )
+        return vehicles[0] if vehicles else None
+
+    def stream_owned_by(self, owner_id):
+        return self.stream(joins=(StoreModel,), filter=StoreModel.owner_id == owner_id)
+
+    def get_owned_page(self, owner_id, after: int = None, limit: int = None, **kwargs):
+        return self.get_page(
+            after,
+            limit,
+            joins=(StoreModel,),
+            filter=StoreModel.owner_id == owner_id,
+            **kwargs,
         )
 
 
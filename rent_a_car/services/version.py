@@ -0,0 +1,85 @@
+# flask-related
+from flask import g, has_request_context
+
+# project-related
+from ..db import *
+from ..models import VersionModel
+from .category import service as category_service
+from .make import service as make_service
+from .model import service as model_service
+from .store import service as store_service
+from .tag import service as tag_service
+from .user import service as user_service
+from .vehicle import service as vehicle_service
+
+# misc
+from datetime import datetime, timezone
+from sqlalchemy.exc import IntegrityError
+
+
+class VersionService:
+    """Per-entity version counters, bumped whenever the entity's service
+    writes. Anything derived from an entity's rows can be keyed by its
+    version to know when it went stale.
+
+    The counters are rows of the database, so every process sees the writes
+    of the others, and they survive restarts. They are read once per
+    request."""
+
+    def __init__(self, *services):
+        for service in services:
+            service.subscribe(self.on_write)
+
+    def get_all(self):
+        """Return the `(version, modified)` of every entity written so far."""
+        if has_request_context() and "versions" in g:
+            return g.versions
+        versions = {
+            entry.name: (entry.version, entry.modified.replace(tzinfo=timezone.utc))
+            for entry in get_all_entries(VersionModel)
+        }
+        if has_request_context():
+            g.versions = versions
+        return versions
+
+    def get(self, *names: str):
+        versions = self.get_all()
+        return tuple(versions[name][0] if name in versions else 0 for name in names)
+
+    def modified(self, *names: str):
+        """Return when any of the entities `names` was last written, or None
+        if none of them ever was."""
+        versions = self.get_all()
+        return max(
+            (versions[name][1] for name in names if name in versions), default=None
+        )
+
+    def bump(self, name: str):
+        modified = datetime.now(timezone.utc).replace(tzinfo=None)
+        filter = VersionModel.name == name
+        if not increment_entry(
+            VersionModel, VersionModel.version, filter, modified=modified
+        ):
+            try:
+                add_entry(VersionModel(name=name, version=1, modified=modified))
+            except IntegrityError:
+                # another process inserted it first
+                increment_entry(
+                    VersionModel, VersionModel.version, filter, modified=modified
+                )
+        if has_request_context():
+            g.pop("versions", None)
+
+    def on_write(self, service, entry):
+        self.bump(service.name)
+
+
+service = VersionService(
+    category_service,
+    make_service,
+    model_service,
+    store_service,
+    tag_service,
+    user_service,
+    vehicle_service,
+)
@@ -6,9 +6,17 @@ from flask_smorest import Blueprint
 
 # project-related
 from .factory import EndpointMixinFactory
-from .schemas import StoreSchema
-from .services import store_service, DuplicateStoreError
+from .schemas import ExportSchema, PageSchema, StoreSchema
+from .services import (
+    store_service,
+    vehicle_service,
+    version_service,
+    DuplicateStoreError,
+)
 from .user import login_as_franchisee_required
+from .utils.conditional import conditional
+from .utils.export import export_response
+from .utils.fragments import fragment_cache, get_viewer
 from .utils.nav import *
 
 # misc
@@ -44,7 +52,7 @@ class Store(MethodView, EndpointMixin):
     @blp.arguments(StoreSchema, location="form")
     def post(self, store_input):
         app.logger.info(f"Creating {self.blp.name} for user {current_user.email!r}.")
-        app.logger.debug(f"{self.blp.name.capitalize()} info: {store_input}.")
+        app.logger.debug("%s info: %s.", self.blp.name.capitalize(), store_input)
         nav = get_nav_by_user(current_user)
         try:
             store = store_service.create(owner_id=current_user.id, **store_input)
@@ -89,46 +97,62 @@ class Store(MethodView, EndpointMixin):
 
 @blp.route("/all")
 class Stores(MethodView, EndpointMixin):
-    def get(self):
-        if current_user.is_authenticated and current_user.is_franchisee():
-            stores = store_service.get_owned_by(current_user.id)
-        else:
-            stores = store_service.get_all()
+    @conditional("store", "vehicle")
+    @blp.arguments(PageSchema, location="query", as_kwargs=True)
+    def get(self, **kwargs):
+        is_franchisee = current_user.is_authenticated and current_user.is_franchisee()
+
+        def get_stores():
+            if is_franchisee:
+                return store_service.get_owned_page(
+                    current_user.id, with_counts=True, **kwargs
+                )
+            return store_service.get_page(with_counts=True, **kwargs)
+
         nav = get_nav_by_user(current_user)
-        if current_user.is_authenticated and current_user.is_franchisee():
+        if is_franchisee:
             nav = [NAV_CREATE_STORE()] + nav
         nav.remove(NAV_STORES())
         return render_template(
             "generic/all.html",
             title=f"{type(self).__name__}",
             nav=nav,
-            table={
-                "name": "stores",
-                "headers": ["name", "address", "vehicles"],
-                "rows": [
-                    {
-                        "name": store.name,
-                        "address": store.address or "",
-                        "vehicles": len(list(store.vehicles)),
-                    }
-                    for store in stores
-                ],
-                "refs": [
-                    {"name": url_for(str(StoreId()), store_id=store.id)}
-                    for store in stores
-                ],
-            },
+            table=fragment_cache.render_table(
+                "stores",
+                # franchisees only see their own stores
+                get_viewer(current_user, current_user.id)
+                if is_franchisee
+                else get_viewer(current_user),
+                version_service.get("store", "vehicle"),
+                lambda: get_stores_table(get_stores()),
+            ),
         )
 
 
+@blp.route("/export")
+class StoreExport(MethodView, EndpointMixin):
+    @blp.arguments(ExportSchema, location="query", as_kwargs=True)
+    def get(self, format):
+        app.logger.info(f"Exporting {self.blp.name}s as {format}.")
+        if current_user.is_authenticated and current_user.is_franchisee():
+            rows = store_service.stream_owned_by(current_user.id)
+        else:
+            rows = store_service.stream()
+        return export_response("stores", store_service.export_fields, rows, format)
+
+
 @blp.route("/<store_id>")
 class StoreId(MethodView, EndpointMixin):
+    @conditional("store", "vehicle", "model", "make")
     @blp.arguments(Schema, location="query", as_kwargs=True, unknown=INCLUDE)
     def get(self, store_id, **kwargs):
         app.logger.info(f"Fetching {self.blp.name} #{store_id}.")
         store = store_service.get(store_id)
         if store:
             is_owner = current_user.is_authenticated and store.is_owner(current_user)
+            vehicles = store.vehicles.options(
+                *vehicle_service.load_options("catalog")
+            ).all()
             nav = get_nav_by_user(current_user)
             return render_template(
                 "generic/view.html",
@@ -151,7 +175,7 @@ class StoreId(MethodView, EndpointMixin):
                                 "year": vehicle.year,
                                 "picture": vehicle.model.picture or "",
                             }
-                            for vehicle in store.vehicles
+                            for vehicle in vehicles
                         ],
                         "refs": [
                             {
@@ -165,7 +189,7 @@ class StoreId(MethodView, EndpointMixin):
                                     str("model.ModelId"), model_id=vehicle.model.id
                                 ),
                             }
-                            for vehicle in store.vehicles
+                            for vehicle in vehicles
                         ],
                         "pics": ["picture"],
                     },
@@ -182,7 +206,7 @@ class StoreId(MethodView, EndpointMixin):
     @blp.arguments(StoreSchema, location="form")
     def post(self, store_info, store_id):
         app.logger.info(f"Updating {self.blp.name} #{store_id}.")
-        app.logger.debug(f"{self.blp.name.capitalize()} data: {store_info}.")
+        app.logger.debug("%s data: %s.", self.blp.name.capitalize(), store_info)
         store = store_service.get(store_id)
         if not store:
             abort(404)
@@ -217,3 +241,22 @@ class StoreId(MethodView, EndpointMixin):
         if not store:
             abort(404)
         return redirect(url_for(str(Stores()))), 303
+
+
+def get_stores_table(stores):
+    return {
+        "name": "stores",
+        "headers": ["name", "address", "vehicles"],
+        "rows": [
+            {
+                "name": store.name,
+                "address": store.address or "",
+                "vehicles": vehicles,
+            }
+            for store, vehicles in stores
+        ],
+        "refs": [
+            {"name": url_for(str(StoreId()), store_id=store.id)} for store, _ in stores
+        ],
+        "page": get_page_nav(stores),
+    }
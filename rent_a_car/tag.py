@@ -6,9 +6,10 @@ from flask_smorest import Blueprint
 
 # project-related
 from .factory import EndpointMixinFactory
-from .schemas import TagSchema, TagSchemaNested
+from .schemas import ExportSchema, PageSchema, TagSchema, TagSchemaNested
 from .services import tag_service, DuplicateTagError
 from .user import login_as_admin_required, login_as_operator_required
+from .utils.export import export_response
 from .utils.nav import *
 
 # misc
@@ -44,7 +45,7 @@ class Tag(MethodView, EndpointMixin):
     @blp.arguments(TagSchema, location="form")
     def post(self, tag_input):
         app.logger.info(f"Creating {self.blp.name}.")
-        app.logger.debug(f"{self.blp.name.capitalize()} info: {tag_input}.")
+        app.logger.debug("%s info: %s.", self.blp.name.capitalize(), tag_input)
         nav = get_nav_by_user(current_user)
         try:
             tag = tag_service.create(**tag_input)
@@ -91,8 +92,9 @@ class Tag(MethodView, EndpointMixin):
 class Tags(MethodView, EndpointMixin):
     @login_required
     @login_as_operator_required
-    def get(self):
-        tags = tag_service.get_all()
+    @blp.arguments(PageSchema, location="query", as_kwargs=True)
+    def get(self, **kwargs):
+        tags = tag_service.get_page(**kwargs)
         nav = get_nav_by_user(current_user)
         if current_user.is_admin():
             nav = [NAV_CREATE_TAG()] + nav
@@ -113,10 +115,22 @@ class Tags(MethodView, EndpointMixin):
                 "refs": [
                     {"name": url_for(str(TagId()), tag_id=tag.id)} for tag in tags
                 ],
+                "page": get_page_nav(tags),
             },
         )
 
 
+@blp.route("/export")
+class TagExport(MethodView, EndpointMixin):
+    @login_required
+    @login_as_operator_required
+    @blp.arguments(ExportSchema, location="query", as_kwargs=True)
+    def get(self, format):
+        app.logger.info(f"Exporting {self.blp.name}s as {format}.")
+        rows = tag_service.stream()
+        return export_response("tags", tag_service.export_fields, rows, format)
+
+
 @blp.route("/<tag_id>")
 class TagId(MethodView, EndpointMixin):
     @login_required
@@ -158,7 +172,7 @@ class TagId(MethodView, EndpointMixin):
     @blp.arguments(TagSchema, location="form")
     def post(self, tag_info, tag_id):
         app.logger.info(f"Updating {self.blp.name} #{tag_id}.")
-        app.logger.debug(f"{self.blp.name.capitalize()} data: {tag_info}.")
+        app.logger.debug("%s data: %s.", self.blp.name.capitalize(), tag_info)
         tag = tag_service.get(tag_id)
         if not tag:
             abort(404)
@@ -4,8 +4,10 @@ from flask import (
     current_app as app,
     abort,
     flash,
+    get_flashed_messages,
     redirect,
     render_template,
+    stream_template,
     url_for,
 )
 from flask.views import MethodView
@@ -20,17 +22,16 @@ from flask_smorest import Blueprint
 
 # project-related
 from .factory import EndpointMixinFactory
-from .schemas import UserSchema, UserLoginSchema
+from .schemas import ExportSchema, PageSchema, UserSchema, UserLoginSchema
 from .services import (
-    category_service,
-    model_service,
-    store_service,
+    principal_service,
+    profile_service,
     user_service,
     DuplicateUserError,
-    tag_service,
-    vehicle_service,
 )
+from .utils.export import export_response
 from .utils.nav import *
+from .utils.timing import timed
 
 # misc
 from functools import wraps
@@ -90,7 +91,9 @@ class Profile(MethodView):
     @login_required
     def get(self):
         nav = get_nav_by_user(current_user)
-        return render_template(
+        # consume the flashes before streaming, while the session can still be saved
+        get_flashed_messages(with_categories=True)
+        return stream_template(
             "user/profile.html",
             title=current_user.name,
             nav=nav,
@@ -109,7 +112,7 @@ class User(MethodView):
     @blp.arguments(UserSchema, location="form")
     def post(self, user_input):
         app.logger.info(f"Registering {type(self).__name__}.")
-        app.logger.debug(f"{type(self).__name__} info: {user_input}")
+        app.logger.debug("%s info: %s.", type(self).__name__, user_input)
         try:
             user = self.register(**user_input)
         except DuplicateUserError as e:
@@ -168,9 +171,7 @@ class Login(MethodView):
     @blp.arguments(UserLoginSchema, location="form")
     @blp.arguments(Schema, location="query", as_kwargs=True, unknown=INCLUDE)
     def post(self, user_input, **kwargs):
-        app.logger.debug(
-            f"Login attempt with email: {user_input['email']!r} and password: {user_input['password']!r}."
-        )
+        app.logger.debug("Login attempt with email: %r.", user_input["email"])
         user, logged_in = user_service.login(
             email=user_input["email"], password=user_input["password"]
         )
@@ -191,7 +192,7 @@ class Login(MethodView):
             remember="remember" in user_input,
         )
         app.logger.info(f"User {current_user.email!r} logged in.")
-        app.logger.debug(f"Args {kwargs}")
+        app.logger.debug("Args %s.", kwargs)
         if "next" in kwargs:
             return redirect(kwargs["next"])
         return redirect(url_for("user.Profile"))
@@ -211,8 +212,9 @@ class Logout(MethodView):
 class Users(MethodView):
     @login_required
     @login_as_admin_required
-    def get(self):
-        users = user_service.get_all()
+    @blp.arguments(PageSchema, location="query", as_kwargs=True)
+    def get(self, **kwargs):
+        users = user_service.get_page(with_counts=True, **kwargs)
         nav = get_nav_by_user(current_user)
         nav.remove(NAV_USERS())
         return render_template(
@@ -227,17 +229,30 @@ class Users(MethodView):
                         "name": user.name,
                         "e-mail": user.email,
                         "role": user.role.name,
-                        "stores": len(list(user.stores)),
+                        "stores": stores,
                     }
-                    for user in users
+                    for user, stores in users
                 ],
                 "refs": [
-                    {"name": url_for(str(UserId()), user_id=user.id)} for user in users
+                    {"name": url_for(str(UserId()), user_id=user.id)}
+                    for user, _ in users
                 ],
+                "page": get_page_nav(users),
             },
         )
 
 
+@blp.route("/export")
+class UserExport(MethodView, EndpointMixin):
+    @login_required
+    @login_as_admin_required
+    @blp.arguments(ExportSchema, location="query", as_kwargs=True)
+    def get(self, format):
+        app.logger.info(f"Exporting {self.blp.name}s as {format}.")
+        rows = user_service.stream()
+        return export_response("users", user_service.export_fields, rows, format)
+
+
 @blp.route("/<user_id>")
 class UserId(MethodView, EndpointMixin):
     @login_required
@@ -250,6 +265,7 @@ class UserId(MethodView, EndpointMixin):
             update = False
             nav = get_nav_by_user(current_user)
             if user.is_franchisee():
+                stores = user.stores.all()
                 tables = [
                     {
                         "name": "stores",
@@ -259,7 +275,7 @@ class UserId(MethodView, EndpointMixin):
                                 "name": store.name,
                                 "address": store.address,
                             }
-                            for store in user.stores
+                            for store in stores
                         ],
                         "refs": [
                             {
@@ -267,7 +283,7 @@ class UserId(MethodView, EndpointMixin):
                                     str("store.StoreId"), store_id=store.id
                                 ),
                             }
-                            for store in user.stores
+                            for store in stores
                         ],
                         "pics": ["picture"],
                     },
@@ -275,13 +291,15 @@ class UserId(MethodView, EndpointMixin):
 
             else:
                 tables = []
+            with timed("serialize"):
+                info = UserSchema().dump(user)
             return render_template(
                 "generic/view.html",
                 title=user.name,
                 submit="Update",
                 nav=nav,
                 schema=UserSchema,
-                info=UserSchema().dump(user),
+                info=info,
                 is_owner=is_owner,
                 update=update,
                 tables=tables,
@@ -298,173 +316,147 @@ def add_login(app: Flask):
     login_manager.login_view = "user.Login"
     login_manager.login_message_category = "warning"
     login_manager.refresh_view = "user.Login"
+    principal_service.cache.ttl = app.config["PRINCIPAL_CACHE_TTL"]
 
     @login_manager.user_loader
     def load_user(user_id):
-        # since the user_id is just the primary key of our user table, use it in the query for the user
-        return user_service.get(user_id)
+        # since the user_id is just the primary key of our user table, use it to
+        # fetch the (cached) principal, so authorization checks need no queries
+        return principal_service.get(user_id)
 
 
 def get_profile_tables_by_user(user):
-    if user.is_admin():
-        users = user_service.get_all()
-        stores = store_service.get_all()
-        categories = category_service.get_all()
-        models = model_service.get_all()
-        tags = tag_service.get_all()
-        vehicles = vehicle_service.get_all()
-
-    if user.is_franchisee():
-        stores = store_service.get_owned_by(user.id)
-        vehicles = vehicle_service.get_owned_by(user.id)
-
-    if user.is_client():
-        stores = store_service.get_all()
-        categories = category_service.get_all()
-
-    tables = [
-        {
-            "name": "users",
-            "headers": ["name", "e-mail", "role", "stores"],
-            "rows": [
-                {
-                    "name": user.name,
-                    "e-mail": user.email,
-                    "role": user.role.name,
-                    "stores": len(list(user.stores)),
-                }
-                for user in users
-            ],
-            "refs": [
-                {"name": url_for(str(UserId()), user_id=user.id)} for user in users
-            ],
-        }
-        if user.is_admin()
-        else None,
-        {
-            "name": "stores",
-            "headers": ["name", "address", "vehicles"],
-            "rows": [
-                {
-                    "name": store.name,
-                    "address": store.address or "",
-                    "vehicles": len(list(store.vehicles)),
-                }
-                for store in stores
-            ],
-            "refs": [
-                {"name": url_for("store.StoreId", store_id=store.id)}
-                for store in stores
-            ],
-        },
-        {
-            "name": "categories",
-            "headers": ["name", "fare", "models"],
-            "rows": [
-                {
-                    "name": category.name,
-                    "fare": category.fare,
-                    "models": len(list(category.models)),
-                }
-                for category in categories
-            ],
-            "refs": [
-                {"name": url_for("category.CategoryId", category_id=category.id)}
-                for category in categories
-            ],
-        }
-        if user.is_admin() or user.is_client()
-        else None,
-        {
-            "name": "models",
-            "headers": ["picture", "name", "make", "category"],
-            "rows": [
-                {
-                    "picture": model.picture or "",
-                    "name": model.name,
-                    "make": model.make.name,
-                    "category": model.category.name,
-                }
-                for model in models
-            ],
-            "refs": [
-                {
-                    "name": url_for("model.ModelId", model_id=model.id),
-                    "make": url_for("make.MakeId", make_id=model.make_id),
-                    "category": url_for(
-                        "category.CategoryId", category_id=model.category_id
-                    ),
-                }
-                for model in models
-            ],
-            "pics": ["picture"],
-        }
-        if user.is_admin()
-        else None,
-        {
-            "name": "models",
-            "headers": ["picture", "name", "make", "category"],
-            "rows": [
-                {
-                    "picture": model.picture or "",
-                    "name": model.name,
-                    "make": model.make.name,
-                    "category": model.category.name,
-                }
-                for model in models
-            ],
-            "refs": [
-                {
-                    "name": url_for("model.ModelId", model_id=model.id),
-                    "make": url_for("make.MakeId", make_id=model.make_id),
-                    "category": url_for(
-                        "category.CategoryId", category_id=model.category_id
-                    ),
-                }
-                for model in models
-            ],
-            "pics": ["picture"],
-        }
-        if user.is_admin()
-        else None,
-        {
-            "name": "tags",
-            "headers": ["name"],
-            "rows": [
-                {
-                    "name": tag.name,
-                }
-                for tag in tags
-            ],
-            "refs": [{"name": url_for("tag.TagId", tag_id=tag.id)} for tag in tags],
-        }
-        if user.is_admin()
-        else None,
-        {
-            "name": "vehicles",
-            "headers": ["picture", "name", "model", "year", "store"],
-            "rows": [
-                {
-                    "picture": vehicle.model.picture or "",
-                    "name": vehicle.plate,
-                    "model": vehicle.model.name,
-                    "year": vehicle.year,
-                    "store": vehicle.store.name,
-                }
-                for vehicle in vehicles
-            ],
-            "refs": [
-                {
-                    "name": url_for("vehicle.VehicleId", vehicle_id=vehicle.id),
-                    "model": url_for("model.ModelId", model_id=vehicle.model_id),
-                    "store": url_for("store.StoreId", store_id=vehicle.store_id),
-                }
-                for vehicle in vehicles
-            ],
-            "pics": ["picture"],
-        }
-        if user.is_admin() or user.is_franchisee()
-        else None,
-    ]
-    tables = list(filter(None, tables))
-    return tables
+    # tables are built lazily, as the template reaches them
+    for name, rows in profile_service.get_tables(user):
+        yield PROFILE_TABLES[name](rows)
+
+
+def get_users_table(users):
+    return {
+        "name": "users",
+        "headers": ["name", "e-mail", "role", "stores"],
+        "rows": [
+            {
+                "name": user.name,
+                "e-mail": user.email,
+                "role": user.role.name,
+                "stores": user.stores,
+            }
+            for user in users
+        ],
+        "refs": [{"name": url_for(str(UserId()), user_id=user.id)} for user in users],
+    }
+
+
+def get_stores_table(stores):
+    return {
+        "name": "stores",
+        "headers": ["name", "address", "vehicles"],
+        "rows": [
+            {
+                "name": store.name,
+                "address": store.address or "",
+                "vehicles": store.vehicles,
+            }
+            for store in stores
+        ],
+        "refs": [
+            {"name": url_for("store.StoreId", store_id=store.id)} for store in stores
+        ],
+    }
+
+
+def get_categories_table(categories):
+    return {
+        "name": "categories",
+        "headers": ["name", "fare", "models"],
+        "rows": [
+            {
+                "name": category.name,
+                "fare": category.fare,
+                "models": category.models,
+            }
+            for category in categories
+        ],
+        "refs": [
+            {"name": url_for("category.CategoryId", category_id=category.id)}
+            for category in categories
+        ],
+    }
+
+
+def get_models_table(models):
+    return {
+        "name": "models",
+        "headers": ["picture", "name", "make", "category"],
+        "rows": [
+            {
+                "picture": model.picture or "",
+                "name": model.name,
+                "make": model.make,
+                "category": model.category,
+            }
+            for model in models
+        ],
+        "refs": [
+            {
+                "name": url_for("model.ModelId", model_id=model.id),
+                "make": url_for("make.MakeId", make_id=model.make_id),
+                "category": url_for(
+                    "category.CategoryId", category_id=model.category_id
+                ),
+            }
+            for model in models
+        ],
+        "pics": ["picture"],
+    }
+
+
+def get_tags_table(tags):
+    return {
+        "name": "tags",
+        "headers": ["name"],
+        "rows": [
+            {
+                "name": tag.name,
+            }
+            for tag in tags
+        ],
+        "refs": [{"name": url_for("tag.TagId", tag_id=tag.id)} for tag in tags],
+    }
+
+
+def get_vehicles_table(vehicles):
+    return {
+        "name": "vehicles",
+        "headers": ["picture", "name", "model", "year", "store"],
+        "rows": [
+            {
+                "picture": vehicle.picture or "",
+                "name": vehicle.plate,
+                "model": vehicle.model,
+                "year": vehicle.year,
+                "store": vehicle.store or "",
+            }
+            for vehicle in vehicles
+        ],
+        "refs": [
+            {
+                "name": url_for("vehicle.VehicleId", vehicle_id=vehicle.id),
+                "model": url_for("model.ModelId", model_id=vehicle.model_id),
+                "store": url_for("store.StoreId", store_id=vehicle.store_id),
+            }
+            for vehicle in vehicles
+        ],
+        "pics": ["picture"],
+    }
+
+
+PROFILE_TABLES = {
+    "users": get_users_table,
+    "stores": get_stores_table,
+    "categories": get_categories_table,
+    "models": get_models_table,
+    "tags": get_tags_table,
+    "vehicles": get_vehicles_table,
+}
@@ -0,0 +1,106 @@
+# misc
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class TTLCache:
+    """A thread-safe in-process cache whose entries expire `ttl` seconds
+    after being set."""
+
+    def __init__(self, ttl: float = 60, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires = entry
+            if expires < monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._entries) >= self.maxsize and key not in self._entries:
+                # drop the entry closest to expiring to make room
+                del self._entries[min(self._entries, key=lambda k: self._entries[k][1])]
+            self._entries[key] = (value, monotonic() + self.ttl)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class LRUCache:
+    """A thread-safe in-process cache that drops its least recently used
+    entries past `maxsize`, or never when `maxsize` is None."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if self.maxsize is not None and len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache:
+    """A cache shared by every process of the application, kept in Redis.
+    Needs the `redis` package, which is only imported when this is used."""
+
+    def __init__(self, url: str, ttl: float = None):
+        from redis import Redis
+
+        self.client = Redis.from_url(url, decode_responses=True)
+        self.ttl = ttl
+        # of this process only
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        value = self.client.get(key)
+        if value is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.client.set(key, value, ex=int(self.ttl) if self.ttl else None)
+
+    def clear(self):
+        self.client.flushdb()
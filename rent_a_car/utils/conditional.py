@@ -0,0 +1,71 @@
+# flask-related
+from flask import current_app as app, make_response, request, session
+from flask_login import current_user
+
+# project-related
+from ..services import version_service
+from .fragments import get_viewer
+
+# misc
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from hashlib import sha1
+
+
+def conditional(*entities: str):
+    """Make a GET view answer 304 Not Modified, without running it, when the
+    client's copy is still current. The validators are derived from the
+    versions of `entities` (every entity the page shows), the viewer and the
+    request path."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # a pending flash must be rendered, so the page is not the cached one
+            if "_flashes" in session:
+                return view(*args, **kwargs)
+            # anonymous pages are shared, the others are only the user's own
+            if current_user.is_authenticated:
+                viewer = get_viewer(current_user, current_user.id)
+            else:
+                viewer = get_viewer(current_user)
+            versions = version_service.get(*entities)
+            last_modified = version_service.modified(*entities)
+            key = [viewer, *map(str, versions)]
+            etag = sha1(":".join([*key, request.full_path]).encode()).hexdigest()
+            # Last-Modified has whole seconds: it is only sent once its second
+            # is over, when no later write can fall in it anymore
+            if last_modified is not None:
+                last_modified = last_modified.replace(microsecond=0)
+                if last_modified + timedelta(seconds=1) > datetime.now(timezone.utc):
+                    last_modified = None
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = bool(
+                    request.if_modified_since
+                    and last_modified is not None
+                    and request.if_modified_since >= last_modified
+                )
+            if not_modified:
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.vary.add("Cookie")
+            if current_user.is_authenticated:
+                response.cache_control.private = True
+                response.cache_control.no_cache = True
+            else:
+                response.cache_control.public = True
+                response.cache_control.max_age = app.config["CACHE_MAX_AGE"]
+                response.cache_control.must_revalidate = True
+            return response
+
+        return wrapper
+
+    return decorator
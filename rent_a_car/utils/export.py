@@ -0,0 +1,44 @@
+# flask-related
+from flask import Response, stream_with_context
+
+# misc
+import json
+from csv import writer
+from enum import Enum
+from io import StringIO
+
+MIMETYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _value(value):
+    return value.name if isinstance(value, Enum) else value
+
+
+def _csv_lines(fields, rows):
+    buffer = StringIO()
+    csv = writer(buffer)
+    csv.writerow(fields)
+    for row in rows:
+        csv.writerow([_value(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_lines(fields, rows):
+    for row in rows:
+        yield json.dumps(
+            {field: _value(value) for field, value in zip(fields, row)}, default=str
+        ) + "\n"
+
+
+def export_response(name: str, fields: list, rows, format: str = "csv"):
+    """Stream `rows` (an iterator of tuples matching `fields`) as a CSV or
+    NDJSON attachment, without ever holding the whole export in memory."""
+    lines = _ndjson_lines if format == "ndjson" else _csv_lines
+    return Response(
+        stream_with_context(lines(fields, rows)),
+        mimetype=MIMETYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={name}.{format}"},
+    )
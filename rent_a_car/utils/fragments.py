@@ -0,0 +1,42 @@
+# flask-related
+from flask import render_template, request
+from markupsafe import Markup
+
+# project-related
+from .cache import TTLCache
+
+
+def get_viewer(user, *scope):
+    """Identify who a fragment is rendered for: the role of the user, and
+    `scope` for fragments that also depend on which user it is."""
+    if user.is_anonymous:
+        return "anonymous"
+    return ":".join([user.role.name, *map(str, scope)])
+
+
+class FragmentCache:
+    """Rendered HTML fragments, keyed by their name, viewer, request path and
+    the versions of the entities they show. A write bumps its entity's version,
+    so stale fragments are never read again and just age out of the backend.
+
+    Kept in the process, fragments also expire after `ttl` seconds, so that
+    those of entities no longer written do not stay for good."""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 30):
+        # any object with get/set (e.g. a RedisCache) can replace this
+        self.backend = TTLCache(ttl, maxsize)
+
+    def render_table(self, name: str, viewer: str, versions: tuple, build):
+        """Return the `generic/list_table.html` fragment of the table `build()`
+        returns, rendering it only when no current one is cached."""
+        key = ":".join(
+            ["fragment", name, viewer, *map(str, versions), request.full_path]
+        )
+        html = self.backend.get(key)
+        if html is None:
+            html = render_template("generic/list_table.html", table=build())
+            self.backend.set(key, html)
+        return Markup(html)
+
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,166 @@
+# flask-related
+from flask import Flask, current_app as app, g, has_request_context, request
+
+# misc
+from collections import Counter
+from heapq import nlargest
+from logging import getLogger
+from sqlalchemy import event
+from threading import Lock
+from time import perf_counter
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestQueries:
+    """The statements run while handling one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.statements = Counter()
+        self.durations = {}
+
+    def add(self, statement: str, duration: float):
+        self.count += 1
+        self.time += duration
+        self.statements[statement] += 1
+        self.durations[statement] = max(duration, self.durations.get(statement, 0))
+
+
+class EndpointQueries:
+    """The statements run by every request of one endpoint: totals, the
+    `slowest` statements seen and the statements repeated within a request."""
+
+    def __init__(self, slowest: int):
+        self.requests = 0
+        self.count = 0
+        self.time = 0.0
+        self.max_count = 0
+        self.slowest = {}
+        self.repeated = Counter()
+        self._size = slowest
+
+    def add(self, queries: RequestQueries, repeated: dict):
+        self.requests += 1
+        self.count += queries.count
+        self.time += queries.time
+        self.max_count = max(self.max_count, queries.count)
+        self.repeated.update(repeated)
+        for statement, duration in queries.durations.items():
+            self.slowest[statement] = max(duration, self.slowest.get(statement, 0))
+        if len(self.slowest) > self._size:
+            self.slowest = dict(
+                nlargest(self._size, self.slowest.items(), key=lambda item: item[1])
+            )
+
+    def report(self):
+        return {
+            "requests": self.requests,
+            "queries": self.count,
+            "queries_per_request": self.count / self.requests,
+            "max_queries": self.max_count,
+            "db_ms": self.time * 1000,
+            "db_ms_per_request": self.time * 1000 / self.requests,
+            "slowest": [
+                {"ms": duration * 1000, "statement": statement}
+                for statement, duration in sorted(
+                    self.slowest.items(), key=lambda item: item[1], reverse=True
+                )
+            ],
+            "likely_n_plus_one": dict(self.repeated.most_common()),
+        }
+
+
+class QueryInstrumentation:
+    """Counts and times the statements every request runs, per endpoint
+    (`request.endpoint`, which is `EndpointMixin.endpoint()` for the views).
+
+    A statement run `repeat_threshold` times or more in one request is logged
+    as a likely N+1. With a QUERY_BUDGET (or a QUERY_BUDGETS entry for the
+    endpoint) configured, a request running more statements raises
+    QueryBudgetExceeded, which the test client propagates."""
+
+    logger = getLogger("rent_a_car.queries")
+
+    def __init__(self, slowest: int = 5, repeat_threshold: int = 5):
+        self.slowest = slowest
+        self.repeat_threshold = repeat_threshold
+        self.endpoints = {}
+        self._lock = Lock()
+
+    def init_app(self, app: Flask, engines):
+        self.repeat_threshold = app.config["QUERY_REPEAT_THRESHOLD"]
+        app.config.setdefault("QUERY_BUDGETS", {})
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self.before_execute)
+            event.listen(engine, "after_cursor_execute", self.after_execute)
+        app.before_request(self.start)
+        app.after_request(self.finish)
+        app.extensions["query_instrumentation"] = self
+
+    def start(self):
+        g.queries = RequestQueries()
+
+    def before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(perf_counter())
+
+    def after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = perf_counter() - conn.info["query_start"].pop()
+        # statements outside requests (commands, app start) are not recorded
+        if has_request_context():
+            if "queries" not in g:
+                g.queries = RequestQueries()
+            g.queries.add(statement, duration)
+
+    def finish(self, response):
+        queries = g.pop("queries", None)
+        if queries is None:
+            return response
+        endpoint = request.endpoint or "<unmatched>"
+        repeated = {
+            statement: count
+            for statement, count in queries.statements.items()
+            if count >= self.repeat_threshold
+        }
+        with self._lock:
+            if endpoint not in self.endpoints:
+                self.endpoints[endpoint] = EndpointQueries(self.slowest)
+            self.endpoints[endpoint].add(queries, repeated)
+        for statement, count in repeated.items():
+            self.logger.warning(
+                "Likely N+1 on %s: ran %d times in one request: %s",
+                endpoint,
+                count,
+                statement,
+            )
+        self.logger.debug(
+            "%s ran %d statements in %.1f ms.",
+            endpoint,
+            queries.count,
+            queries.time * 1000,
+        )
+        budget = app.config["QUERY_BUDGETS"].get(endpoint, app.config["QUERY_BUDGET"])
+        if budget is not None and queries.count > budget:
+            raise QueryBudgetExceeded(
+                f"{endpoint} ran {queries.count} statements, over its budget of "
+                f"{budget}!"
+            )
+        return response
+
+    def report(self):
+        """Return the statistics of every endpoint, busiest first."""
+        with self._lock:
+            endpoints = sorted(
+                self.endpoints.items(), key=lambda item: item[1].time, reverse=True
+            )
+            return {endpoint: queries.report() for endpoint, queries in endpoints}
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+
+
+query_instrumentation = QueryInstrumentation()
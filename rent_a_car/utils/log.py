@@ -0,0 +1,167 @@
+# flask-related
+from flask import Flask, g, has_request_context, request
+from flask.logging import default_handler
+
+# misc
+from atexit import register as at_exit
+from json import dumps
+from logging import Filter, Formatter, StreamHandler, makeLogRecord
+from logging.handlers import QueueHandler, QueueListener
+from os import register_at_fork
+from queue import SimpleQueue
+import re
+import sys
+from uuid import uuid4
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# a request id sent by a proxy is kept if it looks like one
+REQUEST_ID = re.compile(r"[\w.:-]{1,64}")
+SENSITIVE_FIELDS = ("password", "passwd", "secret", "token", "authorization")
+SENSITIVE_VALUE = re.compile(
+    rf"(?i)\b({'|'.join(SENSITIVE_FIELDS)})(['\"]?\s*[:=]\s*)(?:(['\"]).*?\3|[^\s,;&}}]+)"
+)
+REDACTED = "***"
+TEXT_FORMAT = "[%(asctime)s] %(levelname)s in %(module)s [%(request_id)s]: %(message)s"
+# every attribute a record has without `extra` fields
+RECORD_FIELDS = set(makeLogRecord({}).__dict__) | {"message", "asctime", "request_id"}
+
+
+class Lazy:
+    """A log argument computed only if the record is emitted, in the thread
+    logging it: `logger.debug("Tags: %s.", Lazy(lambda: model.tags))` does
+    not load the tags when debug is off."""
+
+    def __init__(self, function, *args):
+        self.function = function
+        self.args = args
+
+    def __str__(self):
+        return str(self.function(*self.args))
+
+    def __repr__(self):
+        return repr(self.function(*self.args))
+
+
+class RequestIdFilter(Filter):
+    def filter(self, record):
+        record.request_id = g.get("request_id", "-") if has_request_context() else "-"
+        return True
+
+
+def redact(match):
+    field, separator, quote = match.groups()
+    quote = quote or ""
+    return f"{field}{separator}{quote}{REDACTED}{quote}"
+
+
+class RedactFilter(Filter):
+    """Masks the values of sensitive fields (passwords, tokens...) in the
+    message and `extra` fields of a record."""
+
+    def filter(self, record):
+        record.msg = SENSITIVE_VALUE.sub(redact, record.getMessage())
+        record.args = None
+        for name in record.__dict__.keys() - RECORD_FIELDS:
+            if name.lower() in SENSITIVE_FIELDS:
+                setattr(record, name, REDACTED)
+        return True
+
+
+class JsonFormatter(Formatter):
+    """Formats a record as a JSON object, `extra` fields included."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", None),
+            "message": record.getMessage(),
+        }
+        for name in record.__dict__.keys() - RECORD_FIELDS:
+            entry[name] = getattr(record, name)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return dumps(entry, default=str)
+
+
+class LogQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # everything the writing thread gets is already a string, so that it
+        # never reads a model (and loads its relationships) itself
+        record = super().prepare(record)
+        for name in record.__dict__.keys() - RECORD_FIELDS:
+            value = getattr(record, name)
+            if not isinstance(value, (str, int, float, bool, type(None))):
+                setattr(record, name, str(value))
+        return record
+
+
+class LogQueue:
+    """Sends the records of `app.logger` (and of its children, such as
+    `rent_a_car.queries`) through a queue to a background thread writing
+    them, so a request thread never waits on I/O to log. Records are
+    tagged with the id of their request and have their sensitive fields
+    redacted before they leave the request thread.
+
+    Writes to stderr in LOG_FORMAT ("text" or "json") unless other handlers
+    are given with `set_handlers`."""
+
+    def __init__(self):
+        self.queue = SimpleQueue()
+        self.handler = LogQueueHandler(self.queue)
+        self.handler.addFilter(RequestIdFilter())
+        self.handler.addFilter(RedactFilter())
+        self.handlers = []
+        self._listener = None
+        register_at_fork(after_in_child=self._after_fork)
+        at_exit(self.stop)
+
+    def init_app(self, app: Flask):
+        stream = StreamHandler(sys.stderr)
+        if app.config["LOG_FORMAT"] == "json":
+            stream.setFormatter(JsonFormatter())
+        else:
+            stream.setFormatter(Formatter(TEXT_FORMAT))
+        app.logger.removeHandler(default_handler)
+        if self.handler not in app.logger.handlers:
+            app.logger.addHandler(self.handler)
+        app.logger.setLevel(app.config["LOG_LEVEL"])
+        self.set_handlers([stream])
+        app.before_request(self.start)
+        app.after_request(self.finish)
+        app.extensions["log_queue"] = self
+
+    def set_handlers(self, handlers: list):
+        self.stop()
+        self.handlers = list(handlers)
+        self._restart()
+
+    def stop(self):
+        if self._listener is not None:
+            # writes what is still queued
+            self._listener.stop()
+            self._listener = None
+
+    def _after_fork(self):
+        # the writing thread does not survive a fork
+        if self._listener is not None:
+            self._restart()
+
+    def _restart(self):
+        self._listener = QueueListener(
+            self.queue, *self.handlers, respect_handler_level=True
+        )
+        self._listener.start()
+
+    def start(self):
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        g.request_id = request_id if REQUEST_ID.fullmatch(request_id) else uuid4().hex
+
+    def finish(self, response):
+        if "request_id" in g:
+            response.headers[REQUEST_ID_HEADER] = g.request_id
+        return response
+
+
+log_queue = LogQueue()
@@ -0,0 +1,471 @@
+# flask-related
+from flask import Flask, g, request
+
+# misc
+from atexit import register as at_exit
+from bisect import bisect_left
+from contextlib import contextmanager
+from fcntl import LOCK_EX, LOCK_SH, flock
+from json import dump, load
+from math import inf
+from os import (
+    getpid,
+    kill,
+    listdir,
+    makedirs,
+    register_at_fork,
+    remove,
+    rename,
+    replace,
+)
+from os.path import join
+from sqlalchemy.pool import QueuePool
+from threading import Lock
+from time import monotonic, perf_counter, time_ns
+
+# the totals of the exited processes, and the lock taken to update it
+ARCHIVE = "archive.json"
+ARCHIVE_LOCK = "archive.lock"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def format_value(value):
+    if value == inf:
+        return "+Inf"
+    return str(value)
+
+
+def format_labels(labels: dict):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Metric:
+    """A metric of this process: a value per combination of label values.
+    Merging adds up the values of every process."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        self._lock = Lock()
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), value] for labels, value in self.values.items()]
+
+    def reset(self):
+        self.values = {}
+        self._lock = Lock()
+
+    def merge(self, snapshots: list):
+        """Add up the `(samples, live)` snapshots of every process."""
+        merged = {}
+        for samples, _ in snapshots:
+            for labels, value in samples:
+                labels = tuple(labels)
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+    def render(self, values: dict):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        for labels, value in sorted(values.items()):
+            labels = format_labels(dict(zip(self.labels, labels)))
+            yield f"{self.name}{labels} {format_value(value)}"
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def set(self, value: float, *labels):
+        # for totals counted elsewhere, and collected before each snapshot
+        with self._lock:
+            self.values[labels] = value
+
+
+class Gauge(Metric):
+    """A gauge of this process' state: only the processes still running
+    count when merging."""
+
+    type = "gauge"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self.values[labels] = value
+
+    def merge(self, snapshots: list):
+        return super().merge([snapshot for snapshot in snapshots if snapshot[1]])
+
+
+class Histogram(Metric):
+    """Observations counted in `buckets` (upper bounds), kept per labels as
+    the count of every bucket followed by the sum of the observations."""
+
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (inf,)
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                counts = self.values[labels] = [0] * len(self.buckets) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                [list(labels), list(counts)] for labels, counts in self.values.items()
+            ]
+
+    def merge(self, snapshots: list):
+        merged = {}
+        for samples, _ in snapshots:
+            for labels, counts in samples:
+                labels = tuple(labels)
+                if labels in merged:
+                    merged[labels] = [a + b for a, b in zip(merged[labels], counts)]
+                else:
+                    merged[labels] = counts
+        return merged
+
+    def render(self, values: dict):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        for labels, counts in sorted(values.items()):
+            labels = dict(zip(self.labels, labels))
+            total = 0
+            for bound, count in zip(self.buckets, counts):
+                total += count
+                bucket_labels = format_labels({**labels, "le": format_value(bound)})
+                yield f"{self.name}_bucket{bucket_labels} {total}"
+            yield f"{self.name}_sum{format_labels(labels)} {counts[-1]}"
+            yield f"{self.name}_count{format_labels(labels)} {total}"
+
+
+class MetricsRegistry:
+    """The metrics of the application, exposed in the Prometheus text format.
+
+    With a `directory`, each process writes its snapshot there (at most every
+    `flush_interval` seconds, and when it exits) and the exposition adds up
+    those of every process, so gunicorn workers report the same totals
+    whichever one is scraped. Whenever a process configures it, the counters
+    and histograms of the processes exited since are added to an archive and
+    their files removed, so the totals never go backwards."""
+
+    def __init__(self, prefix: str = "rent_a_car_"):
+        self.prefix = prefix
+        self.metrics = {}
+        self.collectors = []
+        self.directory = None
+        self.flush_interval = 1.0
+        self._next_flush = 0.0
+        self._path = None
+        self._flush_lock = Lock()
+        self._hooked = False
+
+    def _add(self, metric: Metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()):
+        return self._add(Counter(self.prefix + name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple = ()):
+        return self._add(Gauge(self.prefix + name, help, labels))
+
+    def histogram(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(self.prefix + name, help, labels, buckets))
+
+    def collector(self, function):
+        """Register `function` to update metrics before each snapshot."""
+        self.collectors.append(function)
+        return function
+
+    def snapshot(self):
+        for collect in self.collectors:
+            collect()
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def configure(self, directory: str = None, flush_interval: float = 1.0):
+        if directory != self.directory:
+            self._path = None
+        self.directory = directory
+        self.flush_interval = flush_interval
+        if directory:
+            makedirs(directory, exist_ok=True)
+            self.archive_exited()
+        if not self._hooked:
+            register_at_fork(after_in_child=self._after_fork)
+            at_exit(self.flush)
+            self._hooked = True
+
+    def archive_exited(self):
+        """Add the snapshots of the processes no longer running to the
+        archive, then remove their files."""
+        with self._locked(LOCK_EX):
+            snapshots, exited = [], []
+            for name in listdir(self.directory):
+                if name in (ARCHIVE, ARCHIVE_LOCK):
+                    continue
+                path = join(self.directory, name)
+                # archived `{pid}-{time}.json` files are never of a running process
+                pid = name.split(".")[0]
+                if path == self._path or (
+                    pid.isdigit() and int(pid) != getpid() and is_running(int(pid))
+                ):
+                    continue
+                if name.endswith(".json"):
+                    snapshot = self._load(path)
+                    if snapshot is not None:
+                        snapshots.append(snapshot)
+                exited.append(path)
+            if not exited:
+                return
+            archive = join(self.directory, ARCHIVE)
+            snapshots.append(self._load(archive) or {})
+            # gauges only count while their process runs, so they are left out
+            totals = {
+                name: [
+                    [list(labels), value]
+                    for labels, value in metric.merge(
+                        [(snapshot.get(name, []), False) for snapshot in snapshots]
+                    ).items()
+                ]
+                for name, metric in self.metrics.items()
+            }
+            with open(f"{archive}.tmp", "w") as file:
+                dump(totals, file)
+            replace(f"{archive}.tmp", archive)
+            for path in exited:
+                try:
+                    remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def maybe_flush(self):
+        if self.directory and monotonic() >= self._next_flush:
+            self.flush()
+
+    def flush(self):
+        if not self.directory:
+            return
+        # a thread flushing is enough
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_flush = monotonic() + self.flush_interval
+            path = self._get_path()
+            with open(f"{path}.tmp", "w") as file:
+                dump(self.snapshot(), file)
+            replace(f"{path}.tmp", path)
+        finally:
+            self._flush_lock.release()
+
+    def _get_path(self):
+        if self._path is None:
+            pid = getpid()
+            self._path = join(self.directory, f"{pid}.json")
+            # left by an exited process whose pid was reused: keep its totals
+            try:
+                rename(self._path, join(self.directory, f"{pid}-{time_ns()}.json"))
+            except FileNotFoundError:
+                pass
+        return self._path
+
+    def _after_fork(self):
+        # a new worker starts from zero, in its own file
+        for metric in self.metrics.values():
+            metric.reset()
+        self._path = None
+        self._next_flush = 0.0
+        self._flush_lock = Lock()
+
+    def read_snapshots(self):
+        """Return the `(snapshot, live)` of every process, `live` telling
+        whether it still runs."""
+        snapshots = []
+        # not while the files of exited processes move to the archive
+        with self._locked(LOCK_SH):
+            for name in listdir(self.directory):
+                if not name.endswith(".json"):
+                    continue
+                snapshot = self._load(join(self.directory, name))
+                if snapshot is None:
+                    continue
+                pid = name[: -len(".json")]
+                snapshots.append((snapshot, pid.isdigit() and is_running(int(pid))))
+        return snapshots
+
+    def _load(self, path: str):
+        try:
+            with open(path) as file:
+                return load(file)
+        except (OSError, ValueError):
+            return None
+
+    @contextmanager
+    def _locked(self, operation: int):
+        with open(join(self.directory, ARCHIVE_LOCK), "a") as file:
+            # released when the file closes
+            flock(file, operation)
+            yield
+
+    def collect(self):
+        """Return the values of every metric, added up over every process."""
+        if self.directory:
+            self.flush()
+            snapshots = self.read_snapshots()
+        else:
+            snapshots = [(self.snapshot(), True)]
+        return {
+            name: metric.merge(
+                [(snapshot.get(name, []), live) for snapshot, live in snapshots]
+            )
+            for name, metric in self.metrics.items()
+        }
+
+    def render(self, values: dict):
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.extend(metric.render(values.get(name, {})))
+        return "\n".join(lines) + "\n"
+
+
+def is_running(pid: int):
+    try:
+        kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetrics:
+    """Times every request per endpoint (`request.endpoint`, which is
+    `EndpointMixin.endpoint()` for the views) and collects the state of the
+    connection pools and caches of the application."""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self.requests = registry.counter(
+            "http_requests_total",
+            "Requests handled.",
+            ("endpoint", "method", "status"),
+        )
+        self.latency = registry.histogram(
+            "http_request_duration_seconds",
+            "Time taken to handle a request.",
+            ("endpoint",),
+        )
+        self.in_flight = registry.gauge(
+            "http_requests_in_flight", "Requests being handled."
+        )
+        self.pool_size = registry.gauge(
+            "db_pool_size", "Connections the pool keeps.", ("bind",)
+        )
+        self.pool_checked_out = registry.gauge(
+            "db_pool_checked_out", "Connections checked out of the pool.", ("bind",)
+        )
+        self.pool_overflow = registry.gauge(
+            "db_pool_overflow", "Connections opened past the pool size.", ("bind",)
+        )
+        self.cache_requests = registry.counter(
+            "cache_requests_total", "Cache reads, by result.", ("cache", "result")
+        )
+        self.cache_hit_ratio = registry.gauge(
+            "cache_hit_ratio", "Share of the cache reads that hit.", ("cache",)
+        )
+        self.engines = {}
+        self.caches = {}
+        registry.collector(self.collect)
+
+    def init_app(self, app: Flask, engines: dict, caches: dict):
+        """`caches` maps a name to a function returning the cache, which may
+        be replaced after this is called."""
+        self.engines = {bind or "default": engine for bind, engine in engines.items()}
+        self.caches = caches
+        self.registry.configure(
+            app.config["METRICS_DIR"], app.config["METRICS_FLUSH_INTERVAL"]
+        )
+        app.before_request(self.start)
+        app.after_request(self.record_status)
+        app.teardown_request(self.finish)
+        app.extensions["metrics"] = self
+
+    def start(self):
+        g.metrics_start = perf_counter()
+        self.in_flight.inc()
+
+    def record_status(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def finish(self, exception=None):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return
+        duration = perf_counter() - start
+        self.in_flight.dec()
+        endpoint = request.endpoint or "<unmatched>"
+        status = 500 if exception else g.pop("metrics_status", 500)
+        self.requests.inc(endpoint, request.method, str(status))
+        self.latency.observe(duration, endpoint)
+        self.registry.maybe_flush()
+
+    def collect(self):
+        for bind, engine in self.engines.items():
+            if isinstance(engine.pool, QueuePool):
+                self.pool_size.set(engine.pool.size(), bind)
+                self.pool_checked_out.set(engine.pool.checkedout(), bind)
+                # negative while the pool is not full yet
+                self.pool_overflow.set(max(0, engine.pool.overflow()), bind)
+        for name, get_cache in self.caches.items():
+            cache = get_cache()
+            self.cache_requests.set(getattr(cache, "hits", 0), name, "hit")
+            self.cache_requests.set(getattr(cache, "misses", 0), name, "miss")
+
+    def expose(self):
+        """Return every metric in the Prometheus text format."""
+        values = self.registry.collect()
+        # ratios of the totals, which cannot be added up over processes
+        requests = values[self.cache_requests.name]
+        values[self.cache_hit_ratio.name] = {
+            (name,): requests.get((name, "hit"), 0)
+            / (requests.get((name, "hit"), 0) + requests.get((name, "miss"), 0))
+            for name in self.caches
+            if requests.get((name, "hit"), 0) + requests.get((name, "miss"), 0)
+        }
+        return self.registry.render(values)
+
+
+metrics = RequestMetrics(registry)
@@ -1,4 +1,4 @@
-from flask import url_for
+from flask import request, url_for
 
 
 def NAV_CATEGORIES():
@@ -13,6 +13,14 @@ def NAV_MODELS():
     return (url_for("model.Models"), "Models")
 
 
+def NAV_RENT():
+    return (url_for("reservation.Availability"), "Rent a car")
+
+
+def NAV_RESERVATIONS():
+    return (url_for("reservation.Reservations"), "Reservations")
+
+
 def NAV_STORES():
     return (url_for("store.Stores"), "Stores")
 
@@ -44,6 +52,7 @@ def NAV_REGISTER_FRANCHISEE():
 def get_nav_by_user(user):
     if user.is_anonymous:
         return [
+            NAV_RENT(),
             NAV_STORES(),
             NAV_CATEGORIES(),
             NAV_MODELS(),
@@ -60,6 +69,7 @@ def get_nav_by_user(user):
             NAV_MODELS(),
             NAV_TAGS(),
             NAV_VEHICLES(),
+            NAV_RESERVATIONS(),
         ]
     elif user.is_franchisee():
         return [
@@ -69,12 +79,30 @@ def get_nav_by_user(user):
             NAV_MODELS(),
             NAV_TAGS(),
             NAV_VEHICLES(),
+            NAV_RESERVATIONS(),
         ]
     elif user.is_client():
         return [
+            NAV_RENT(),
+            NAV_RESERVATIONS(),
             NAV_STORES(),
             NAV_CATEGORIES(),
             NAV_MODELS(),
         ]
     else:
         return []
+
+
+def get_page_nav(page):
+    args = dict(request.view_args)
+    # keep the other query arguments (limit, fields...) across pages
+    args.update((k, v) for k, v in request.args.items() if k != "after")
+    prev_args = {"after": page.prev_after} if page.prev_after else {}
+    return {
+        "prev": url_for(request.endpoint, **args, **prev_args)
+        if page.has_prev
+        else None,
+        "next": url_for(request.endpoint, **args, after=page.next_after)
+        if page.next_after
+        else None,
+    }
@@ -0,0 +1,104 @@
+# project-related
+from .metrics import registry
+
+# misc
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from multiprocessing import get_context
+from passlib.hash import pbkdf2_sha256
+from threading import Lock
+from time import perf_counter
+
+HASH_SECONDS = registry.histogram(
+    "password_hash_seconds",
+    "Time taken to hash or verify a password.",
+    ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+@lru_cache
+def _handler(rounds: int):
+    return pbkdf2_sha256.using(rounds=rounds)
+
+
+def _hash(password: str, rounds: int):
+    return _handler(rounds).hash(password)
+
+
+def _verify(password: str, hash: str):
+    return pbkdf2_sha256.verify(password, hash)
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords with pbkdf2_sha256. With `workers` set,
+    the work runs in a pool of processes, so a request thread waiting on it
+    does not hold the GIL the other requests need; with no workers, or if
+    the pool breaks, it runs in the calling thread.
+
+    `rounds` maps a role (or None, the default) to its hash cost."""
+
+    def __init__(self, workers: int = 0, rounds: dict = None):
+        self.workers = workers
+        self.rounds = {None: pbkdf2_sha256.default_rounds, **(rounds or {})}
+        self._pool = None
+        self._lock = Lock()
+
+    def configure(self, workers: int = 0, rounds: dict = None):
+        self.shutdown()
+        self.workers = workers
+        self.rounds.update(rounds or {})
+
+    def get_rounds(self, role=None):
+        return self.rounds.get(role, self.rounds[None])
+
+    def hash(self, password: str, role=None):
+        start = perf_counter()
+        try:
+            return self._run(_hash, password, self.get_rounds(role))
+        finally:
+            HASH_SECONDS.observe(perf_counter() - start, "hash")
+
+    def verify(self, password: str, hash: str):
+        start = perf_counter()
+        try:
+            return self._run(_verify, password, hash)
+        finally:
+            HASH_SECONDS.observe(perf_counter() - start, "verify")
+
+    def needs_update(self, hash: str, role=None):
+        """Tell whether `hash` was made with other parameters than the ones
+        now configured for `role`."""
+        return _handler(self.get_rounds(role)).needs_update(hash)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    def _run(self, function, *args):
+        pool = self._get_pool()
+        if pool is None:
+            return function(*args)
+        try:
+            return pool.submit(function, *args).result()
+        except BrokenProcessPool:
+            # a worker died; fall back to hashing here until a new pool starts
+            self.shutdown()
+            return function(*args)
+
+    def _get_pool(self):
+        if not self.workers:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # spawned, since forking a threaded server can copy held locks
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=get_context("spawn")
+                )
+            return self._pool
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,173 @@
+# flask-related
+from flask import Flask, g, request
+from flask_login import current_user
+
+# misc
+from collections import Counter
+from datetime import datetime
+from os import listdir, makedirs, remove
+from os.path import isdir, join
+from random import random
+from sys import _current_frames, path as sys_path
+from threading import Event, Thread, get_ident
+from time import perf_counter
+
+# name of the query argument profiling a request, for admins
+PROFILE_ARG = "__profile"
+
+
+def get_location(code):
+    """Name a function by its file, relative to the import path it was found
+    in, and first line."""
+    filename = code.co_filename
+    for root in sorted(filter(None, sys_path), key=len, reverse=True):
+        if filename.startswith(root):
+            filename = filename[len(root) :].lstrip("/\\")
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples the call stack of one thread every `interval` seconds from a
+    background thread. The profiled thread runs untouched; the sampler only
+    competes with it for the GIL while walking its frames, which also means
+    it samples at most every `sys.getswitchinterval()` seconds."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.duration = 0.0
+        self._stop = Event()
+        self._thread = Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._start = perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = perf_counter() - self._start
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = _current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            # the last one may catch the profiled thread stopping the sampler
+            if stack and not self._stop.is_set():
+                self.samples[tuple(reversed(stack))] += 1
+
+    def call_tree(self, min_share: float = 0.005):
+        """Return the lines of the call tree, every function with the share
+        of the samples it was on the stack in, leaving out those below
+        `min_share`."""
+        total = sum(self.samples.values())
+        root = {}
+        for stack, count in self.samples.items():
+            node = root
+            for code in stack:
+                child = node.setdefault(code, [0, {}])
+                child[0] += count
+                node = child[1]
+        lines = []
+
+        def walk(children, depth):
+            for code, (count, grandchildren) in sorted(
+                children.items(), key=lambda item: item[1][0], reverse=True
+            ):
+                if count / total < min_share:
+                    break
+                share = f"{count / total:6.1%} {count:6d}"
+                lines.append(f"{'  ' * depth}{share}  {get_location(code)}")
+                walk(grandchildren, depth + 1)
+
+        walk(root, 0)
+        return lines
+
+
+class RequestProfiler:
+    """Profiles the requests of admins asking for it with `?__profile=1`,
+    and a `sample_rate` share of all requests, saving the call tree of each
+    to `directory`, where only the latest `keep` are kept."""
+
+    def __init__(self):
+        self.directory = None
+        self.sample_rate = 0.0
+        self.interval = 0.005
+        self.keep = 100
+
+    def init_app(self, app: Flask):
+        self.directory = app.config["PROFILE_DIR"]
+        self.sample_rate = app.config["PROFILE_SAMPLE_RATE"]
+        self.interval = app.config["PROFILE_INTERVAL"]
+        self.keep = app.config["PROFILE_KEEP"]
+        app.before_request(self.start)
+        app.teardown_request(self.finish)
+        app.extensions["profiler"] = self
+
+    def is_requested(self):
+        if self.sample_rate and random() < self.sample_rate:
+            return True
+        return (
+            request.args.get(PROFILE_ARG) == "1"
+            and current_user.is_authenticated
+            and current_user.is_admin()
+        )
+
+    def start(self):
+        if self.is_requested():
+            g.profiler = SamplingProfiler(get_ident(), self.interval).start()
+
+    def finish(self, exception=None):
+        # after the response was built, or streamed
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return
+        profiler.stop()
+        self.save(profiler, request.endpoint or "unmatched", request.full_path)
+
+    def save(self, profiler: SamplingProfiler, endpoint: str, path: str):
+        name = (
+            f"{datetime.now():%Y%m%d-%H%M%S-%f}_{endpoint}_"
+            f"{profiler.duration * 1000:.0f}ms.txt"
+        )
+        header = [
+            f"{request.method} {path}",
+            f"endpoint: {endpoint}",
+            f"duration: {profiler.duration * 1000:.1f} ms",
+            f"samples: {sum(profiler.samples.values())}, "
+            f"every {self.interval * 1000:g} ms",
+            "",
+        ]
+        makedirs(self.directory, exist_ok=True)
+        with open(join(self.directory, name), "w") as file:
+            file.write("\n".join(header + profiler.call_tree()) + "\n")
+        for old in self.get_names()[self.keep :]:
+            try:
+                remove(join(self.directory, old))
+            except FileNotFoundError:
+                pass
+
+    def get_names(self):
+        """Return the names of the saved profiles, latest first."""
+        if not isdir(self.directory):
+            return []
+        return sorted(
+            (name for name in listdir(self.directory) if name.endswith(".txt")),
+            reverse=True,
+        )
+
+
+def parse_profile_name(name: str):
+    """Return the time, endpoint and duration a profile's name holds."""
+    time, rest = name[: -len(".txt")].split("_", 1)
+    endpoint, duration = rest.rsplit("_", 1)
+    return datetime.strptime(time, "%Y%m%d-%H%M%S-%f"), endpoint, duration
+
+
+request_profiler = RequestProfiler()
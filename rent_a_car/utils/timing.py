@@ -0,0 +1,126 @@
+# flask-related
+from flask import (
+    Flask,
+    before_render_template,
+    g,
+    has_request_context,
+    template_rendered,
+)
+
+# misc
+from contextlib import contextmanager
+from sqlalchemy import event
+from time import perf_counter
+
+
+class RequestTiming:
+    """The time one request spent in each segment. A segment entered again
+    before it was left (a schema dumping nested ones, a template rendering
+    cached fragments) is only timed once."""
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.durations = {"db": 0.0, "serialize": 0.0, "render": 0.0}
+        self.queries = 0
+        self._depths = dict.fromkeys(self.durations, 0)
+        self._starts = {}
+
+    def enter(self, segment: str):
+        if not self._depths[segment]:
+            self._starts[segment] = perf_counter()
+        self._depths[segment] += 1
+
+    def leave(self, segment: str):
+        self._depths[segment] -= 1
+        if not self._depths[segment]:
+            self.durations[segment] += perf_counter() - self._starts.pop(segment)
+
+    def is_in(self, segment: str):
+        return bool(self._depths[segment])
+
+    def header(self):
+        total = perf_counter() - self.start
+        metrics = [
+            f'db;desc="{self.queries} queries";dur={self.durations["db"] * 1000:.1f}',
+            f"serialize;dur={self.durations['serialize'] * 1000:.1f}",
+            f"render;dur={self.durations['render'] * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ]
+        return ", ".join(metrics)
+
+
+def get_timing():
+    return g.get("timing") if has_request_context() else None
+
+
+class ServerTiming:
+    """Adds a Server-Timing header to every response, breaking its time down
+    into the statements run (`db`), the marshmallow dumps the views time with
+    `timed("serialize")`, the Jinja rendering (`render`) and the whole
+    request (`total`), for browser devtools to show. Segments overlap: lazy
+    loads while rendering count in both `db` and `render`."""
+
+    def init_app(self, app: Flask, engines):
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self.before_execute)
+            event.listen(engine, "after_cursor_execute", self.after_execute)
+            event.listen(engine, "handle_error", self.on_error)
+        before_render_template.connect(self.before_render, app)
+        template_rendered.connect(self.after_render, app)
+        app.before_request(self.start)
+        app.after_request(self.finish)
+        app.extensions["server_timing"] = self
+
+    def start(self):
+        g.timing = RequestTiming()
+
+    def before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        timing = get_timing()
+        if timing is not None:
+            timing.queries += 1
+            timing.enter("db")
+
+    def after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        timing = get_timing()
+        if timing is not None:
+            timing.leave("db")
+
+    def on_error(self, context):
+        # a failed statement does not reach after_cursor_execute
+        timing = get_timing()
+        if timing is not None and timing.is_in("db"):
+            timing.leave("db")
+
+    def before_render(self, app, template, context, **extra):
+        timing = get_timing()
+        if timing is not None:
+            timing.enter("render")
+
+    def after_render(self, app, template, context, **extra):
+        timing = get_timing()
+        if timing is not None:
+            timing.leave("render")
+
+    def finish(self, response):
+        timing = g.pop("timing", None)
+        if timing is not None:
+            response.headers["Server-Timing"] = timing.header()
+        return response
+
+
+@contextmanager
+def timed(segment: str):
+    """Count the time spent in the block in `segment`, when the request is
+    timed."""
+    timing = get_timing()
+    if timing is None:
+        yield
+        return
+    timing.enter(segment)
+    try:
+        yield
+    finally:
+        timing.leave(segment)
+
+
+server_timing = ServerTiming()
@@ -1,31 +1,48 @@
 # flask-related
-from flask import current_app as app, abort, flash, redirect, render_template, url_for
+from flask import (
+    current_app as app,
+    abort,
+    flash,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
 from flask.views import MethodView
 from flask_login import current_user, login_required
 from flask_smorest import Blueprint
 
 # project-related
 from .factory import EndpointMixinFactory
-from .schemas import VehicleSchema, VehicleSchemaNested
+from .schemas import ExportSchema, PageSchema, VehicleSchema, VehicleSchemaNested
 from .services import (
-    model_service,
-    store_service,
+    lookup_service,
     vehicle_service,
     DuplicateVehicleError,
 )
 from .user import login_as_franchisee_required
+from .utils.export import export_response
 from .utils.nav import *
+from .utils.timing import timed
 
 
 # misc
-from marshmallow import Schema, INCLUDE
+from csv import DictReader
+from io import StringIO
+from marshmallow import Schema, INCLUDE, ValidationError
 from urllib.parse import unquote
 
+UPLOAD_COLUMNS = ["plate", "model_id", "year", "store_id"]
+
 
 def NAV_CREATE_VEHICLE():
     return (url_for(str(Vehicle())), "Create Vehicle")
 
 
+def NAV_UPLOAD_VEHICLES():
+    return (url_for(str(VehicleUpload())), "Upload Vehicles")
+
+
 blp = Blueprint("vehicle", __name__, url_prefix="/vehicle")
 
 
@@ -53,7 +70,7 @@ class Vehicle(MethodView, EndpointMixin):
     @blp.arguments(VehicleSchema, location="form")
     def post(self, vehicle):
         app.logger.info(f"Creating {self.blp.name}.")
-        app.logger.debug(f"{self.blp.name.capitalize()} info: {vehicle}.")
+        app.logger.debug("%s info: %s.", self.blp.name.capitalize(), vehicle)
         nav = get_nav_by_user(current_user)
         try:
             vehicle = vehicle_service.create(**vehicle)
@@ -101,15 +118,18 @@ class Vehicle(MethodView, EndpointMixin):
 @blp.route("/all")
 class Vehicles(MethodView, EndpointMixin):
     @login_required
-    def get(self):
+    @blp.arguments(PageSchema, location="query", as_kwargs=True)
+    def get(self, **kwargs):
         if current_user.is_admin():
-            vehicles = vehicle_service.get_all()
+            vehicles = vehicle_service.get_page(profile="list", **kwargs)
         else:
-            vehicles = vehicle_service.get_owned_by(current_user.id)
-        app.logger.debug(vehicles)
+            vehicles = vehicle_service.get_owned_page(
+                current_user.id, profile="list", **kwargs
+            )
+        app.logger.debug("Listing %d vehicles.", len(vehicles))
         nav = get_nav_by_user(current_user)
         if current_user.is_franchisee():
-            nav = [NAV_CREATE_VEHICLE()] + nav
+            nav = [NAV_CREATE_VEHICLE(), NAV_UPLOAD_VEHICLES()] + nav
         nav.remove(NAV_VEHICLES())
         return render_template(
             "generic/all.html",
@@ -137,6 +157,89 @@ class Vehicles(MethodView, EndpointMixin):
                     for vehicle in vehicles
                 ],
                 "pics": ["picture"],
+                "page": get_page_nav(vehicles),
+            },
+        )
+
+
+@blp.route("/export")
+class VehicleExport(MethodView, EndpointMixin):
+    @login_required
+    @blp.arguments(ExportSchema, location="query", as_kwargs=True)
+    def get(self, format):
+        app.logger.info(f"Exporting {self.blp.name}s as {format}.")
+        if current_user.is_admin():
+            rows = vehicle_service.stream()
+        else:
+            rows = vehicle_service.stream_owned_by(current_user.id)
+        return export_response("vehicles", vehicle_service.export_fields, rows, format)
+
+
+@blp.route("/upload")
+class VehicleUpload(MethodView, EndpointMixin):
+    @login_required
+    @login_as_franchisee_required
+    def get(self):
+        nav = get_nav_by_user(current_user)
+        return render_template(
+            "generic/upload.html",
+            title="Upload Vehicles",
+            submit="Upload",
+            nav=nav,
+            columns=UPLOAD_COLUMNS,
+        )
+
+    @login_required
+    @login_as_franchisee_required
+    def post(self):
+        app.logger.info(f"Uploading {self.blp.name}s for user {current_user.email!r}.")
+        file = request.files.get("file")
+        if file and file.filename:
+            rows = file.read().decode("utf-8-sig")
+        else:
+            rows = request.form.get("rows", "")
+        lines, vehicles, errors = load_vehicles(rows)
+        nav = get_nav_by_user(current_user)
+        try:
+            created, duplicates = vehicle_service.create_many(vehicles)
+        except Exception as e:
+            app.logger.error(e)
+            flash(
+                f"An unexpected error {type(e).__name__!r} happened! Details: {e.__cause__}",
+                "error",
+            )
+            return (
+                render_template(
+                    "generic/upload.html",
+                    title="Upload Vehicles",
+                    submit="Upload",
+                    nav=nav,
+                    columns=UPLOAD_COLUMNS,
+                    rows=rows,
+                ),
+                500,
+            )
+        errors.update({lines[index]: error for index, error in duplicates.items()})
+        app.logger.info(
+            f"Created {created} {self.blp.name}s, skipped {len(errors)} rows."
+        )
+        if not errors:
+            flash(f"{created} vehicles created!")
+            return redirect(url_for(str(Vehicles())))
+        flash(f"{created} vehicles created, {len(errors)} rows skipped!", "warning")
+        return render_template(
+            "generic/upload.html",
+            title="Upload Vehicles",
+            submit="Upload",
+            nav=nav,
+            columns=UPLOAD_COLUMNS,
+            table={
+                "name": "errors",
+                "headers": ["line", "error"],
+                "rows": [
+                    {"line": line, "error": errors[line]} for line in sorted(errors)
+                ],
+                "refs": [{} for _ in errors],
             },
         )
 
@@ -147,17 +250,19 @@ class VehicleId(MethodView, EndpointMixin):
     @blp.arguments(Schema, location="query", as_kwargs=True, unknown=INCLUDE)
     def get(self, vehicle_id, **kwargs):
         app.logger.info(f"Fetching {self.blp.name} #{vehicle_id}.")
-        vehicle = vehicle_service.get(vehicle_id)
+        vehicle = vehicle_service.get(vehicle_id, profile="list")
         if vehicle:
             nav = get_nav_by_user(current_user)
+            with timed("serialize"):
+                info = VehicleSchemaNested().dump(vehicle)
             return render_template(
                 "generic/view.html",
                 title=vehicle.plate,
                 submit="Update",
                 nav=nav,
                 schema=VehicleSchema,
-                info=VehicleSchemaNested().dump(vehicle),
-                is_owner=current_user.id == vehicle.store.owner_id,
+                info=info,
+                is_owner=current_user.owns_store(vehicle.store_id),
                 update="edit" in kwargs,
                 map=get_map(),
             )
@@ -172,11 +277,11 @@ class VehicleId(MethodView, EndpointMixin):
     @blp.arguments(VehicleSchema, location="form")
     def post(self, vehicle_info, vehicle_id):
         app.logger.info(f"Updating {self.blp.name} #{vehicle_id}.")
-        app.logger.debug(f"{self.blp.name.capitalize()} data: {vehicle_info}.")
+        app.logger.debug("%s data: %s.", self.blp.name.capitalize(), vehicle_info)
         vehicle = vehicle_service.get(vehicle_id)
         if not vehicle:
             abort(404)
-        if current_user.id != vehicle.store.owner_id:
+        if not current_user.owns_store(vehicle.store_id):
             abort(403)
         try:
             vehicle = vehicle_service.update(vehicle_id, **vehicle_info)
@@ -212,23 +317,41 @@ def get_map():
         "model_id": {
             "name": "model",
             "url": unquote(url_for("model.ModelId", model_id={})),
-            "options": (
-                {
-                    "value": model.id,
-                    "name": model.name,
-                }
-                for model in model_service.get_all()
-            ),
+            "options": lookup_service.options("model"),
         },
         "store_id": {
             "name": "store",
             "url": unquote(url_for("store.StoreId", store_id={})),
-            "options": (
-                {
-                    "value": store.id,
-                    "name": store.name,
-                }
-                for store in store_service.get_owned_by(current_user.id)
-            ),
+            # the principal already knows which stores the user owns
+            "options": lookup_service.options("store", current_user.store_ids),
         },
     }
+
+
+def load_vehicles(rows: str):
+    """Validate the CSV `rows` of an upload. Return the line of each valid
+    vehicle, the vehicles themselves and a `{line: error}` dict of the rest."""
+    lines, vehicles, errors = [], [], {}
+    reader = DictReader(StringIO(rows.strip()), fieldnames=UPLOAD_COLUMNS)
+    schema = VehicleSchema()
+    model_ids = lookup_service.get("model")
+    for line, row in enumerate(reader, start=1):
+        if line == 1 and row["plate"] == "plate":
+            continue
+        try:
+            vehicle = schema.load({k: v for k, v in row.items() if k in UPLOAD_COLUMNS})
+        except ValidationError as e:
+            errors[line] = "; ".join(
+                f"{field}: {' '.join(messages)}"
+                for field, messages in e.normalized_messages().items()
+            )
+            continue
+        if not current_user.owns_store(vehicle["store_id"]):
+            errors[line] = f"Store #{vehicle['store_id']} is not yours!"
+            continue
+        if vehicle["model_id"] not in model_ids:
+            errors[line] = f"Model #{vehicle['model_id']} does not exist!"
+            continue
+        lines.append(line)
+        vehicles.append(vehicle)
+    return lines, vehicles, errors
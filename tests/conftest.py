@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+os.environ["DB_URL"] = "sqlite:///:memory:"
+os.environ["DB_FAMILY"] = "sqlite"
+
+from rent_a_car import create_app
+from rent_a_car.db import db
+from rent_a_car.models import UserRole
+from rent_a_car.services import (
+    category_service,
+    make_service,
+    model_service,
+    store_service,
+    tag_service,
+    user_service,
+    vehicle_service,
+)
+
+# enough rows that a statement per row shows in the query counts
+ROWS = 20
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The application, on an in-memory database holding ROWS makes,
+    categories, stores (all the franchisee's), models and vehicles (#i in
+    store #i), an admin, a franchisee and a client."""
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        user_service.create(UserRole.ADMIN, "admin@example.com", "password", "Admin")
+        franchisee = user_service.register_franchisee(
+            "franchisee@example.com", "password", "Franchisee"
+        )
+        user_service.register_client("client@example.com", "password", "Client")
+        tags = [tag_service.create(f"Tag{i}") for i in range(3)]
+        for i in range(ROWS):
+            make_service.create(f"Make{i}")
+            category_service.create(f"Category{i}", 100.0 + i)
+            store_service.create(franchisee.id, f"Store{i}", f"Address {i}")
+        for i in range(ROWS):
+            model = model_service.create(f"Model{i}", make_id=i + 1, category_id=i + 1)
+            model_service.add_tags(model.id, tags[: i % 3 + 1])
+            vehicle_service.create(
+                f"ABC-{i % 10}D{i:02d}", model_id=model.id, year=2022, store_id=i + 1
+            )
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def get_client(app):
+    def get_client(email=None):
+        """Return a test client, logged in as `email` if given."""
+        client = app.test_client()
+        if email is not None:
+            response = client.post(
+                "/user/login", data={"email": email, "password": "password"}
+            )
+            assert response.status_code == 302
+        return client
+
+    return get_client
@@ -0,0 +1,47 @@
+from rent_a_car.db import db
+from rent_a_car.models import ModelModel, VehicleModel
+from rent_a_car.services import lookup_service, vehicle_service, version_service
+
+UPLOAD = "plate,model_id,year,store_id\n{plate},{model_id},2022,1"
+
+
+def write_elsewhere(statement):
+    # what the service of another process does: write, then bump the version
+    db.session.execute(statement)
+    db.session.commit()
+    version_service.bump("model")
+
+
+def test_models_written_elsewhere(app, get_client):
+    client = get_client("franchisee@example.com")
+    with app.test_request_context():
+        assert "Wallaby" not in lookup_service.get("model").values()
+        write_elsewhere(
+            db.insert(ModelModel).values(name="Wallaby", make_id=1, category_id=1)
+        )
+        model_id = db.session.scalar(
+            db.select(ModelModel.id).where(ModelModel.name == "Wallaby")
+        )
+    try:
+        # created elsewhere, the model is accepted
+        response = client.post(
+            "/vehicle/upload",
+            data={"rows": UPLOAD.format(plate="WAL-1A01", model_id=model_id)},
+        )
+        assert response.status_code == 302
+        with app.test_request_context():
+            vehicle_id = db.session.scalar(
+                db.select(VehicleModel.id).where(VehicleModel.plate == "WAL-1A01")
+            )
+            vehicle_service.delete(vehicle_id)
+            write_elsewhere(db.delete(ModelModel).where(ModelModel.id == model_id))
+        # deleted elsewhere, it is reported on its line
+        response = client.post(
+            "/vehicle/upload",
+            data={"rows": UPLOAD.format(plate="WAL-1A02", model_id=model_id)},
+        )
+        assert response.status_code == 200
+        assert f"Model #{model_id} does not exist!" in response.text
+    finally:
+        with app.test_request_context():
+            write_elsewhere(db.delete(ModelModel).where(ModelModel.id == model_id))
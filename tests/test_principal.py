@@ -0,0 +1,55 @@
+from rent_a_car.db import db
+from rent_a_car.models import StoreModel, UserModel, UserRole
+from rent_a_car.services import principal_service, user_service, version_service
+
+
+def other_process_writes(statement, entity):
+    # what the service of another process does: write, then bump the version
+    db.session.execute(statement)
+    db.session.commit()
+    version_service.bump(entity)
+
+
+def test_role_change_elsewhere(app):
+    with app.test_request_context():
+        user_id = user_service.get_by_email("admin@example.com").id
+        assert principal_service.get(user_id).is_admin()
+        other_process_writes(
+            db.update(UserModel)
+            .where(UserModel.id == user_id)
+            .values(role=UserRole.CLIENT),
+            "user",
+        )
+    try:
+        with app.test_request_context():
+            assert not principal_service.get(user_id).is_admin()
+    finally:
+        with app.test_request_context():
+            other_process_writes(
+                db.update(UserModel)
+                .where(UserModel.id == user_id)
+                .values(role=UserRole.ADMIN),
+                "user",
+            )
+
+
+def test_store_lost_elsewhere(app):
+    with app.test_request_context():
+        user_id = user_service.get_by_email("franchisee@example.com").id
+        assert principal_service.get(user_id).owns_store(1)
+        admin_id = user_service.get_by_email("admin@example.com").id
+        other_process_writes(
+            db.update(StoreModel).where(StoreModel.id == 1).values(owner_id=admin_id),
+            "store",
+        )
+    try:
+        with app.test_request_context():
+            assert not principal_service.get(user_id).owns_store(1)
+    finally:
+        with app.test_request_context():
+            other_process_writes(
+                db.update(StoreModel)
+                .where(StoreModel.id == 1)
+                .values(owner_id=user_id),
+                "store",
+            )
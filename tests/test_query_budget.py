@@ -0,0 +1,55 @@
+import pytest
+
+from rent_a_car.utils.instrumentation import QueryBudgetExceeded
+
+# far below the rows of each table (see conftest.ROWS)
+QUERY_BUDGET = 4
+
+
+@pytest.fixture(autouse=True)
+def budget(app):
+    app.config["QUERY_BUDGET"] = QUERY_BUDGET
+    yield
+    app.config["QUERY_BUDGET"] = None
+
+
+@pytest.mark.parametrize(
+    "email, url",
+    [
+        (None, "/store/all"),
+        (None, "/category/all"),
+        (None, "/make/all"),
+        (None, "/model/all"),
+        (None, "/api/v1/models?include=make,tags"),
+        ("admin@example.com", "/user/all"),
+        ("admin@example.com", "/tag/all"),
+        ("admin@example.com", "/vehicle/all"),
+        ("franchisee@example.com", "/vehicle/all"),
+        ("franchisee@example.com", "/store/all"),
+    ],
+)
+def test_listing_within_budget(get_client, email, url):
+    # over its budget, a request raises QueryBudgetExceeded
+    response = get_client(email).get(url)
+    assert response.status_code == 200
+
+
+def test_budget_exceeded(app, get_client):
+    app.config["QUERY_BUDGETS"]["make.Makes"] = 0
+    try:
+        with pytest.raises(QueryBudgetExceeded):
+            get_client().get("/make/all")
+    finally:
+        del app.config["QUERY_BUDGETS"]["make.Makes"]
+
+
+def test_report(get_client):
+    client = get_client("admin@example.com")
+    client.get("/model/all")
+    response = client.get("/admin/queries")
+    assert response.status_code == 200
+    assert "model.Models" in response.text
+    response = client.get("/admin/queries/model.Models")
+    assert response.json["requests"] >= 1
+    assert response.json["max_queries"] <= QUERY_BUDGET
+    assert get_client().get("/admin/queries").status_code != 200
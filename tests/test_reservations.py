@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from marshmallow import ValidationError
+
+from rent_a_car.schemas import ReservationSchema
+from rent_a_car.services import reservation_service, user_service
+from rent_a_car.services.reservation import UnavailableVehicleError
+
+DAY = datetime(2031, 3, 10)
+
+
+def at(hour: int):
+    return DAY + timedelta(hours=hour)
+
+
+@pytest.fixture
+def reserve(app):
+    """Reserve a vehicle for the client, from `pickup` to `return_` hours of
+    DAY. Every reservation is deleted after the test."""
+    ids = []
+
+    def reserve(vehicle_id: int, pickup: int, return_: int):
+        user = user_service.get_by_email("client@example.com")
+        reservation = reservation_service.create(
+            user.id, vehicle_id, at(pickup), at(return_)
+        )
+        ids.append(reservation.id)
+        return reservation
+
+    with app.app_context():
+        yield reserve
+        for id in ids:
+            reservation_service.delete(id)
+
+
+def test_back_to_back(reserve):
+    reserve(1, 10, 12)
+    # the next one picks the vehicle up as it is returned
+    reserve(1, 12, 14)
+    reserve(1, 8, 10)
+
+
+@pytest.mark.parametrize(
+    "pickup, return_",
+    [(10, 12), (11, 13), (9, 11), (10, 11), (9, 13)],
+    ids=["same", "ends-after", "starts-before", "inside", "around"],
+)
+def test_overlap_rejected(reserve, pickup, return_):
+    reserve(2, 10, 12)
+    with pytest.raises(UnavailableVehicleError):
+        reserve(2, pickup, return_)
+
+
+def test_other_vehicle_not_affected(reserve):
+    reserve(3, 10, 12)
+    reserve(4, 10, 12)
+
+
+def test_is_available(reserve):
+    reserve(5, 10, 12)
+    assert not reservation_service.is_available(5, at(11), at(13))
+    assert reservation_service.is_available(5, at(12), at(13))
+    assert reservation_service.is_available(5, at(8), at(10))
+
+
+def test_available_page(reserve):
+    reserve(6, 10, 12)
+    # vehicle #i is the only one of store #i
+    assert not reservation_service.get_available_page(6, at(11), at(13)).entries
+    assert reservation_service.get_available_page(6, at(12), at(13)).entries
+
+
+def test_offset_converted_to_local_time():
+    schema = ReservationSchema()
+    pickup = "2031-03-10T10:00:00+02:00"
+    data = schema.load(
+        {"vehicle_id": 1, "pickup_at": pickup, "return_at": "2031-03-10T12:00:00Z"}
+    )
+    expected = datetime.fromisoformat(pickup).astimezone().replace(tzinfo=None)
+    assert data["pickup_at"] == expected
+    assert data["pickup_at"].tzinfo is None
+    assert data["return_at"].tzinfo is None
+
+
+@pytest.mark.parametrize(
+    "pickup, return_, field",
+    [
+        ("2020-01-01T10:00:00+00:00", "2031-01-01T10:00:00", "pickup_at"),
+        ("2031-01-01T10:00:00", "2031-01-02T10:00:00+00:00", None),
+        ("2031-01-01T12:00:00+02:00", "2031-01-01T10:00:00+02:00", "return_at"),
+    ],
+    ids=["past", "mixed", "reversed"],
+)
+def test_offset_validated(pickup, return_, field):
+    data = {"vehicle_id": 1, "pickup_at": pickup, "return_at": return_}
+    if field is None:
+        ReservationSchema().load(data)
+        return
+    with pytest.raises(ValidationError) as error:
+        ReservationSchema().load(data)
+    assert field in error.value.messages
+
+
+def test_overlap_across_offsets(app, get_client):
+    client = get_client("client@example.com")
+    period = {"pickup_at": "2031-04-01T10:00:00", "return_at": "2031-04-01T12:00:00"}
+    response = client.post("/reservation/", data={"vehicle_id": 7, **period})
+    assert response.status_code == 302
+    # the same period, given with another offset
+    offset = timezone(timedelta(hours=5))
+    period = {
+        name: datetime.fromisoformat(value).astimezone(offset).isoformat()
+        for name, value in period.items()
+    }
+    response = client.post("/reservation/", data={"vehicle_id": 7, **period})
+    assert response.status_code == 409
+    with app.app_context():
+        for reservation in reservation_service.get_all():
+            reservation_service.delete(reservation.id)